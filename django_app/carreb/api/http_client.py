@@ -0,0 +1,143 @@
+import asyncio
+import random
+import threading
+from urllib.parse import urlparse
+
+import aiohttp
+from django.conf import settings
+
+# Responses worth retrying; any other 4xx is final
+RETRY_STATUSES = {408, 425, 429, 500, 502, 503, 504}
+
+# Bytes read per chunk when a response is inspected while streaming
+STREAM_CHUNK_SIZE = 4096
+
+
+class HttpFetchError(Exception):
+    def __init__(self, url, status=None, message=''):
+        self.url = url
+        self.status = status
+        super().__init__(f"{url}: {message or status}")
+
+
+class AsyncHttpClient:
+    """
+    Shared aiohttp client for outbound downloads (the scraper, CarVariants.download_image): keep-alive
+    connection pool with per-host caps, hard timeouts, and bounded retries with jittered exponential backoff.
+
+    The session lives on a private event loop thread, so synchronous callers (views, management commands,
+    the image worker's thread pool) use fetch_sync() and still share one pool.
+    """
+
+    def __init__(self, pool_size=None, per_host=None, timeout=None, retries=None, backoff=None):
+        self.pool_size = pool_size or getattr(settings, 'SCRAPER_HTTP_POOL_SIZE', 32)
+        self.per_host = per_host or getattr(settings, 'SCRAPER_HTTP_PER_HOST', 4)
+        self.timeout = timeout or getattr(settings, 'SCRAPER_HTTP_TIMEOUT', 15.0)
+        self.retries = getattr(settings, 'SCRAPER_HTTP_RETRIES', 3) if retries is None else retries
+        self.backoff = getattr(settings, 'SCRAPER_HTTP_BACKOFF', 0.5) if backoff is None else backoff
+        self._session = None
+        self._host_slots = {}
+        self._loop = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, limit_per_host=self.per_host, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout, connect=min(self.timeout, 5.0)),
+            )
+        return self._session
+
+    def _host_slot(self, url):
+        # Callers queue here rather than inside the connector, so waiting for a slot is not
+        # counted against the request timeout
+        host = urlparse(url).netloc.lower()
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.per_host)
+        return self._host_slots[host]
+
+    def _retry_delay(self, attempt, retry_after=None):
+        delay = self.backoff * (2 ** attempt) * random.uniform(0.5, 1.5)
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, min(float(retry_after), 60.0))
+        return delay
+
+    async def fetch(self, url, headers=None, inspect=None):
+        """
+        GET url and return the body. inspect(data) is called on the bytes read so far: True keeps reading,
+        False drops the connection and returns None, None asks for another chunk.
+        """
+        session = self._get_session()
+        attempt = 0
+        while True:
+            retry_after = None
+            try:
+                async with self._host_slot(url), session.get(url, headers=headers) as response:
+                    if response.status in RETRY_STATUSES:
+                        retry_after = response.headers.get('Retry-After')
+                        raise HttpFetchError(url, response.status)
+                    if response.status >= 400:
+                        raise HttpFetchError(url, response.status)
+
+                    if inspect is None:
+                        return await response.read()
+
+                    data = b''
+                    async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                        data += chunk
+                        verdict = inspect(data)
+                        if verdict is False:
+                            # Leaving the block without reading the body closes the connection
+                            response.close()
+                            return None
+                        if verdict:
+                            return data + await response.read()
+                    return data
+
+            except HttpFetchError as e:
+                if e.status not in RETRY_STATUSES or attempt >= self.retries:
+                    raise
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt >= self.retries:
+                    raise HttpFetchError(url, message=f"{type(e).__name__} {e}") from e
+
+            await asyncio.sleep(self._retry_delay(attempt, retry_after))
+            attempt += 1
+
+    async def fetch_many(self, urls, headers=None, inspect=None):
+        """Fetch urls concurrently (bounded by the pool). Failed fetches come back as exceptions."""
+        return await asyncio.gather(*(self.fetch(url, headers, inspect) for url in urls), return_exceptions=True)
+
+    def _ensure_loop(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name='scraper-http', daemon=True)
+                self._thread.start()
+        return self._loop
+
+    def run(self, coroutine):
+        """Run a coroutine on the client's loop from synchronous code"""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_loop()).result()
+
+    def fetch_sync(self, url, headers=None, inspect=None):
+        return self.run(self.fetch(url, headers, inspect))
+
+    def close(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                return
+            loop, thread = self._loop, self._thread
+            self._thread = None
+        if self._session is not None:
+            asyncio.run_coroutine_threadsafe(self._session.close(), loop).result()
+            self._session = None
+        self._host_slots = {}
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+http_client = AsyncHttpClient()
@@ -0,0 +1,51 @@
+# api/management/commands/benchmark_json.py
+# python3 manage.py benchmark_json
+# python3 manage.py benchmark_json --rows 5000 --repeat 20
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+from api.models import CarDetails
+from api.renderers import FastJSONRenderer, orjson
+from api.serializers import CarDetailsSerializer
+from api.views import CAR_DETAILS_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Compare CarMatchesListView rendering: ModelSerializer + JSONRenderer vs values() + FastJSONRenderer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=2000, help='Number of car_details rows per response')
+        parser.add_argument('--repeat', type=int, default=10, help='Timed passes per path (best is reported)')
+
+    def time_best(self, func, repeat):
+        best = None
+        for _ in range(repeat):
+            started = time.perf_counter()
+            output = func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, output
+
+    def handle(self, *args, **options):
+        queryset = CarDetails.objects.order_by('car_model_id')[:options['rows']]
+        repeat = max(1, options['repeat'])
+
+        def serializer_path():
+            return JSONRenderer().render(CarDetailsSerializer(list(queryset), many=True).data)
+
+        def fast_path():
+            return FastJSONRenderer().render(list(queryset.values(*CAR_DETAILS_FIELDS)))
+
+        serializer_time, serializer_output = self.time_best(serializer_path, repeat)
+        fast_time, fast_output = self.time_best(fast_path, repeat)
+
+        rows = len(json.loads(fast_output))
+        if json.loads(serializer_output) != json.loads(fast_output):
+            self.stdout.write(self.style.ERROR('Outputs differ between the two paths'))
+
+        self.stdout.write(f'{rows} rows, best of {repeat}, encoder: {"orjson" if orjson else "json (stdlib)"}')
+        self.stdout.write(f'ModelSerializer + JSONRenderer: {serializer_time * 1000:.1f} ms')
+        self.stdout.write(f'values() + FastJSONRenderer:    {fast_time * 1000:.1f} ms')
+        self.stdout.write(self.style.SUCCESS(f'Speedup: {serializer_time / fast_time:.1f}x' if fast_time else 'Speedup: n/a'))
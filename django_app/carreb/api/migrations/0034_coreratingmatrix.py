@@ -0,0 +1,39 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:42
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0033_populate_grid_emissions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CoreRatingMatrix',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('variant_id', models.IntegerField()),
+                ('state', models.CharField(max_length=5)),
+                ('km_band', models.IntegerField()),
+                ('off_grid_band', models.IntegerField()),
+                ('with_finance', models.BooleanField(default=False)),
+                ('drive_away_price', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('cost_of_ownership_5yr', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('emissions_5yr_kg', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('coo_score', models.DecimalField(decimal_places=4, default=0, max_digits=6)),
+                ('emissions_score', models.DecimalField(decimal_places=4, default=0, max_digits=6)),
+                ('core_rating', models.DecimalField(decimal_places=4, default=0, max_digits=6)),
+                ('star_rating', models.IntegerField(default=1)),
+                ('rating_description', models.CharField(blank=True, max_length=100, null=True)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'core_rating_matrix',
+                'unique_together': {('variant_id', 'state', 'km_band', 'off_grid_band', 'with_finance')},
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:47
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0034_coreratingmatrix'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RatingRun',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('running', 'Running'), ('complete', 'Complete'), ('failed', 'Failed')], default='running', max_length=20)),
+                ('rows_written', models.IntegerField(default=0)),
+                ('started_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'rating_runs',
+                'indexes': [models.Index(fields=['status', 'completed_at'], name='rating_runs_status_4aa177_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='CarRatingResult',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('state', models.CharField(max_length=5)),
+                ('core_rating', models.DecimalField(decimal_places=4, default=0, max_digits=6)),
+                ('cost_of_ownership_5yr', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('emissions_5yr_kg', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('car_variant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rating_results', to='api.carvariants')),
+                ('run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='results', to='api.ratingrun')),
+            ],
+            options={
+                'db_table': 'car_rating_results',
+                'unique_together': {('run', 'car_variant', 'state')},
+            },
+        ),
+    ]
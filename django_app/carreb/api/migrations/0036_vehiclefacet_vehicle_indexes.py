@@ -0,0 +1,48 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:53
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0035_ratingrun_carratingresult'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehicleFacet',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('make_key', models.CharField(max_length=255)),
+                ('model_key', models.CharField(max_length=255)),
+                ('make_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('model', models.CharField(blank=True, max_length=255, null=True)),
+                ('year', models.CharField(blank=True, max_length=5, null=True)),
+                ('engine_type', models.CharField(blank=True, max_length=100, null=True)),
+                ('vehicle_id_min', models.IntegerField()),
+                ('vehicle_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'vehicle_facets',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='vehicles',
+            index=models.Index(fields=['make_name', 'model', 'year', 'engine_type'], name='vehicles_make_na_eb6747_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehicles',
+            index=models.Index(fields=['vehicle_id'], name='vehicles_vehicle_06c6b1_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiclefacet',
+            index=models.Index(fields=['make_key', 'model'], name='vehicle_fac_make_ke_f25491_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='vehiclefacet',
+            index=models.Index(fields=['make_key', 'model_key', 'year', 'engine_type'], name='vehicle_fac_make_ke_88bac1_idx'),
+        ),
+    ]
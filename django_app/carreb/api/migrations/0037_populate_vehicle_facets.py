@@ -0,0 +1,54 @@
+from django.db import migrations
+from django.db.models import Count, Min
+
+
+def populate_vehicle_facets(apps, schema_editor):
+    """
+    Builds VehicleFacet from the existing Vehicles rows.
+    Later imports rebuild it with api.services.rebuild_vehicle_facets().
+    """
+    Vehicles = apps.get_model('api', 'Vehicles')
+    VehicleFacet = apps.get_model('api', 'VehicleFacet')
+
+    vehicle_groups = (
+        Vehicles.objects
+        .values_list('make_name', 'model', 'year', 'engine_type')
+        .annotate(min_id=Min('id'), count=Count('id'))
+        .order_by()
+    )
+
+    display = {}
+    facets = {}
+    for make_name, model, year, engine_type, min_id, count in sorted(vehicle_groups, key=lambda group: group[4]):
+        make_key = (make_name or '').strip().lower()
+        model_key = (model or '').strip().lower()
+        make_name, model = display.setdefault((make_key, model_key), (make_name, model))
+
+        key = (make_key, model_key, year, engine_type)
+        if key in facets:
+            facets[key].vehicle_count += count
+        else:
+            facets[key] = VehicleFacet(
+                make_key=make_key,
+                model_key=model_key,
+                make_name=make_name,
+                model=model,
+                year=year,
+                engine_type=engine_type,
+                vehicle_id_min=min_id,
+                vehicle_count=count,
+            )
+
+    VehicleFacet.objects.all().delete()
+    VehicleFacet.objects.bulk_create(facets.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0036_vehiclefacet_vehicle_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_vehicle_facets, migrations.RunPython.noop),
+    ]
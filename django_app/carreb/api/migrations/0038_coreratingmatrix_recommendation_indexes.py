@@ -0,0 +1,25 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0037_populate_vehicle_facets'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='coreratingmatrix',
+            index=models.Index(fields=['state', 'km_band', 'off_grid_band', 'with_finance', 'coo_score'], name='core_rating_state_bd7c04_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coreratingmatrix',
+            index=models.Index(fields=['state', 'km_band', 'off_grid_band', 'with_finance', 'emissions_score'], name='core_rating_state_881e6d_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='coreratingmatrix',
+            index=models.Index(fields=['state', 'km_band', 'off_grid_band', 'with_finance', 'core_rating'], name='core_rating_state_5a0404_idx'),
+        ),
+    ]
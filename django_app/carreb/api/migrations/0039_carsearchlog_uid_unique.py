@@ -0,0 +1,48 @@
+from django.db import migrations, models
+
+
+def create_uid_index(apps, schema_editor):
+    """
+    Adds the unique index on car_search_logs.uid without blocking writes to the live table.
+    """
+    vendor = schema_editor.connection.vendor
+    if vendor == 'mysql':
+        # Online DDL: the table stays readable and writable while the index is built
+        sql = "ALTER TABLE car_search_logs ADD UNIQUE INDEX car_search_logs_uid_uniq (uid), ALGORITHM=INPLACE, LOCK=NONE"
+    elif vendor == 'postgresql':
+        sql = "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS car_search_logs_uid_uniq ON car_search_logs (uid)"
+    else:
+        sql = "CREATE UNIQUE INDEX IF NOT EXISTS car_search_logs_uid_uniq ON car_search_logs (uid)"
+    schema_editor.execute(sql)
+
+
+def drop_uid_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'mysql':
+        schema_editor.execute("ALTER TABLE car_search_logs DROP INDEX car_search_logs_uid_uniq")
+    else:
+        schema_editor.execute("DROP INDEX IF EXISTS car_search_logs_uid_uniq")
+
+
+class Migration(migrations.Migration):
+
+    # Online index builds cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('api', '0038_coreratingmatrix_recommendation_indexes'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(create_uid_index, drop_uid_index),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='carsearchlog',
+                    name='uid',
+                    field=models.CharField(blank=True, max_length=50, null=True, unique=True),
+                ),
+            ],
+        ),
+    ]
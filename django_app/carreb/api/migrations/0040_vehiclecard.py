@@ -0,0 +1,26 @@
+# Generated by Django 4.2.30 on 2026-10-18 02:58
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0039_carsearchlog_uid_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VehicleCard',
+            fields=[
+                ('vehicle', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='card', serialize=False, to='api.vehicles')),
+                ('document', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'db_table': 'vehicle_cards',
+            },
+        ),
+    ]
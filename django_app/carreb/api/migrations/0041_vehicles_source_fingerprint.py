@@ -0,0 +1,23 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0040_vehiclecard'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicles',
+            name='source_hash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='vehicles',
+            name='source_id',
+            field=models.IntegerField(blank=True, null=True, unique=True),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0041_vehicles_source_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicleimages',
+            name='image_formats',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='vehicleimages',
+            name='image_placeholder',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='vehicleimages',
+            name='image_widths',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0042_vehicleimages_derivatives'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='vehicleimages',
+            name='phash',
+            field=models.CharField(blank=True, db_index=True, max_length=16, null=True),
+        ),
+    ]
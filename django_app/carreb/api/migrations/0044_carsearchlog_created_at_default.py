@@ -0,0 +1,19 @@
+# Generated by Django 4.2.30 on 2026-10-18 03:29
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0043_vehicleimages_phash'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='carsearchlog',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
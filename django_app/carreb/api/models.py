@@ -1,3 +1,7 @@
+import os
+from urllib.parse import urlparse
+
+from django.core.files.base import ContentFile
 from django.db import models
 from django.utils import timezone
 
@@ -54,8 +58,9 @@ class CarVariants(models.Model):
         """Download image from image_url and save to image field"""
         if self.image_url and not self.image:
             try:
-                response = requests.get(self.image_url, timeout=30)
-                response.raise_for_status()
+                # Shared pooled client with retries; imported here so loading models does not pull in aiohttp
+                from .http_client import http_client
+                content = http_client.fetch_sync(self.image_url)
                 
                 # Get filename from URL
                 parsed_url = urlparse(self.image_url)
@@ -66,7 +71,7 @@ class CarVariants(models.Model):
                 # Save image
                 self.image.save(
                     filename,
-                    ContentFile(response.content),
+                    ContentFile(content),
                     save=True
                 )
                 return True
@@ -203,9 +208,16 @@ class Vehicles(models.Model):
     annual_tailpipe_co2 = models.DecimalField(max_digits=10, decimal_places=2)
     fuel_lifecycle_co2 = models.IntegerField()
     noise_data = models.CharField(max_length=100, null=True, blank=True)
+    # GVG source row and fingerprint of its raw values, for incremental re-imports
+    source_id = models.IntegerField(null=True, blank=True, unique=True)
+    source_hash = models.CharField(max_length=64, null=True, blank=True)
 
     class Meta:
         db_table = "vehicles"
+        indexes = [
+            models.Index(fields=['make_name', 'model', 'year', 'engine_type']),
+            models.Index(fields=['vehicle_id']),
+        ]
 
     def __str__(self):
         return f"{self.id} {self.year} {self.make} {self.model}"
@@ -214,7 +226,7 @@ class Vehicles(models.Model):
 # Car search log
 class CarSearchLog(models.Model):
     id = models.AutoField(primary_key=True)
-    uid = models.CharField(max_length=50, null=True, blank=True)
+    uid = models.CharField(max_length=50, null=True, blank=True, unique=True)
     save_money = models.BooleanField(default=False)
     greener_car = models.BooleanField(default=False)
     good_all_rounder = models.BooleanField(default=False)
@@ -229,7 +241,8 @@ class CarSearchLog(models.Model):
     ip_address = models.GenericIPAddressField()
     referral_code = models.CharField(max_length=255, blank=True, null=True)
     user_agent = models.TextField(blank=True, null=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set by the buffered writer at submit time; auto_now_add would stamp the (later) insert time
+    created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
@@ -245,6 +258,12 @@ class VehicleImages(models.Model):
     id = models.AutoField(primary_key=True)
     vehicle_id = models.CharField(max_length=20, null=True, blank=True)
     image_name = models.CharField(max_length=255, null=True, blank=True)
+    # Resized copies written next to image_name as {stem}-{width}w.{format}, and a tiny inline preview
+    image_widths = models.JSONField(default=list, blank=True)
+    image_formats = models.JSONField(default=list, blank=True)
+    image_placeholder = models.TextField(null=True, blank=True)
+    # 64-bit dHash of image_name (hex); near-duplicate rows share one canonical file
+    phash = models.CharField(max_length=16, null=True, blank=True, db_index=True)
 
     class Meta:
         db_table = "vehicle_images"
@@ -320,3 +339,119 @@ class ElectricityGridEmissions(models.Model):
     def __str__(self):
         return self.state
 
+
+# Precomputed CORE rating per variant, state and usage profile
+class CoreRatingMatrix(models.Model):
+    id = models.AutoField(primary_key=True)
+    variant_id = models.IntegerField()
+    state = models.CharField(max_length=5)
+    km_band = models.IntegerField()
+    off_grid_band = models.IntegerField()
+    with_finance = models.BooleanField(default=False)
+    drive_away_price = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cost_of_ownership_5yr = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    emissions_5yr_kg = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    coo_score = models.DecimalField(max_digits=6, decimal_places=4, default=0)
+    emissions_score = models.DecimalField(max_digits=6, decimal_places=4, default=0)
+    core_rating = models.DecimalField(max_digits=6, decimal_places=4, default=0)
+    star_rating = models.IntegerField(default=1)
+    rating_description = models.CharField(max_length=100, null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'core_rating_matrix'
+        unique_together = ['variant_id', 'state', 'km_band', 'off_grid_band', 'with_finance']
+        # Recommendation candidate pools, read in score order per usage profile
+        indexes = [
+            models.Index(fields=['state', 'km_band', 'off_grid_band', 'with_finance', 'coo_score']),
+            models.Index(fields=['state', 'km_band', 'off_grid_band', 'with_finance', 'emissions_score']),
+            models.Index(fields=['state', 'km_band', 'off_grid_band', 'with_finance', 'core_rating']),
+        ]
+
+    def __str__(self):
+        return f"{self.variant_id} {self.state} {self.km_band} {self.off_grid_band} {self.with_finance} {self.core_rating}"
+
+# Versioned rating run; readers only see results of the latest completed run
+class RatingRun(models.Model):
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETE = 'complete'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETE, 'Complete'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    id = models.AutoField(primary_key=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_RUNNING)
+    rows_written = models.IntegerField(default=0)
+    started_at = models.DateTimeField(default=timezone.now)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        db_table = 'rating_runs'
+        indexes = [
+            models.Index(fields=['status', 'completed_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.id} {self.status} {self.started_at} {self.completed_at}"
+
+# CORE rating, 5-year COO and emissions per variant and state, written by calculate_ratings
+class CarRatingResult(models.Model):
+    id = models.AutoField(primary_key=True)
+    run = models.ForeignKey(RatingRun, on_delete=models.CASCADE, related_name='results')
+    car_variant = models.ForeignKey(CarVariants, on_delete=models.CASCADE, related_name='rating_results')
+    state = models.CharField(max_length=5)
+    core_rating = models.DecimalField(max_digits=6, decimal_places=4, default=0)
+    cost_of_ownership_5yr = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    emissions_5yr_kg = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'car_rating_results'
+        unique_together = ['run', 'car_variant', 'state']
+
+    def __str__(self):
+        return f"{self.run_id} {self.car_variant_id} {self.state} {self.core_rating}"
+
+
+# Distinct make -> model -> year -> engine type combinations of Vehicles for the search dropdowns.
+# Rebuilt by api.services.rebuild_vehicle_facets() after each vehicle import.
+class VehicleFacet(models.Model):
+    id = models.AutoField(primary_key=True)
+    make_key = models.CharField(max_length=255)
+    model_key = models.CharField(max_length=255)
+    make_name = models.CharField(max_length=255, null=True, blank=True)
+    model = models.CharField(max_length=255, null=True, blank=True)
+    year = models.CharField(max_length=5, null=True, blank=True)
+    engine_type = models.CharField(max_length=100, null=True, blank=True)
+    vehicle_id_min = models.IntegerField()
+    vehicle_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'vehicle_facets'
+        indexes = [
+            models.Index(fields=['make_key', 'model']),
+            models.Index(fields=['make_key', 'model_key', 'year', 'engine_type']),
+        ]
+
+    def __str__(self):
+        return f"{self.make_name} {self.model} {self.year} {self.engine_type}"
+
+
+# Precomputed match result card per vehicle: specs, image and per-state rating metrics.
+# Regenerated by api.vehicle_cards when the vehicle, its image or the rating matrix changes.
+class VehicleCard(models.Model):
+    vehicle = models.OneToOneField(Vehicles, on_delete=models.CASCADE, primary_key=True, related_name='card')
+    document = models.JSONField(default=dict)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'vehicle_cards'
+
+    def __str__(self):
+        return f"{self.vehicle_id} {self.updated_at}"
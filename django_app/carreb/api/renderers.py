@@ -0,0 +1,51 @@
+import datetime
+import decimal
+import json
+import uuid
+
+from rest_framework.renderers import BaseRenderer
+
+try:
+    import orjson
+except ImportError:
+    # Optional: without orjson the stdlib encoder is used
+    orjson = None
+
+
+def _coerce(value):
+    """Types neither encoder handles natively; Decimals are sent as JSON numbers, not strings"""
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return _isoformat(value)
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _isoformat(value):
+    # Same format as DRF's DateTimeField: UTC offset written as 'Z'
+    text = value.isoformat()
+    return text[:-6] + 'Z' if text.endswith('+00:00') else text
+
+
+def dumps(data):
+    """Encode to compact UTF-8 JSON bytes, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data, default=_coerce, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, default=_coerce, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONRenderer(BaseRenderer):
+    """Opt-in JSON renderer for list-heavy views that return plain dicts (e.g. from values()).
+
+    Set renderer_classes = [FastJSONRenderer] on the view. Decimals render as numbers.
+    """
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps(data)
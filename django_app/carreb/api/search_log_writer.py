@@ -0,0 +1,214 @@
+import atexit
+import fcntl
+import json
+import os
+import threading
+import uuid
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import close_old_connections, DataError, IntegrityError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import CarSearchLog
+
+
+class SearchLogWriter:
+    """Buffered CarSearchLog writer.
+
+    submit() assigns the uid and returns at once; a background thread writes the buffer with
+    bulk_create when it reaches batch_size or every flush_interval seconds. Rows that cannot be
+    written are appended to a JSONL spill file and replayed on the next successful flush.
+    At most max_pending rows are held in memory; while the buffer is full (the database is
+    stalled) new rows are spilled straight to the file.
+    """
+
+    def __init__(self, batch_size=None, flush_interval=None, spill_path=None, max_pending=None):
+        self.batch_size = batch_size or getattr(settings, 'SEARCH_LOG_BATCH_SIZE', 100)
+        self.flush_interval = flush_interval or getattr(settings, 'SEARCH_LOG_FLUSH_INTERVAL', 1.0)
+        self.spill_path = spill_path or getattr(settings, 'SEARCH_LOG_SPILL_PATH', None)
+        self.max_pending = max_pending or getattr(settings, 'SEARCH_LOG_MAX_PENDING', 10000)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def submit(self, **fields):
+        """Queue a search log and return its uid"""
+        uid = fields.get('uid') or str(uuid.uuid4())
+        fields['uid'] = uid
+        # Stamped now, so a row written late (or replayed from the spill file) keeps its search time
+        fields.setdefault('created_at', timezone.now())
+
+        with self._lock:
+            buffer_full = len(self._pending) >= self.max_pending
+            if not buffer_full:
+                self._pending[uid] = fields
+            pending_count = len(self._pending)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='search-log-writer', daemon=True)
+                self._thread.start()
+
+        if buffer_full:
+            # Flushes are not keeping up: persist the row now instead of growing the buffer,
+            # writing it directly (and waiting) when there is no spill file
+            if self.spill_path:
+                self._spill([fields])
+            else:
+                CarSearchLog.objects.create(**fields)
+            return uid
+
+        if pending_count >= self.batch_size:
+            self._wakeup.set()
+        return uid
+
+    def is_pending(self, uid):
+        with self._lock:
+            return uid in self._pending
+
+    def is_spilled(self, uid):
+        """True if uid is in the spill file, waiting for the database to come back"""
+        if not self.spill_path:
+            return False
+
+        for path in (self.spill_path, f"{self.spill_path}.replay"):
+            try:
+                with open(path) as spill_file:
+                    for line in spill_file:
+                        if uid in line and json.loads(line).get('uid') == uid:
+                            return True
+            except FileNotFoundError:
+                continue
+        return False
+
+    def ensure_written(self, uid):
+        """Flush now if uid is still buffered in this process"""
+        if self.is_pending(uid):
+            self.flush()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Search log flush error: {e}")
+            finally:
+                close_old_connections()
+
+    def flush(self):
+        """Write buffered (and previously spilled) logs. Returns the number of rows written."""
+        with self._flush_lock:
+            with self._lock:
+                batch = list(self._pending.values())
+
+            try:
+                written = self._replay_spill()
+            except Exception as e:
+                # Database still unavailable; the spill file is kept for the next flush
+                print(f"Search log spill replay failed: {e}")
+                written = 0
+
+            if batch:
+                try:
+                    CarSearchLog.objects.bulk_create([CarSearchLog(**fields) for fields in batch], batch_size=self.batch_size)
+                    written += len(batch)
+                except Exception as e:
+                    print(f"Search log write failed, spilling {len(batch)} rows: {e}")
+                    self._spill(batch)
+
+                # Written or spilled, either way no longer held in memory
+                with self._lock:
+                    for fields in batch:
+                        self._pending.pop(fields['uid'], None)
+            return written
+
+    def _spill(self, batch):
+        if not self.spill_path:
+            raise RuntimeError("SEARCH_LOG_SPILL_PATH is not set, search logs would be lost")
+
+        with open(self.spill_path, 'a') as spill_file:
+            for fields in batch:
+                spill_file.write(json.dumps(fields, default=str) + '\n')
+            spill_file.flush()
+            os.fsync(spill_file.fileno())
+
+    def _replay_spill(self):
+        if not self.spill_path:
+            return 0
+
+        replay_path = f"{self.spill_path}.replay"
+        # Nothing spilled: skip the lock file entirely
+        if not os.path.exists(self.spill_path) and not os.path.exists(replay_path):
+            return 0
+
+        with open(f"{self.spill_path}.lock", 'w') as lock_file:
+            # Workers share the spill file, only one of them replays it at a time
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return 0
+
+            # Claim the spill file so rows spilled meanwhile go to a fresh one.
+            # A replay file left by a failed replay is retried first.
+            if not os.path.exists(replay_path):
+                if not os.path.exists(self.spill_path):
+                    return 0
+                os.replace(self.spill_path, replay_path)
+
+            with open(replay_path) as spill_file:
+                rows = [json.loads(line) for line in spill_file if line.strip()]
+            for fields in rows:
+                fields['budget'] = Decimal(str(fields['budget'])) if fields.get('budget') is not None else 0
+                if fields.get('created_at'):
+                    fields['created_at'] = parse_datetime(fields['created_at'])
+
+            # Skip rows an interrupted replay already wrote
+            written_uids = set(
+                CarSearchLog.objects.filter(uid__in=[fields['uid'] for fields in rows]).values_list('uid', flat=True)
+            )
+            rows = [fields for fields in rows if fields['uid'] not in written_uids]
+
+            try:
+                CarSearchLog.objects.bulk_create([CarSearchLog(**fields) for fields in rows], batch_size=self.batch_size)
+                written = len(rows)
+            except (IntegrityError, DataError):
+                # One invalid row fails the whole batch: write row by row and set invalid rows aside
+                written = 0
+                rejected = []
+                for fields in rows:
+                    try:
+                        CarSearchLog.objects.create(**fields)
+                        written += 1
+                    except (IntegrityError, DataError) as e:
+                        print(f"Rejected spilled search log {fields['uid']}: {e}")
+                        rejected.append(fields)
+                if rejected:
+                    with open(f"{self.spill_path}.rejected", 'a') as rejected_file:
+                        for fields in rejected:
+                            rejected_file.write(json.dumps(fields, default=str) + '\n')
+
+            os.remove(replay_path)
+            return written
+
+
+search_log_writer = SearchLogWriter()
+atexit.register(search_log_writer.flush)
+
+
+def get_search_log(uid):
+    """CarSearchLog for a uid, or None. A row still buffered by this process is flushed first."""
+    if not uid:
+        return None
+
+    search_log_writer.ensure_written(uid)
+    return CarSearchLog.objects.filter(uid=uid).first()
+
+
+def is_search_log_pending(uid):
+    """True while a search log exists but is not yet in the database (buffered or spilled)"""
+    if not uid:
+        return False
+    return search_log_writer.is_pending(uid) or search_log_writer.is_spilled(uid)
@@ -1,34 +1,320 @@
-from .models import CarDetails, Vehicles, CarPricing, CarBodyCost, FuelRetailPrice, ElectricityGridEmissions
+from .models import CarDetails, Vehicles, CarPricing, CarBodyCost, FuelRetailPrice, ElectricityGridEmissions, VehicleFacet
+import codecs
 import math
+import threading
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min
+import hashlib
+
+# Rows per INSERT when loading the monthly guide file; keeps statements well under max_allowed_packet
+CAR_DETAILS_BATCH_SIZE = 1000
+
+# Header rows at the top of the guide file
+CAR_DETAILS_HEADER_ROWS = 3
+
+def iter_upload_lines(file):
+    """Yield the lines of an uploaded file, decoding UTF-8 incrementally chunk by chunk"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    remainder = ''
+    for chunk in file.chunks():
+        lines = (remainder + decoder.decode(chunk)).split("\n")
+        remainder = lines.pop()
+        yield from lines
+    remainder += decoder.decode(b'', final=True)
+    if remainder:
+        yield remainder
+
+def parse_car_details_line(line):
+    return CarDetails(
+        make=line[32:55].strip(),
+        family=line[55:80].strip(),
+        variant=line[80:111].strip(),
+        series=line[111:134].strip(),
+        style=line[134:157].strip(),
+        engine=line[157:182].strip(),
+        cc=line[182:186].strip(),
+        size=line[187:193].strip(),
+        transmission=line[193:214].strip(),
+        cylinder=line[214:219].strip(),
+        width=line[219:225].strip(),
+        year=line[232:236].strip(),
+        month=line[28:32].strip(),
+    )
 
 def ParseCarDetailsFromGG(file):
     """Reads a fixed-width data file starting from row 3 and stores the data in the database."""
-    data_to_insert = []
-
-    # Read and decode the file
-    decoded_file = file.read().decode('utf-8').strip().split("\n")
-
-    # Skip the first three rows
-    data_rows = decoded_file[3:]
-
-    for line in data_rows:
-        data = CarDetails(
-            make=line[32:55].strip(),
-            family=line[55:80].strip(),
-            variant=line[80:111].strip(),
-            series=line[111:134].strip(),
-            style=line[134:157].strip(),
-            engine=line[157:182].strip(),
-            cc=line[182:186].strip(),
-            size=line[187:193].strip(),
-            transmission=line[193:214].strip(),
-            cylinder=line[214:219].strip(),
-            width=line[219:225].strip(),
-            year=line[232:236].strip(),
-            month=line[28:32].strip(),
+    started = time.monotonic()
+    stored = 0
+    batch = []
+
+    # Stream the upload and insert in fixed-size batches; one transaction keeps the import all-or-nothing
+    with transaction.atomic():
+        for line_number, line in enumerate(iter_upload_lines(file)):
+            # Skip the first three rows
+            if line_number < CAR_DETAILS_HEADER_ROWS or not line.strip():
+                continue
+
+            batch.append(parse_car_details_line(line))
+            if len(batch) >= CAR_DETAILS_BATCH_SIZE:
+                CarDetails.objects.bulk_create(batch)
+                stored += len(batch)
+                batch = []
+                if stored % (CAR_DETAILS_BATCH_SIZE * 10) == 0:
+                    print(f"{stored} records stored ({stored / (time.monotonic() - started):.0f} rows/s)")
+
+        if batch:
+            CarDetails.objects.bulk_create(batch)
+            stored += len(batch)
+
+    elapsed = time.monotonic() - started
+    rows_per_second = stored / elapsed if elapsed > 0 else 0
+    return {
+        "message": f"{stored} records successfully stored.",
+        "records": stored,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(rows_per_second),
+    }
+
+def bulk_upsert(model, objs, unique_fields, update_fields, batch_size=1000):
+    """Insert or update rows in fixed-size batches using a single statement per batch."""
+    # MySQL/MariaDB resolve the conflict from the table's unique keys and reject an explicit target
+    if not connection.features.supports_update_conflicts_with_target:
+        unique_fields = None
+
+    written = 0
+    for start in range(0, len(objs), batch_size):
+        batch = objs[start:start + batch_size]
+        model.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=unique_fields,
+            update_fields=update_fields,
         )
-        data_to_insert.append(data)
+        written += len(batch)
+    return written
+
+
+
+# Columns of FuelRetailPrice holding the per-state average retail price
+FUEL_PRICE_STATES = ['nsw', 'vic', 'qld', 'sa', 'wa', 'nt', 'tas', 'act', 'national']
+
+class ReferenceDataCache:
+    """Process-local cache of the small reference tables used by every calculation.
+
+    FuelRetailPrice, ElectricityGridEmissions and CarBodyCost change a few times a year.
+    Saves and deletes in this process invalidate the cache through signals (api.signals),
+    other processes pick changes up when the TTL expires.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self.version = 0
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._loaded_at = 0.0
+
+    def invalidate(self, **kwargs):
+        with self._lock:
+            self.version += 1
+            self._snapshot = None
+
+    def _get_ttl(self):
+        return self.ttl if self.ttl is not None else getattr(settings, 'REFERENCE_DATA_CACHE_TTL', 300)
+
+    def _get_snapshot(self):
+        snapshot = self._snapshot
+        if snapshot is not None and time.monotonic() - self._loaded_at < self._get_ttl():
+            return snapshot
+
+        version = self.version
+        snapshot = self._load()
+        with self._lock:
+            # Do not publish data that was invalidated while it was being loaded
+            if version == self.version:
+                self._snapshot = snapshot
+                self._loaded_at = time.monotonic()
+        return snapshot
+
+    def _load(self):
+        fuel_rows = list(
+            FuelRetailPrice.objects
+            .order_by('id')
+            .values('fuel_type', 'year_type', 'year_to', 'is_active', *FUEL_PRICE_STATES)
+        )
+
+        emissions_factors = {
+            state.strip().upper(): float(factor)
+            for state, factor in ElectricityGridEmissions.objects.values_list('state', 'emissions_factor_kg_per_kwh')
+        }
+
+        # Same row as CarBodyCost.objects.filter(type=...).first()
+        body_costs = {}
+        for body_cost in CarBodyCost.objects.order_by('id'):
+            if body_cost.type:
+                body_costs.setdefault(body_cost.type.strip().lower(), body_cost)
+
+        return {
+            'fuel_rows': fuel_rows,
+            'emissions_factors': emissions_factors,
+            'body_costs': body_costs,
+        }
+
+    def emissions_factor(self, state):
+        """Grid emissions factor (kg CO2 per kWh) for a state, or None"""
+        return self._get_snapshot()['emissions_factors'].get((state or '').strip().upper())
+
+    def emissions_factors(self):
+        return dict(self._get_snapshot()['emissions_factors'])
+
+    def body_cost(self, body_type):
+        """CarBodyCost row for a body type, or None"""
+        return self._get_snapshot()['body_costs'].get((body_type or '').strip().lower())
+
+    def latest_fuel_price(self, fuel_type=FuelRetailPrice.FUEL_PETROL, year_type=FuelRetailPrice.YEAR_CY):
+        """Most recent active FuelRetailPrice row (as a dict) for a fuel and year type, or None"""
+        latest = None
+        for row in self._get_snapshot()['fuel_rows']:
+            if row['fuel_type'] != fuel_type or row['year_type'] != year_type or not row['is_active']:
+                continue
+            if latest is None or (row['year_to'] or 0) > (latest['year_to'] or 0):
+                latest = row
+        return latest
+
+reference_data = ReferenceDataCache()
+
+
+def normalize_facet_key(value):
+    """Exact-match key for the make / model dropdowns"""
+    return (value or '').strip().lower()
+
+def build_vehicle_facet_rows(vehicle_groups):
+    """Merge (make_name, model, year, engine_type, min_id, count) groups into facet rows.
+
+    Groups that differ only by case or surrounding whitespace share one row, shown with the
+    spelling of the lowest vehicle id, so each dropdown lists every make / model once.
+    """
+    display = {}
+    facets = {}
+    for make_name, model, year, engine_type, min_id, count in sorted(vehicle_groups, key=lambda group: group[4]):
+        make_key = normalize_facet_key(make_name)
+        model_key = normalize_facet_key(model)
+        make_name, model = display.setdefault((make_key, model_key), (make_name, model))
+
+        key = (make_key, model_key, year, engine_type)
+        if key in facets:
+            facets[key]['vehicle_count'] += count
+        else:
+            facets[key] = {
+                'make_key': make_key,
+                'model_key': model_key,
+                'make_name': make_name,
+                'model': model,
+                'year': year,
+                'engine_type': engine_type,
+                'vehicle_id_min': min_id,
+                'vehicle_count': count,
+            }
+    return list(facets.values())
+
+def list_vehicle_facets(field, order_by, make, model=None, year=None):
+    """Distinct values of field for a make (model, year) with the lowest vehicle id of each.
+
+    Matches the normalized make / model key exactly. CarMakes.name, which feeds the make dropdown,
+    is maintained apart from Vehicles.make_name, so when the exact key finds nothing this falls back
+    to the substring match the dropdowns used before the facet table.
+    """
+    for lookup in ['exact', 'icontains']:
+        facets = VehicleFacet.objects.filter(**{f'make_key__{lookup}': normalize_facet_key(make)})
+        if model is not None:
+            facets = facets.filter(**{f'model_key__{lookup}': normalize_facet_key(model)})
+        if year is not None:
+            facets = facets.filter(year=str(year).strip())
+
+        rows = list(facets.values(field).annotate(id=Min('vehicle_id_min')).order_by(order_by))
+        if rows:
+            break
+    return rows
+
+def rebuild_vehicle_facets():
+    """Rebuild VehicleFacet from Vehicles with a single GROUP BY scan. Returns the number of facets."""
+    vehicle_groups = (
+        Vehicles.objects
+        .values_list('make_name', 'model', 'year', 'engine_type')
+        .annotate(min_id=Min('id'), count=Count('id'))
+        .order_by()
+    )
+    rows = [VehicleFacet(**row) for row in build_vehicle_facet_rows(vehicle_groups)]
+
+    # Swap the whole table in one transaction so the dropdowns never see a partial rebuild
+    with transaction.atomic():
+        VehicleFacet.objects.all().delete()
+        VehicleFacet.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+def get_vehicle_catalogue_version(make=None):
+    """(etag, last_modified) of the catalogue tree, from one aggregate query over VehicleFacet.
+
+    CarCatalogueView memoizes the pair on the request, so its ETag and Last-Modified checks share one call.
+    """
+    facets = VehicleFacet.objects.all()
+    if make:
+        facets = facets.filter(make_key=normalize_facet_key(make))
+    version = facets.aggregate(count=Count('id'), max_id=Max('id'), built_at=Max('created_at'))
+
+    # Facets are rebuilt wholesale, so new ids and created_at change on every import
+    etag = hashlib.md5(
+        f"{normalize_facet_key(make)}:{version['count']}:{version['max_id']}:{version['built_at']}".encode()
+    ).hexdigest()
+    return etag, version['built_at']
+
+def build_vehicle_catalogue(make=None):
+    """Nested make -> model -> year -> engine type tree, with the lowest vehicle id at each level"""
+    facets = VehicleFacet.objects.order_by('make_key', 'model_key', '-year', 'engine_type')
+    if make:
+        facets = facets.filter(make_key=normalize_facet_key(make))
+
+    makes = {}
+    for make_key, make_name, model_key, model, year, engine_type, vehicle_id_min in facets.values_list(
+        'make_key', 'make_name', 'model_key', 'model', 'year', 'engine_type', 'vehicle_id_min'
+    ):
+        make_node = makes.setdefault(make_key, {'name': make_name, 'id': vehicle_id_min, 'models': {}})
+        model_node = make_node['models'].setdefault(model_key, {'model': model, 'id': vehicle_id_min, 'years': {}})
+        year_node = model_node['years'].setdefault(year, {'year': year, 'id': vehicle_id_min, 'engine_types': []})
+        year_node['engine_types'].append({'engine_type': engine_type, 'id': vehicle_id_min})
+
+        make_node['id'] = min(make_node['id'], vehicle_id_min)
+        model_node['id'] = min(model_node['id'], vehicle_id_min)
+        year_node['id'] = min(year_node['id'], vehicle_id_min)
+
+    return [
+        {
+            'name': make_node['name'],
+            'id': make_node['id'],
+            'models': [
+                {
+                    'model': model_node['model'],
+                    'id': model_node['id'],
+                    'years': list(model_node['years'].values()),
+                }
+                for model_node in make_node['models'].values()
+            ],
+        }
+        for make_node in makes.values()
+    ]
+
+def _search_result_cache_key(uid):
+    return f"search_result:{uid}"
+
+def get_cached_search_result(uid):
+    """Recently served match result for a search session, or None"""
+    if not uid:
+        return None
+    return cache.get(_search_result_cache_key(uid))
 
-    # Bulk insert for better performance
-    CarDetails.objects.bulk_create(data_to_insert)
-    return {"message": f"{len(data_to_insert)} records successfully stored."}
\ No newline at end of file
+def cache_search_result(uid, result):
+    """Keep a search session's match result for SEARCH_SESSION_CACHE_TTL seconds so page refreshes skip the DB"""
+    if uid:
+        cache.set(_search_result_cache_key(uid), result, getattr(settings, 'SEARCH_SESSION_CACHE_TTL', 300))
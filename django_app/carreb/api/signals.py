@@ -0,0 +1,29 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from .models import CarBodyCost, FuelRetailPrice, ElectricityGridEmissions, Vehicles, VehicleImages
+from .services import reference_data
+from .vehicle_cards import build_vehicle_cards, build_vehicle_cards_for_images
+
+# Drop the cached reference tables whenever one of them changes in this process
+for reference_model in [FuelRetailPrice, ElectricityGridEmissions, CarBodyCost]:
+    post_save.connect(reference_data.invalidate, sender=reference_model, dispatch_uid=f'reference_data_save_{reference_model.__name__}')
+    post_delete.connect(reference_data.invalidate, sender=reference_model, dispatch_uid=f'reference_data_delete_{reference_model.__name__}')
+
+
+# Keep precomputed result cards in step with their vehicle and image.
+# Rebuilt after the transaction commits, so the save itself never waits on the card.
+def refresh_vehicle_card(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    transaction.on_commit(partial(build_vehicle_cards, [instance.pk]))
+
+def refresh_vehicle_image_cards(sender, instance, raw=False, **kwargs):
+    if raw or not instance.vehicle_id:
+        return
+    transaction.on_commit(partial(build_vehicle_cards_for_images, [instance.vehicle_id]))
+
+post_save.connect(refresh_vehicle_card, sender=Vehicles, dispatch_uid='vehicle_card_save')
+post_save.connect(refresh_vehicle_image_cards, sender=VehicleImages, dispatch_uid='vehicle_card_image_save')
+post_delete.connect(refresh_vehicle_image_cards, sender=VehicleImages, dispatch_uid='vehicle_card_image_delete')
@@ -1,3 +1,603 @@
-from django.test import TestCase
+import multiprocessing
+import os
+import tempfile
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from .models import (
+    CarMakes,
+    CarVariants,
+    CarPricing,
+    Vehicles,
+    FuelRetailPrice,
+    ElectricityGridEmissions,
+    CarBodyCost,
+    CarSearchLog,
+    VehicleCard,
+    CoreRatingMatrix,
+    CarRatingResult,
+    RatingRun,
+)
+from .services import ReferenceDataCache, bulk_upsert, rebuild_vehicle_facets, reference_data
+from .search_log_writer import SearchLogWriter, search_log_writer
+from .vehicle_cards import get_vehicle_card, render_vehicle_card
+from calc_app.services.batch_engine import VehicleCostBatch
+from calc_app.services.car_calculations import (
+    CarCalculationsProcessor,
+    DEFAULT_FINANCE_PARAMS,
+    calculate_core_rating,
+    calculate_vehicle_cost_no_finance,
+    compute_finance_costs,
+)
+from calc_app.services.parallel_ratings import build_core_rating_matrix_in_parallel, process_car_makes_in_parallel
+from calc_app.services.rating_matrix import build_core_rating_matrix
+from calc_app.services.recommendations import recommend_vehicles
+from calc_app.services.rating_results import (
+    complete_rating_run,
+    fail_rating_run,
+    get_current_rating_results,
+    get_current_rating_run,
+    prune_rating_runs,
+    save_rating_results,
+    start_rating_run,
+)
+
+BATCH_URL = '/api/car/calculate-batch-py/'
+SWEEP_URL = '/api/car/finance-sweep-py/'
+CORE_RATING_URL = '/api/car/calculate-core-rating-py/'
+CATALOGUE_URL = '/api/car/catalogue/'
+MATCH_BY_ID_URL = '/api/car/match/by-id/'
+MODELS_URL = '/api/car/models/'
+YEARS_URL = '/api/car/years/'
+
+
+def create_vehicle(pk, make, model, year, engine_type, drivetrain, price):
+    variant = CarVariants.objects.create(
+        id=pk, car_make=make, year=year, model=model, variant=f'Variant {pk}',
+        drivetrain=drivetrain, fuel_efficiency_combined_l_100km=Decimal('6.5'),
+    )
+    Vehicles.objects.create(
+        id=pk, vehicle_id=f'CRB-{year}-{pk:06d}', year=year, make='TOY', make_name=make.name,
+        model=model, body='SUV', doors=4, seats=5, engine='2.0L', engine_type=engine_type,
+        transmission_speed=6, drivetrain=drivetrain, annual_cost=1000,
+        fuel_consumption_comb=Decimal('6.5'), fuel_consumption_urban=0, fuel_consumption_extra=0,
+        energy_consumption=Decimal('15'), electric_range=0, annual_tailpipe_co2=Decimal('1600'),
+        fuel_lifecycle_co2=0, tailpipe_comb_value='150',
+    )
+    CarPricing.objects.create(
+        car_variant=variant, variant_id=pk, state='NSW',
+        drive_away_price=Decimal(price), registration=Decimal('800'),
+    )
+
+
+def create_reference_data():
+    for fuel_type, nsw in (('petrol', '195.5'), ('hybrid', '170'), ('ev', '150')):
+        FuelRetailPrice.objects.create(
+            fuel_type=fuel_type, year_type='cy', year_from=2024, year_to=2024,
+            nsw=Decimal(nsw), vic=1, qld=1, sa=1, wa=1, nt=1, tas=1, act=1, national=1,
+        )
+    ElectricityGridEmissions.objects.create(state='NSW', emissions_factor_kg_per_kwh=0.79)
+    CarBodyCost.objects.create(
+        type='SUV', insurance_cost_comprehensive_annual_min=1500,
+        insurance_cost_comprehensive_annual_max=2500,
+    )
+
+
+class VehicleApiTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        make = CarMakes.objects.create(name='Toyota', slug='toyota')
+        create_vehicle(1, make, 'Corolla', '2024', 'Petrol', 'FWD', 32000)
+        create_vehicle(2, make, 'Corolla', '2025', 'Hybrid', 'FWD', 36000)
+        create_vehicle(3, make, 'RAV4', '2025', 'Hybrid', 'AWD', 48000)
+        create_reference_data()
+
+
+class ReferenceDataCacheTests(VehicleApiTestCase):
+    def test_repeated_lookups_reuse_one_load(self):
+        cache = ReferenceDataCache(ttl=300)
+
+        with self.assertNumQueries(3):
+            cache.emissions_factor('NSW')
+        with self.assertNumQueries(0):
+            self.assertEqual(cache.emissions_factor('nsw'), 0.79)
+            self.assertEqual(cache.body_cost('suv').insurance_cost_comprehensive_annual_min, 1500)
+            self.assertEqual(cache.latest_fuel_price()['nsw'], Decimal('195.5'))
+
+    def test_saving_a_reference_row_clears_the_cached_value(self):
+        # The rollback after this test fires no signals
+        self.addCleanup(reference_data.invalidate)
+
+        self.assertEqual(reference_data.emissions_factor('NSW'), 0.79)
+        grid = ElectricityGridEmissions.objects.get(state='NSW')
+        grid.emissions_factor_kg_per_kwh = 0.64
+        grid.save()
+        self.assertEqual(reference_data.emissions_factor('NSW'), 0.64)
+
+        self.assertEqual(reference_data.latest_fuel_price()['nsw'], Decimal('195.5'))
+        FuelRetailPrice.objects.create(
+            fuel_type='petrol', year_type='cy', year_from=2025, year_to=2025,
+            nsw=Decimal('201'), vic=1, qld=1, sa=1, wa=1, nt=1, tas=1, act=1, national=1,
+        )
+        self.assertEqual(reference_data.latest_fuel_price()['nsw'], Decimal('201'))
+
+        self.assertIsNotNone(reference_data.body_cost('SUV'))
+        CarBodyCost.objects.filter(type='SUV').get().delete()
+        self.assertIsNone(reference_data.body_cost('SUV'))
+
+
+class VehicleBatchCalculatorViewTests(VehicleApiTestCase):
+    def test_returns_one_result_per_variant(self):
+        response = self.client.post(BATCH_URL, {'variant_ids': [1, 3], 'state': 'NSW'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 2)
+
+    def test_rejects_empty_variant_list(self):
+        response = self.client.post(BATCH_URL, {'variant_ids': [], 'state': 'NSW'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('error', response.data)
+
+    def test_rejects_too_many_variants(self):
+        response = self.client.post(BATCH_URL, {'variant_ids': list(range(1, 22)), 'state': 'NSW'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('error', response.data)
+
+
+class FinanceSweepViewTests(VehicleApiTestCase):
+    def sweep(self, **overrides):
+        payload = {
+            'variant_id': 1,
+            'state': 'NSW',
+            'deposit': {'min': 0, 'max': 10000, 'step': 5000},
+            'interest_rate_apr': [6.5, 7.5],
+            'loan_term_months': 60,
+            'balloon_payment_percent': 0,
+        }
+        payload.update(overrides)
+        return self.client.post(SWEEP_URL, payload, format='json')
+
+    def test_returns_grid_for_each_slider_combination(self):
+        response = self.sweep()
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['axes']['deposit'], [0.0, 5000.0, 10000.0])
+        # Grids are indexed [deposit][interest_rate_apr][loan_term_months][balloon_payment_percent]
+        monthly = response.data['grid']['monthly_repayment_total']
+        self.assertEqual(len(monthly), 3)
+        self.assertEqual(len(monthly[0]), 2)
+        self.assertGreater(monthly[0][0][0][0], monthly[2][0][0][0])
+
+    def test_rejects_oversized_grid(self):
+        # 200 values on every axis would be 1.6 billion points
+        wide = {'min': 1, 'max': 200, 'step': 1}
+        response = self.sweep(
+            deposit=wide, interest_rate_apr=wide, loan_term_months=wide, balloon_payment_percent=wide
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('exceeds the limit', response.data['error'])
+
+    def test_rejects_non_positive_loan_term(self):
+        response = self.sweep(loan_term_months=0)
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class CarCalculationsProcessorTests(VehicleApiTestCase):
+    def process_make(self):
+        make = CarMakes.objects.get(name='Toyota')
+        return CarCalculationsProcessor().process_single_car_make_data(make, start_rating_run())
+
+    def test_make_is_processed_in_a_fixed_number_of_queries(self):
+        # variants, their prices, the matching Vehicles and one results insert
+        result = self.process_make()
+        self.assertEqual(result['query_count'], 4)
+        self.assertEqual(result['results_written'], 3)
+
+        make = CarMakes.objects.get(name='Toyota')
+        for pk in range(4, 9):
+            create_vehicle(pk, make, 'Camry', '2025', 'Hybrid', 'FWD', 42000)
+
+        result = self.process_make()
+        self.assertEqual(result['query_count'], 4)
+        self.assertEqual(result['results_written'], 8)
+
+    def test_results_match_the_live_calculation(self):
+        self.process_make()
+
+        result = CarRatingResult.objects.get(car_variant_id=3, state='NSW')
+        expected = calculate_core_rating(3, 'NSW', None, None, with_finance=False)
+        self.assertAlmostEqual(float(result.core_rating), expected['core_rating'], places=4)
+        self.assertAlmostEqual(float(result.cost_of_ownership_5yr), expected['cost_of_ownership_5yr'], places=2)
+
+
+class RatingRunTests(VehicleApiTestCase):
+    def run_with_rating(self, core_rating):
+        run = start_rating_run()
+        save_rating_results([CarRatingResult(run=run, car_variant_id=1, state='NSW', core_rating=core_rating)])
+        return run
+
+    def test_results_become_live_when_the_run_completes(self):
+        run = self.run_with_rating(Decimal('0.5'))
+        self.assertIsNone(get_current_rating_run())
+
+        complete_rating_run(run)
+
+        self.assertEqual(get_current_rating_run(), run)
+        self.assertEqual(run.rows_written, 1)
+        self.assertEqual(get_current_rating_results().get().core_rating, Decimal('0.5'))
+
+    def test_failed_run_leaves_the_previous_run_live(self):
+        live_run = complete_rating_run(self.run_with_rating(Decimal('0.5')))
+
+        fail_rating_run(self.run_with_rating(Decimal('0.9')))
+
+        self.assertEqual(get_current_rating_run(), live_run)
+        self.assertEqual(get_current_rating_results().get().core_rating, Decimal('0.5'))
+
+    def test_pruning_keeps_the_configured_number_of_runs(self):
+        runs = []
+        for hours_ago in (4, 3, 2, 1):
+            run = self.run_with_rating(Decimal('0.5'))
+            RatingRun.objects.filter(pk=run.pk).update(
+                status=RatingRun.STATUS_COMPLETE, completed_at=timezone.now() - timedelta(hours=hours_ago)
+            )
+            runs.append(run)
+        fail_rating_run(self.run_with_rating(Decimal('0.1')))
+        running = self.run_with_rating(Decimal('0.2'))
+
+        prune_rating_runs(keep=3)
+
+        # Newest completed runs are kept, failed ones dropped, the open run is left alone
+        self.assertEqual(
+            sorted(RatingRun.objects.values_list('id', flat=True)),
+            [run.id for run in runs[1:]] + [running.id],
+        )
+        self.assertFalse(CarRatingResult.objects.filter(run=runs[0]).exists())
+
+    def test_completing_a_run_prunes_to_two(self):
+        runs = [complete_rating_run(self.run_with_rating(Decimal('0.5'))) for _ in range(3)]
+
+        self.assertEqual(
+            list(RatingRun.objects.filter(status=RatingRun.STATUS_COMPLETE).order_by('id').values_list('id', flat=True)),
+            [runs[1].id, runs[2].id],
+        )
+
+
+class VehicleCostBatchTests(VehicleApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        CarPricing.objects.create(
+            car_variant_id=3, variant_id=3, state='VIC',
+            drive_away_price=Decimal('49500'), registration=Decimal('900'),
+        )
+        ElectricityGridEmissions.objects.create(state='VIC', emissions_factor_kg_per_kwh=0.85)
+
+    def setUp(self):
+        self.batch = VehicleCostBatch.load([1, 2, 3])
+        self.rows = list(zip(self.batch.variant_id.tolist(), self.batch.state.tolist()))
+
+    def test_loads_every_priced_variant_and_state(self):
+        self.assertEqual(self.rows, [(1, 'NSW'), (2, 'NSW'), (3, 'NSW'), (3, 'VIC')])
+
+    def test_running_costs_match_the_scalar_engine(self):
+        running = self.batch.running_costs(23000, 60.0)
+
+        for i, (variant_id, state) in enumerate(self.rows):
+            expected = calculate_vehicle_cost_no_finance(variant_id, state, 23000, 60.0)
+            for field in ['annual_coo_base', 'fuel_cost_annual', 'other_running_costs_total', 'depreciation_5yr_amount', 'co2_emissions_total_kg']:
+                self.assertAlmostEqual(running[field][i], expected[field], places=6, msg=f'{field} for {variant_id}/{state}')
+
+    def test_finance_costs_match_the_scalar_engine(self):
+        finance_params = {**DEFAULT_FINANCE_PARAMS, 'balloon_payment_percent': 35, 'dealer_incentive': 1500}
+        finance = self.batch.finance_costs(**finance_params)
+
+        scalar_params = {key: value for key, value in finance_params.items() if key != 'finance_type'}
+        for i, drive_away_price in enumerate(self.batch.drive_away_price.tolist()):
+            expected = compute_finance_costs(drive_away_price, **scalar_params)
+            self.assertGreater(expected['balloon_payment_amount'], 0)
+            for field, value in expected.items():
+                self.assertAlmostEqual(finance[field][i], value, places=6, msg=field)
+
+    def test_core_ratings_match_calculate_core_rating(self):
+        for with_finance in (False, True):
+            ratings = self.batch.core_ratings(17000, 20.0, with_finance, DEFAULT_FINANCE_PARAMS)
+
+            for i, (variant_id, state) in enumerate(self.rows):
+                expected = calculate_core_rating(variant_id, state, 17000, 20.0, with_finance)
+                self.assertEqual(int(ratings['star_rating'][i]), expected['star_rating'])
+                # calculate_core_rating rounds to 2 (amounts) or 4 (scores) decimals, the batch does not
+                for field, decimals in [('cost_of_ownership_5yr', 2), ('emissions_5yr_kg', 2), ('coo_score', 4), ('emissions_score', 4), ('core_rating', 4)]:
+                    self.assertAlmostEqual(float(ratings[field][i]), expected[field], delta=0.5 * 10 ** -decimals + 1e-9, msg=f'{field} for {variant_id}/{state}')
+
+
+# Workers must inherit the test database settings; a spawned worker would reload the real ones
+@unittest.skipUnless(multiprocessing.get_start_method() == 'fork', 'worker processes are not forked')
+class ParallelRatingsTests(TransactionTestCase):
+    def setUp(self):
+        # Table flushes between tests fire no signals
+        self.addCleanup(reference_data.invalidate)
+        create_reference_data()
+
+        pk = 1
+        for name in ('Toyota', 'Mazda', 'Kia'):
+            make = CarMakes.objects.create(name=name, slug=name.lower())
+            for model in ('Hatch', 'SUV'):
+                create_vehicle(pk, make, model, '2025', 'Petrol', 'FWD', 30000 + pk * 1000)
+                pk += 1
+
+    def rating_results(self, run_id):
+        return sorted(
+            CarRatingResult.objects
+            .filter(run_id=run_id)
+            .values_list('car_variant_id', 'state', 'core_rating', 'cost_of_ownership_5yr', 'emissions_5yr_kg')
+        )
+
+    def matrix_rows(self):
+        return sorted(
+            CoreRatingMatrix.objects
+            .values_list('variant_id', 'state', 'km_band', 'off_grid_band', 'with_finance', 'cost_of_ownership_5yr', 'core_rating', 'star_rating')
+        )
+
+    def test_workers_write_the_same_results_as_a_serial_run(self):
+        serial = CarCalculationsProcessor().process_all_car_make_data()
+        parallel = process_car_makes_in_parallel(workers=2)
+
+        self.assertEqual(parallel['run_status'], RatingRun.STATUS_COMPLETE)
+        self.assertEqual(parallel['processed_makes'], ['Kia', 'Mazda', 'Toyota'])
+        self.assertEqual(parallel['rows_written'], 6)
+        self.assertEqual(self.rating_results(parallel['run_id']), self.rating_results(serial['run_id']))
+
+    def test_workers_build_the_same_matrix_as_a_serial_build(self):
+        build_core_rating_matrix()
+        serial_rows = self.matrix_rows()
+        CoreRatingMatrix.objects.all().delete()
+
+        result = build_core_rating_matrix_in_parallel(workers=2)
+
+        self.assertEqual(result['rows_written'], 6 * 96)
+        self.assertEqual(self.matrix_rows(), serial_rows)
+
+    def test_a_failing_make_fails_the_whole_run(self):
+        live_run = CarCalculationsProcessor().process_all_car_make_data()
+        process_single_car_make_data = CarCalculationsProcessor.process_single_car_make_data
+
+        def fail_mazda(processor, car_make, run=None):
+            if car_make.name == 'Mazda':
+                raise ValueError('no prices')
+            return process_single_car_make_data(processor, car_make, run)
+
+        # Patched before the pool forks, so the worker handling Mazda fails
+        with mock.patch.object(CarCalculationsProcessor, 'process_single_car_make_data', fail_mazda):
+            result = process_car_makes_in_parallel(workers=2)
+
+        self.assertEqual(result['run_status'], RatingRun.STATUS_FAILED)
+        self.assertEqual(result['failed_makes'], ['Mazda'])
+        self.assertEqual(get_current_rating_run().id, live_run['run_id'])
+
+
+class CoreRatingMatrixTests(VehicleApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        CarPricing.objects.create(
+            car_variant_id=1, variant_id=1, state='VIC',
+            drive_away_price=Decimal('33500'), registration=Decimal('900'),
+        )
+        ElectricityGridEmissions.objects.create(state='VIC', emissions_factor_kg_per_kwh=0.85)
+
+    def test_matrix_is_written_in_fixed_size_batches(self):
+        with mock.patch('calc_app.services.rating_matrix.MATRIX_BATCH_SIZE', 50), \
+                mock.patch('calc_app.services.rating_matrix.bulk_upsert', wraps=bulk_upsert) as upsert:
+            result = build_core_rating_matrix(build_cards=False)
+
+        # 4 priced (variant, state) pairs x 8 km bands x 6 off-grid bands x 2 finance flags
+        self.assertEqual(result['rows_written'], 4 * 96)
+        self.assertEqual(CoreRatingMatrix.objects.count(), 4 * 96)
+        self.assertTrue(all(len(call.args[1]) <= 50 for call in upsert.call_args_list))
+
+    def test_view_serves_the_matrix_without_recomputing(self):
+        build_core_rating_matrix(build_cards=False)
+        expected = calculate_core_rating(1, 'VIC', 15000, 40.0, with_finance=True)
+
+        with mock.patch('api.views.calculate_core_rating') as live_calculation:
+            response = self.client.post(CORE_RATING_URL, {
+                'variant_id': 1, 'state': 'VIC', 'kilometers_per_annum': 15000,
+                'off_grid_energy_percent': 40, 'with_finance': True,
+            }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        live_calculation.assert_not_called()
+        self.assertEqual(response.data['star_rating'], expected['star_rating'])
+        for field in ['cost_of_ownership_5yr', 'emissions_5yr_kg', 'coo_score', 'emissions_score', 'core_rating']:
+            self.assertAlmostEqual(response.data[field], expected[field], places=2)
+
+
+class RecommendVehiclesTests(VehicleApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        make = CarMakes.objects.get(name='Toyota')
+        for pk, price in ((4, 29000), (5, 39000), (6, 52000)):
+            create_vehicle(pk, make, 'Yaris', '2025', 'Petrol', 'FWD', price)
+        # Spread running costs and emissions so every variant scores differently
+        for pk in range(1, 7):
+            Vehicles.objects.filter(pk=pk).update(
+                fuel_consumption_comb=Decimal(4 + pk), annual_tailpipe_co2=Decimal(1000 + 150 * pk),
+            )
+        # Only priced in VIC, so never recommended for NSW
+        create_vehicle(7, make, 'Camry', '2025', 'Hybrid', 'FWD', 20000)
+        CarPricing.objects.filter(car_variant_id=7).update(state='VIC')
+        ElectricityGridEmissions.objects.create(state='VIC', emissions_factor_kg_per_kwh=0.85)
+
+        build_core_rating_matrix()
+
+    def test_recommendations_stay_within_budget_and_state(self):
+        recommendations = recommend_vehicles('NSW', budget=40000, limit=10)
+
+        self.assertEqual(sorted(row['variant_id'] for row in recommendations), [1, 2, 4, 5])
+        self.assertTrue(all(row['drive_away_price'] <= 40000 for row in recommendations))
+
+    def test_recommendations_are_ordered_by_weighted_score(self):
+        recommendations = recommend_vehicles('NSW', save_money=True, greener_car=True, limit=10)
+
+        scores = [row['score'] for row in recommendations]
+        self.assertEqual(len(scores), 6)
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        for row in recommendations:
+            matrix_row = CoreRatingMatrix.objects.get(
+                variant_id=row['variant_id'], state='NSW', km_band=17000, off_grid_band=20, with_finance=False,
+            )
+            self.assertAlmostEqual(row['score'], float(matrix_row.coo_score + matrix_row.emissions_score), places=4)
+
+        self.assertEqual(recommend_vehicles('NSW', save_money=True, greener_car=True), recommendations[:1])
+
+    def test_savings_match_the_vehicle_card(self):
+        recommendations = recommend_vehicles('NSW', save_money=True, limit=10)
+
+        self.assertTrue(any(row['savings'] > 0 for row in recommendations))
+        for row in recommendations:
+            card = render_vehicle_card(get_vehicle_card(row['variant_id']), 'NSW')
+            self.assertEqual(row['savings'], card['savings'])
+
+
+class CarCatalogueViewTests(VehicleApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        rebuild_vehicle_facets()
+
+    def test_returns_make_model_year_tree(self):
+        response = self.client.get(CATALOGUE_URL)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('ETag', response)
+        self.assertIn('Toyota', response.content.decode())
+        self.assertIn('RAV4', response.content.decode())
+
+    def test_unchanged_catalogue_is_not_modified(self):
+        etag = self.client.get(CATALOGUE_URL)['ETag']
+
+        # ETag and Last-Modified come from a single version query
+        with self.assertNumQueries(1):
+            response = self.client.get(CATALOGUE_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_make_filter_accepts_prefixed_make(self):
+        response = self.client.get(CATALOGUE_URL, {'make': 'p-Toyota'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Corolla', response.content.decode())
+
+
+class VehicleFacetListViewTests(VehicleApiTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        rebuild_vehicle_facets()
+
+    def test_models_match_make_key_exactly(self):
+        response = self.client.post(MODELS_URL, {'make': 'p-toyota'}, format='json')
+
+        self.assertEqual([row['model'] for row in response.data['models']], ['Corolla', 'RAV4'])
+
+    def test_falls_back_to_partial_match_when_key_misses(self):
+        # A CarMakes name that is not spelled like Vehicles.make_name
+        response = self.client.post(YEARS_URL, {'make': 'Toyo', 'model': 'corol'}, format='json')
+
+        self.assertEqual(response.data['years'], [{'year': '2025', 'id': 2}, {'year': '2024', 'id': 1}])
+
+
+class VehicleCardSignalTests(TestCase):
+    def test_card_is_rebuilt_once_the_save_commits(self):
+        make = CarMakes.objects.create(name='Toyota', slug='toyota')
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            create_vehicle(1, make, 'Corolla', '2024', 'Petrol', 'FWD', 32000)
+            self.assertFalse(VehicleCard.objects.filter(vehicle_id=1).exists())
+
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertEqual(VehicleCard.objects.get(vehicle_id=1).document['specs']['model'], 'Corolla')
+
+
+class SearchLogWriterTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.spill_path = os.path.join(self.directory.name, 'search_log_spill.jsonl')
+        self.writer = SearchLogWriter(batch_size=10, flush_interval=60, spill_path=self.spill_path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def search_fields(self, **overrides):
+        fields = {'budget': Decimal('30000'), 'state': 'NSW', 'ip_address': '127.0.0.1'}
+        fields.update(overrides)
+        return fields
+
+    def test_flush_keeps_submit_time(self):
+        submitted_at = timezone.now() - timedelta(minutes=5)
+        uid = self.writer.submit(**self.search_fields(created_at=submitted_at))
+
+        self.assertEqual(self.writer.flush(), 1)
+        self.assertEqual(CarSearchLog.objects.get(uid=uid).created_at, submitted_at)
+
+    def test_replayed_rows_keep_their_original_time(self):
+        submitted_at = timezone.now() - timedelta(hours=2)
+        self.writer._spill([self.search_fields(uid='spilled-1', created_at=submitted_at)])
+
+        self.assertEqual(self.writer.flush(), 1)
+        self.assertEqual(CarSearchLog.objects.get(uid='spilled-1').created_at, submitted_at)
+        self.assertFalse(os.path.exists(self.spill_path))
+
+    def test_full_buffer_spills_new_rows_to_disk(self):
+        writer = SearchLogWriter(batch_size=10, flush_interval=60, spill_path=self.spill_path, max_pending=2)
+
+        uids = [writer.submit(**self.search_fields()) for _ in range(3)]
+
+        self.assertEqual([writer.is_pending(uid) for uid in uids], [True, True, False])
+        self.assertTrue(writer.is_spilled(uids[2]))
+        self.assertFalse(CarSearchLog.objects.exists())
+
+        self.assertEqual(writer.flush(), 3)
+        self.assertEqual(CarSearchLog.objects.filter(uid__in=uids).count(), 3)
+        self.assertFalse(writer.is_spilled(uids[2]))
+
+    def test_flush_without_spill_file_creates_no_lock_file(self):
+        self.writer.flush()
+
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+
+class GetCarMatchBySIDViewTests(APITestCase):
+    def test_unknown_search_returns_no_match(self):
+        response = self.client.post(MATCH_BY_ID_URL, {'sid': 'never-submitted'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['status'], 'empty')
+        self.assertNotIn('Retry-After', response)
+
+    def test_spilled_search_asks_client_to_retry(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        spill_path = os.path.join(directory.name, 'search_log_spill.jsonl')
+
+        with mock.patch.object(search_log_writer, 'spill_path', spill_path):
+            search_log_writer._spill([{'uid': 'spilled-1', 'budget': '30000', 'state': 'NSW'}])
+            response = self.client.post(MATCH_BY_ID_URL, {'sid': 'spilled-1'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertIn('Retry-After', response)
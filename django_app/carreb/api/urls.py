@@ -4,7 +4,7 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
-from .views import CoreRatingCalculatorView, ParseCDGG, StateListView, GetCarMakesListView, GetCarModelListView, GetCarYearListView, GetCarEngineTypeListView, CarVariantListView, CarSeriesListView, CarMatchesListView, CarSuggestionListView, GetCarMatchView, GetCarMatchBySIDView, VehicleEmissionsCalculatorView,VehicleFinanceCalculatorView, VehicleNoFinanceCalculatorView
+from .views import CoreRatingCalculatorView, ParseCDGG, StateListView, GetCarMakesListView, GetCarModelListView, GetCarYearListView, GetCarEngineTypeListView, CarVariantListView, CarSeriesListView, CarMatchesListView, CarSuggestionListView, GetCarMatchView, GetCarMatchBySIDView, VehicleFinanceCalculatorView, VehicleNoFinanceCalculatorView, VehicleBatchCalculatorView, FinanceSweepView, CarCatalogueView
 from . import views
 
 schema_view = get_schema_view(
@@ -29,6 +29,7 @@ urlpatterns = [
     path('car/models/', GetCarModelListView.as_view()),
     path('car/years/', GetCarYearListView.as_view()),
     path('car/engine-types/', GetCarEngineTypeListView.as_view()),
+    path('car/catalogue/', CarCatalogueView.as_view()),
     #path('car/<str:make_name>/<str:model_name>/variants/', CarVariantListView.as_view()),
     path('car/variants/', CarVariantListView.as_view()),
     path('car/series/', CarSeriesListView.as_view()),
@@ -38,7 +39,8 @@ urlpatterns = [
     path('car/match/by-id/', GetCarMatchBySIDView.as_view()),
     path('car/calculate-finance-py/', VehicleFinanceCalculatorView.as_view(), name='calculate-finance-py'),
     path('car/calculate-no-finance-py/', VehicleNoFinanceCalculatorView.as_view(), name='calculate-no-finance-py'),
-    path('car/calculate-emissions-py/', VehicleEmissionsCalculatorView.as_view(), name='calculate-emissions-py'),
+    path('car/calculate-batch-py/', VehicleBatchCalculatorView.as_view(), name='calculate-batch-py'),
+    path('car/finance-sweep-py/', FinanceSweepView.as_view(), name='finance-sweep-py'),
     path('car/calculate-core-rating-py/', CoreRatingCalculatorView.as_view(), name='calculate-core-rating-py'),
 
 
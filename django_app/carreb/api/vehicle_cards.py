@@ -0,0 +1,138 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg
+from django.utils import timezone
+from .models import Vehicles, VehicleImages, VehicleCard, CoreRatingMatrix
+from .serializers import VehiclesSerializer
+from .services import bulk_upsert
+from calc_app.services.car_calculations import DEFAULT_KILOMETERS_PER_ANNUM, DEFAULT_OFF_GRID_ENERGY_PERCENT
+
+CARD_BATCH_SIZE = 500
+
+# Shown when a vehicle has no downloaded image
+DEFAULT_CARD_IMAGE = '/images/car-icon-1.png'
+
+STATE_AVERAGE_COO_CACHE_KEY = 'vehicle_cards:state_average_coo'
+
+
+def _default_profile_ratings():
+    return CoreRatingMatrix.objects.filter(
+        km_band=DEFAULT_KILOMETERS_PER_ANNUM,
+        off_grid_band=int(DEFAULT_OFF_GRID_ENERGY_PERCENT),
+        with_finance=False,
+    )
+
+
+def get_state_average_coo(refresh=False):
+    """Average 5-year COO per state at the default usage profile, cached between partial card rebuilds"""
+    state_average_coo = None if refresh else cache.get(STATE_AVERAGE_COO_CACHE_KEY)
+    if state_average_coo is None:
+        state_average_coo = {
+            row['state']: float(row['average'])
+            for row in _default_profile_ratings().values('state').annotate(average=Avg('cost_of_ownership_5yr'))
+        }
+        cache.set(STATE_AVERAGE_COO_CACHE_KEY, state_average_coo, getattr(settings, 'VEHICLE_CARD_STATE_AVERAGE_TTL', 3600))
+    return state_average_coo
+
+
+def coo_savings(cost_of_ownership_5yr, state_average_coo):
+    """Whole dollars of 5-year COO below the state average, never negative"""
+    return max(0, round(state_average_coo - cost_of_ownership_5yr))
+
+
+def build_vehicle_cards(vehicle_ids=None, state_average_coo=None):
+    """(Re)build VehicleCard documents, for every vehicle or only vehicle_ids. Returns the number written."""
+    vehicles = Vehicles.objects.order_by('id')
+    if vehicle_ids is not None:
+        vehicles = vehicles.filter(id__in=vehicle_ids)
+
+    # Savings are measured against the state's average 5-year COO at the default usage profile.
+    # A full rebuild recomputes it; a few cards reuse the cached averages.
+    if state_average_coo is None:
+        state_average_coo = get_state_average_coo(refresh=vehicle_ids is None)
+
+    written = 0
+    batch = []
+    for vehicle in vehicles.iterator(chunk_size=CARD_BATCH_SIZE):
+        batch.append(vehicle)
+        if len(batch) >= CARD_BATCH_SIZE:
+            written += _write_vehicle_cards(batch, state_average_coo)
+            batch = []
+    if batch:
+        written += _write_vehicle_cards(batch, state_average_coo)
+    return written
+
+
+def _write_vehicle_cards(vehicles, state_average_coo):
+    images = {}
+    for image in (
+        VehicleImages.objects
+        .filter(vehicle_id__in=[vehicle.vehicle_id for vehicle in vehicles if vehicle.vehicle_id])
+        .order_by('id')
+        .values('vehicle_id', 'image_name', 'image_widths', 'image_formats', 'image_placeholder')
+    ):
+        images.setdefault(image['vehicle_id'], image)
+
+    ratings = {}
+    for row in _default_profile_ratings().filter(variant_id__in=[vehicle.id for vehicle in vehicles]).values(
+        'variant_id', 'state', 'cost_of_ownership_5yr', 'emissions_5yr_kg', 'core_rating', 'star_rating'
+    ):
+        coo = float(row['cost_of_ownership_5yr'])
+        ratings.setdefault(row['variant_id'], {})[row['state']] = {
+            'coo': round(coo),
+            'emissions_5yr_kg': float(row['emissions_5yr_kg']),
+            'rating': float(row['core_rating']),
+            'starRating': row['star_rating'],
+            'savings': coo_savings(coo, state_average_coo.get(row['state'], coo)),
+        }
+
+    now = timezone.now()
+    cards = []
+    for vehicle, specs in zip(vehicles, VehiclesSerializer(vehicles, many=True).data):
+        image = images.get(vehicle.vehicle_id) or {}
+        has_image = bool(image.get('image_name') and image['image_name'].strip() != '-')
+        cards.append(VehicleCard(
+            vehicle=vehicle,
+            document={
+                'specs': dict(specs),
+                'image': image['image_name'] if has_image else DEFAULT_CARD_IMAGE,
+                'image_sizes': {
+                    'widths': image['image_widths'],
+                    'formats': image['image_formats'],
+                    'placeholder': image['image_placeholder'],
+                } if has_image and image['image_widths'] else None,
+                'ratings': ratings.get(vehicle.id, {}),
+            },
+            updated_at=now,
+        ))
+
+    return bulk_upsert(VehicleCard, cards, unique_fields=['vehicle'], update_fields=['document', 'updated_at'], batch_size=CARD_BATCH_SIZE)
+
+
+def build_vehicle_cards_for_images(vehicle_ids):
+    """Rebuild the cards of the vehicles behind VehicleImages rows (keyed by the vehicle_id code, not the pk)"""
+    vehicle_pks = list(Vehicles.objects.filter(vehicle_id__in=vehicle_ids).values_list('id', flat=True))
+    return build_vehicle_cards(vehicle_pks) if vehicle_pks else 0
+
+
+def get_vehicle_card(vehicle_pk):
+    """Card document for a vehicle, built on first use if it does not exist yet"""
+    document = VehicleCard.objects.filter(pk=vehicle_pk).values_list('document', flat=True).first()
+    if document is None and build_vehicle_cards([vehicle_pk]):
+        document = VehicleCard.objects.filter(pk=vehicle_pk).values_list('document', flat=True).first()
+    return document
+
+
+def render_vehicle_card(document, state):
+    """Match result payload (the former serializer output plus image and metrics) for a state"""
+    rating = document['ratings'].get((state or '').strip().upper())
+    return {
+        **document['specs'],
+        'image': document['image'],
+        'imageSizes': document.get('image_sizes'),
+        'coo': rating['coo'] if rating else None,
+        'co2': document['specs']['tailpipe_comb_value'],
+        'rating': rating['rating'] if rating else None,
+        'starRating': rating['starRating'] if rating else None,
+        'savings': rating['savings'] if rating else None,
+    }
@@ -1,17 +1,26 @@
 import uuid
-import random
+import math
 from django.conf import settings
 from django.db.models import Min
 from django.shortcuts import render
+from django.utils.cache import patch_cache_control
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .services import ParseCarDetailsFromGG, calculate_core_rating, calculate_vehicle_emissions
+from .search_log_writer import search_log_writer, get_search_log, is_search_log_pending
+from .vehicle_cards import get_vehicle_card, render_vehicle_card
+from .services import ParseCarDetailsFromGG, list_vehicle_facets, get_cached_search_result, cache_search_result, build_vehicle_catalogue, get_vehicle_catalogue_version
 from rest_framework.decorators import api_view
 from .models import CarMakes, CarDetails, States, Vehicles, CarSearchLog, VehicleImages
 from .serializers import CarDetailsSerializer, VehiclesSerializer, CarSearchLogSerializer
+from .renderers import FastJSONRenderer
 from django.core.exceptions import ObjectDoesNotExist, MultipleObjectsReturned
-from calc_app.services.car_calculations import CarCalculationsProcessor
+from calc_app.services.car_calculations import CarCalculationsProcessor, calculate_core_rating, calculate_vehicle_emissions, calculate_vehicle_costs_batch
+from calc_app.services.rating_matrix import get_core_rating_from_matrix
+from calc_app.services.batch_engine import calculate_finance_sweep
+from calc_app.services.recommendations import recommend_vehicles
 
 
 
@@ -65,6 +74,8 @@ class GetCarMakesListView(APIView):
         })
 
 class GetCarModelListView(APIView):
+    renderer_classes = [FastJSONRenderer]
+
     #def geT(self, request, make_name):
     def post(self, request):
         car_make = request.data.get('make')
@@ -72,18 +83,14 @@ class GetCarModelListView(APIView):
         if car_make.startswith("p-"):
             car_make = car_make[2:]  # Remove the first two characters
 
-        car_models = (
-            Vehicles.objects
-            .filter(make_name__icontains=car_make)
-            .values("model")
-            .annotate(id=Min("id"))  # Ensures distinct entries by selecting the smallest ID for each name
-            .order_by("model")
-        )
-        return Response({"models": list(car_models)})
+        car_models = list_vehicle_facets("model", "model", car_make)
+        return Response({"models": car_models})
 
 
 # Return Year list based on vehicle Make and Model
 class GetCarYearListView(APIView):
+    renderer_classes = [FastJSONRenderer]
+
     #def geT(self, request, make_name):
     def post(self, request):
         
@@ -93,17 +100,13 @@ class GetCarYearListView(APIView):
         if car_make.startswith("p-"):
             car_make = car_make[2:]  # Remove the first two characters
 
-        car_years = (
-            Vehicles.objects
-            .filter(make_name__icontains=car_make, model__icontains=car_model)
-            .values("year")
-            .annotate(id=Min("id"))  # Ensures distinct entries by selecting the smallest ID for each name
-            .order_by("-year")
-        )
-        return Response({"years": list(car_years)})
+        car_years = list_vehicle_facets("year", "-year", car_make, car_model)
+        return Response({"years": car_years})
 
 # Return Engine Type list based on vehicle Make, Model and Year
 class GetCarEngineTypeListView(APIView):
+    renderer_classes = [FastJSONRenderer]
+
     #def geT(self, request, make_name):
     def post(self, request):
         
@@ -114,16 +117,40 @@ class GetCarEngineTypeListView(APIView):
         if car_make.startswith("p-"):
             car_make = car_make[2:]  # Remove the first two characters
 
-        car_engine_types = (
-            Vehicles.objects
-            .filter(make_name__icontains=car_make, model__icontains=car_model, year__icontains=car_year)
-            .values("engine_type")
-            .annotate(id=Min("id"))  # Ensures distinct entries by selecting the smallest ID for each name
-            .order_by("engine_type")
-        )
-        return Response({"engine_types": list(car_engine_types)})
+        car_engine_types = list_vehicle_facets("engine_type", "engine_type", car_make, car_model, car_year)
+        return Response({"engine_types": car_engine_types})
     
 
+# Seconds browsers and nginx may reuse the catalogue before revalidating with the ETag
+CATALOGUE_MAX_AGE = 300
+
+def _catalogue_make(request):
+    make = request.GET.get('make', '')
+    return make[2:] if make.startswith("p-") else make
+
+def _catalogue_version(request):
+    # condition() asks for the ETag and Last-Modified separately, run the aggregate once per request
+    if not hasattr(request, '_catalogue_version'):
+        request._catalogue_version = get_vehicle_catalogue_version(_catalogue_make(request))
+    return request._catalogue_version
+
+def _catalogue_etag(request, *args, **kwargs):
+    return _catalogue_version(request)[0]
+
+def _catalogue_last_modified(request, *args, **kwargs):
+    return _catalogue_version(request)[1]
+
+# Return the full make -> model -> year -> engine type tree (optionally for one make) in one response
+class CarCatalogueView(APIView):
+    renderer_classes = [FastJSONRenderer]
+
+    @method_decorator(condition(etag_func=_catalogue_etag, last_modified_func=_catalogue_last_modified))
+    def get(self, request):
+        response = Response({"makes": build_vehicle_catalogue(_catalogue_make(request))})
+        patch_cache_control(response, public=True, max_age=CATALOGUE_MAX_AGE)
+        return response
+
+
 class CarVariantListView(APIView):
     #def get(self, request, make_name, model_name):
     def post(self, request):
@@ -183,7 +210,12 @@ class CarSeriesListView(APIView):
         return Response({"series": list(car_series)})        
 
 
+# Fields of CarDetailsSerializer, in its output order
+CAR_DETAILS_FIELDS = [field.name for field in CarDetails._meta.concrete_fields]
+
 class CarMatchesListView(APIView):
+    renderer_classes = [FastJSONRenderer]
+
     def post(self, request):
 
         car_make = request.data.get('make')
@@ -198,17 +230,15 @@ class CarMatchesListView(APIView):
             matches = (
                 CarDetails.objects
                 .filter(make__icontains=car_make, family__icontains=car_model, variant__exact='', series__icontains=car_series)
-                .all()
             )
         else:
             matches = (
                 CarDetails.objects
                 .filter(make__icontains=car_make, family__icontains=car_model, variant__icontains=car_variant, series__icontains=car_series)
-                .all()
             )
-        
-        serializer = CarDetailsSerializer(matches, many=True)
-        return Response(serializer.data)
+
+        # Plain row dicts, same fields as CarDetailsSerializer, without per-field serializer overhead
+        return Response(list(matches.values(*CAR_DETAILS_FIELDS)))
     
 # Get suggested cars
 class CarSuggestionListView(APIView):
@@ -275,8 +305,8 @@ class GetCarMatchView(APIView):
         ref = request.data.get('ref') or request.query_params.get('ref')
         user_agent = request.META.get('HTTP_USER_AGENT', '')
 
-        log = CarSearchLog.objects.create(
-            uid=str(uuid.uuid4()),
+        # Buffered: the row is written in the background, the uid is usable straight away
+        uid = search_log_writer.submit(
             save_money=save_money,
             greener_car=greener_car,
             good_all_rounder=good_all_rounder,
@@ -295,10 +325,10 @@ class GetCarMatchView(APIView):
         #serializer = CarSearchLogSerializer(log)
         #return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        response = Response({'status': 'ok', 'crb_uid': log.uid}, status=status.HTTP_200_OK)
+        response = Response({'status': 'ok', 'crb_uid': uid}, status=status.HTTP_200_OK)
         response.set_cookie(
             key='crb_uid',
-            value=log.uid,
+            value=uid,
             httponly=False,       # Set to False if you want client-side access
             secure=False,           #settings.COOKIE_SECURE,         # Set to True if using HTTPS
             samesite='Lax',       # Or 'Strict'/'None'
@@ -324,66 +354,66 @@ class GetCarMatchBySIDView(APIView):
         have_car = False
         data = {}
 
-        try:
-            search_log = CarSearchLog.objects.get(uid=search_id)
-            have_car = search_log.have_car
-            #serializer = CarSearchLogSerializer(search_log)
-            #return Response(serializer.data, status=status.HTTP_200_OK)
-        
-        except ObjectDoesNotExist:
-            #return Response({"detail": "Search log not found."}, status=status.HTTP_404_NOT_FOUND)
-            have_car = False
+        # Result page refreshes are served from the session cache
+        cached_result = get_cached_search_result(search_id)
+        if cached_result is not None:
+            return Response(cached_result, status=status.HTTP_200_OK)
 
-        """
-        except MultipleObjectsReturned:
-            return Response({"detail": "Multiple entries found."}, status=status.HTTP_400_BAD_REQUEST)"""        
+        search_log = get_search_log(search_id)
+        if search_log is None:
+            if not is_search_log_pending(search_id):
+                return Response({"status": 'empty', 'data': {'make': 'no matching car'}}, status=status.HTTP_200_OK)
+
+            # Spilled while the database was unavailable: ask the client to retry after one flush
+            # interval instead of holding this request open
+            retry_after = math.ceil(search_log_writer.flush_interval)
+            response = Response({"status": 'pending', 'retry_after': retry_after}, status=status.HTTP_202_ACCEPTED)
+            response['Retry-After'] = str(retry_after)
+            return response
+        have_car = search_log.have_car
 
         response = 'ok'
         if (have_car):
-            vehicle = Vehicles.objects.filter(
+            vehicle_pk = Vehicles.objects.filter(
                 make_name=search_log.make, 
                 model=search_log.model, 
                 year=search_log.year, 
-                engine_type=search_log.engine_type).first()
+                engine_type=search_log.engine_type).values_list('id', flat=True).first()
                 
         else:
             if search_log.vehicle_id:
-                vehicle = Vehicles.objects.filter(vehicle_id=search_log.vehicle_id).first()
+                vehicle_pk = Vehicles.objects.filter(vehicle_id=search_log.vehicle_id).values_list('id', flat=True).first()
 
             else:
+                # Best match for the search preferences within budget, from the CORE rating matrix
+                recommendations = recommend_vehicles(
+                    state=search_log.state,
+                    budget=search_log.budget,
+                    save_money=search_log.save_money,
+                    greener_car=search_log.greener_car,
+                    good_all_rounder=search_log.good_all_rounder,
+                )
+                vehicle_pk = recommendations[0]['variant_id'] if recommendations else None
+
+        # Specs, image and metrics come precomputed in the vehicle's card
+        card = get_vehicle_card(vehicle_pk) if vehicle_pk else None
+
+        if card:
+            data = render_vehicle_card(card, search_log.state)
 
-                # temporary car selection
-                # replace with actual car search based on car score
-                vehicle = Vehicles.objects.order_by('?').first()
-
-        if vehicle:
             if not search_log.vehicle_id:
-                search_log.vehicle_id = vehicle.vehicle_id
+                search_log.vehicle_id = data['vehicle_id']
                 search_log.save()
 
-            serializer = VehiclesSerializer(vehicle)
-            data = serializer.data
-            
-            image = VehicleImages.objects.filter(vehicle_id=vehicle.vehicle_id).first()
-
-            if (image and image.image_name and image.image_name.strip() != '-'):
-                data['image'] = image.image_name
-            else:
-                data['image'] = '/images/car-icon-1.png'
-
-            # temp, replace with actual value
-            data['coo'] = random.randint(10000, 999999)
-            data['co2'] = data['tailpipe_comb_value']
-            data['rating'] = random.randint(10000, 999999)
-            data['starRating']= random.randint(1, 5)
-            data['savings'] = random.randint(10, 9999)
-
         else:
             response = 'empty'
             data = {
                 'make': 'no matching car'
             }
         
+        if response == 'ok':
+            cache_search_result(search_id, {"status": response, 'data': data})
+
         return Response({"status": response, 'data': data }, status=status.HTTP_200_OK)
 
 class VehicleFinanceCalculatorView(APIView):
@@ -478,27 +508,105 @@ class VehicleNoFinanceCalculatorView(APIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-# The VehicleEmissionsCalculatorView is no longer needed as emissions are
-# part of the main cost calculation. You can remove it if it's not used elsewhere.
-# If you still need a separate emissions calculator, it should also be a method in the processor.
+# Upper bound on variants per batch request (the comparison page shows up to 20 cars)
+MAX_BATCH_VARIANTS = 20
 
-class CoreRatingCalculatorView(APIView):
+class VehicleBatchCalculatorView(APIView):
     def post(self, request, *args, **kwargs):
         data = request.data
-        
-        # Instantiate the calculator
-        calculator = CarCalculationsProcessor()
 
         try:
-            # Call the method from the processor class
-            result = calculator._calculate_core_rating(
+            variant_ids = data.get('variant_ids')
+            if not isinstance(variant_ids, list) or not variant_ids:
+                raise ValueError("variant_ids must be a non-empty list.")
+            if len(variant_ids) > MAX_BATCH_VARIANTS:
+                raise ValueError(f"At most {MAX_BATCH_VARIANTS} variant_ids can be calculated per request.")
+            variant_ids = list(dict.fromkeys(int(variant_id) for variant_id in variant_ids))
+
+            # One finance profile is shared by every variant in the batch
+            finance_params = None
+            if data.get('with_finance', False):
+                finance_params = {
+                    'finance_type': data.get('finance_type'),
+                    'deposit': float(data.get('deposit')),
+                    'trade_in_value': float(data.get('trade_in_value')),
+                    'interest_rate_apr': float(data.get('interest_rate_apr')),
+                    'loan_term_months': int(data.get('loan_term_months')),
+                    'balloon_payment_percent': float(data.get('balloon_payment_percent')),
+                    'loan_establishment_fee': float(data.get('loan_establishment_fee')),
+                    'admin_fee_monthly': float(data.get('admin_fee_monthly')),
+                    'dealer_incentive': float(data.get('dealer_incentive'))
+                }
+
+            results = calculate_vehicle_costs_batch(
+                variant_ids=variant_ids,
+                state=data.get('state'),
+                kilometers_per_annum=data.get('kilometers_per_annum', 17000),
+                off_grid_energy_percent=data.get('off_grid_energy_percent', 20.0),
+                finance_params=finance_params
+            )
+            return Response({"results": results}, status=status.HTTP_200_OK)
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            print(f"Calculation Error: {e}")
+            return Response(
+                {"error": "An internal error occurred during calculation."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+class FinanceSweepView(APIView):
+    def post(self, request, *args, **kwargs):
+        data = request.data
+
+        try:
+            # Each slider is a number, a list of values, or {"min", "max", "step"}
+            result = calculate_finance_sweep(
                 variant_id=data.get('variant_id'),
                 state=data.get('state'),
                 kilometers_per_annum=data.get('kilometers_per_annum', 17000),
                 off_grid_energy_percent=data.get('off_grid_energy_percent', 20.0),
-                with_finance=data.get('with_finance', False)
+                deposit=data.get('deposit'),
+                interest_rate_apr=data.get('interest_rate_apr'),
+                loan_term_months=data.get('loan_term_months'),
+                balloon_payment_percent=data.get('balloon_payment_percent'),
+                trade_in_value=float(data.get('trade_in_value', 0)),
+                loan_establishment_fee=float(data.get('loan_establishment_fee', 0)),
+                admin_fee_monthly=float(data.get('admin_fee_monthly', 0)),
+                dealer_incentive=float(data.get('dealer_incentive', 0))
             )
             return Response(result, status=status.HTTP_200_OK)
+        except (TypeError, ValueError) as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except Exception as e:
+            print(f"Calculation Error: {e}")
+            return Response(
+                {"error": "An internal error occurred during calculation."},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
+
+# The VehicleEmissionsCalculatorView is no longer needed as emissions are
+# part of the main cost calculation. You can remove it if it's not used elsewhere.
+# If you still need a separate emissions calculator, it should also be a method in the processor.
+
+class CoreRatingCalculatorView(APIView):
+    def post(self, request, *args, **kwargs):
+        data = request.data
+
+        try:
+            profile = {
+                'variant_id': data.get('variant_id'),
+                'state': data.get('state'),
+                'kilometers_per_annum': data.get('kilometers_per_annum', 17000),
+                'off_grid_energy_percent': data.get('off_grid_energy_percent', 20.0),
+                'with_finance': data.get('with_finance', False)
+            }
+
+            # Serve from the precomputed matrix, fall back to a live calculation
+            result = get_core_rating_from_matrix(**profile)
+            if result is None:
+                result = calculate_core_rating(**profile)
+            return Response(result, status=status.HTTP_200_OK)
         except ValueError as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
@@ -1,7 +1,11 @@
 # calc_app/management/commands/calculate_ratings.py
 # python3 manage.py calculate_ratings 
+# python3 manage.py calculate_ratings --matrix
+# python3 manage.py calculate_ratings --matrix --workers 16
 from django.core.management.base import BaseCommand
 from calc_app.services.car_calculations import CarCalculationsProcessor
+from calc_app.services.rating_matrix import build_core_rating_matrix
+from calc_app.services.parallel_ratings import process_car_makes_in_parallel, build_core_rating_matrix_in_parallel
 
 
 class Command(BaseCommand):
@@ -18,8 +22,55 @@ class Command(BaseCommand):
             type=str,
             help='Specific car model to process',
         )
+        parser.add_argument(
+            '--matrix',
+            action='store_true',
+            help='Rebuild the precomputed CORE rating matrix (variant x state x usage profile)',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of worker processes; makes (or matrix variant-id ranges) are sharded across them',
+        )
+
+    def report_progress(self, progress):
+        self.stdout.write(
+            f'[{progress["shards_done"]}/{progress["shards_total"]}] {progress["rows"]} rows '
+            f'in {progress["elapsed"]:.1f}s ({progress["rows_per_second"]:.0f} rows/s)'
+        )
+
+    def report_failed_run(self, results):
+        """Report a run left unpublished because some makes failed; True if it was"""
+        if not results['failed_makes']:
+            return False
+        self.stdout.write(
+            self.style.ERROR(f'Rating run {results["run_id"]} failed, the previous run stays live. Failed makes: {", ".join(results["failed_makes"])}')
+        )
+        return True
 
     def handle(self, *args, **options):
+        workers = max(1, options['workers'])
+
+        if options['matrix']:
+            if workers > 1:
+                result = build_core_rating_matrix_in_parallel(workers, on_progress=self.report_progress)
+            else:
+                result = build_core_rating_matrix()
+            self.stdout.write(
+                self.style.SUCCESS(f'CORE rating matrix rebuilt: {result["rows_written"]} rows written, {result["prices_skipped"]} prices skipped')
+            )
+            return
+
+        if workers > 1 and not options['car_make']:
+            results = process_car_makes_in_parallel(workers, on_progress=self.report_progress)
+            if self.report_failed_run(results):
+                return
+            self.stdout.write(
+                self.style.SUCCESS(f'Rating run {results["run_id"]}: {len(results["processed_makes"])} makes, {results["rows_written"]} results in {results["query_count"]} queries with {workers} workers')
+            )
+            return
+
         processor = CarCalculationsProcessor()
         
         if options['car_make']:
@@ -30,7 +81,10 @@ class Command(BaseCommand):
                 car_make = CarMakes.objects.get(name__iexact=options['car_make'])
 
                 result = processor.process_single_car_make_data(car_make)
-                
+                self.stdout.write(
+                    self.style.SUCCESS(f'{result["car_make"]}: {result["results_written"]} results across {result["variants_processed"]} variants written to rating run {result["run_id"]} in {result["query_count"]} queries')
+                )
+
             except CarMakes.DoesNotExist:
                 self.stdout.write(
                     self.style.ERROR(f'Car make "{options["car_make"]}" not found')
@@ -39,4 +93,9 @@ class Command(BaseCommand):
             # Process all car makes
             results = processor.process_all_car_make_data()
             
-            print(results)
\ No newline at end of file
+            print(results)
+            if self.report_failed_run(results):
+                return
+            self.stdout.write(
+                self.style.SUCCESS(f'Rating run {results["run_id"]}: {len(results["processed_makes"])} makes, {results["rows_written"]} results in {results["query_count"]} queries')
+            )
\ No newline at end of file
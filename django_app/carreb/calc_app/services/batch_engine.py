@@ -0,0 +1,333 @@
+# calc_app/services/batch_engine.py
+
+import numpy as np
+
+from api.models import CarPricing, FuelRetailPrice, Vehicles
+from api.services import reference_data
+from calc_app.services.car_calculations import (
+    DEFAULT_SERVICE_COST_5YR,
+    DEFAULT_RESALE_VALUE_PERCENT,
+    ELECTRICITY_EFFICIENCY_KWH_PER_KM,
+    DEFAULT_INSURANCE_ANNUAL_EV,
+    DEFAULT_INSURANCE_ANNUAL,
+    EMISSIONS_SCORE_RANGE,
+    COO_SCORE_RANGE,
+    COO_SCORE_RANGE_WITH_FINANCE,
+    STAR_RATING_BANDS,
+    _load_vehicle_cost_inputs,
+    compute_vehicle_running_costs,
+)
+
+
+def pmt_with_balloon(principal, balloon, monthly_rate, loan_term_months, admin_fee_monthly=0.0):
+    """Vectorised monthly repayment (PMT) for a loan with a balloon, broadcasting over every argument"""
+    principal = np.asarray(principal, dtype=float)
+    balloon = np.asarray(balloon, dtype=float)
+    monthly_rate = np.asarray(monthly_rate, dtype=float)
+    loan_term_months = np.asarray(loan_term_months, dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        factor = (1 + monthly_rate) ** loan_term_months
+        pmt_principal = (principal - balloon) * (monthly_rate * factor) / (factor - 1)
+        pmt_balloon = balloon * monthly_rate / (factor - 1)
+        interest_free = (principal - balloon) / loan_term_months
+
+    return np.where(monthly_rate > 0, pmt_principal + pmt_balloon, interest_free) + admin_fee_monthly
+
+
+# Upper bound on grid points in one finance sweep
+MAX_SWEEP_POINTS = 20000
+
+# Largest number of values a single slider range may expand to
+MAX_SWEEP_VALUES = 200
+
+
+def sweep_values(spec, name):
+    """Expand a slider spec (a number, a list, or {"min", "max", "step"}) to a sorted array of values"""
+    if isinstance(spec, dict):
+        try:
+            start, stop, step = float(spec['min']), float(spec['max']), float(spec['step'])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"{name} range needs numeric min, max and step.")
+        if step <= 0 or stop < start:
+            raise ValueError(f"{name} range needs step > 0 and max >= min.")
+        count = int(np.floor((stop - start) / step + 1e-9)) + 1
+        if count > MAX_SWEEP_VALUES:
+            raise ValueError(f"{name} range expands to more than {MAX_SWEEP_VALUES} values.")
+        values = start + step * np.arange(count)
+    else:
+        if not isinstance(spec, list):
+            spec = [spec]
+        try:
+            values = np.array(sorted(set(float(value) for value in spec)))
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} values must be numeric.")
+        if len(values) == 0 or len(values) > MAX_SWEEP_VALUES:
+            raise ValueError(f"{name} needs between 1 and {MAX_SWEEP_VALUES} values.")
+    return values
+
+
+def check_sweep_size(*axes):
+    """Reject a sweep whose grid would exceed MAX_SWEEP_POINTS, before any grid is allocated"""
+    points = int(np.prod([len(values) for values in axes], dtype=np.int64))
+    if points > MAX_SWEEP_POINTS:
+        raise ValueError(f"Finance sweep of {points} points exceeds the limit of {MAX_SWEEP_POINTS}.")
+    return points
+
+
+def finance_sweep(drive_away_price, annual_coo_base, deposits, interest_rates_apr, loan_terms_months,
+                  balloon_payment_percents, trade_in_value, loan_establishment_fee, admin_fee_monthly, dealer_incentive):
+    """Monthly repayment, total loan cost and annual COO over a deposit x APR x term x balloon grid.
+
+    Same formulas as compute_finance_costs, evaluated for every grid point in one broadcast pass.
+    Result arrays are indexed [deposit, apr, term, balloon].
+    """
+    check_sweep_size(deposits, interest_rates_apr, loan_terms_months, balloon_payment_percents)
+    deposit, apr, term, balloon_percent = np.meshgrid(
+        deposits, interest_rates_apr, loan_terms_months, balloon_payment_percents, indexing='ij'
+    )
+    if np.any(term <= 0):
+        raise ValueError("loan_term_months values must be greater than 0.")
+
+    drive_away_price = drive_away_price - dealer_incentive
+    loan_amount = drive_away_price - deposit - trade_in_value
+    balloon_payment_amount = drive_away_price * (balloon_percent / 100)
+
+    monthly_payment = pmt_with_balloon(loan_amount, balloon_payment_amount, (apr / 100) / 12, term, admin_fee_monthly)
+    total_loan_cost = (monthly_payment * term) + balloon_payment_amount + loan_establishment_fee - loan_amount
+    annualized_loan_cost = total_loan_cost / (term / 12)
+
+    return {
+        'loan_amount': loan_amount,
+        'balloon_payment_amount': balloon_payment_amount,
+        'monthly_repayment_total': monthly_payment,
+        'total_loan_cost': total_loan_cost,
+        'annualized_loan_cost': annualized_loan_cost,
+        'annual_coo_with_finance': annual_coo_base + annualized_loan_cost,
+    }
+
+
+def calculate_finance_sweep(variant_id, state, kilometers_per_annum, off_grid_energy_percent, deposit, interest_rate_apr,
+                            loan_term_months, balloon_payment_percent, trade_in_value, loan_establishment_fee,
+                            admin_fee_monthly, dealer_incentive):
+    """Finance scenario grid for one variant; slider arguments are specs accepted by sweep_values()"""
+    axes = {
+        'deposit': sweep_values(deposit, 'deposit'),
+        'interest_rate_apr': sweep_values(interest_rate_apr, 'interest_rate_apr'),
+        'loan_term_months': sweep_values(loan_term_months, 'loan_term_months'),
+        'balloon_payment_percent': sweep_values(balloon_payment_percent, 'balloon_payment_percent'),
+    }
+    check_sweep_size(*axes.values())
+
+    inputs = _load_vehicle_cost_inputs(variant_id, state)
+    running = compute_vehicle_running_costs(
+        **inputs,
+        kilometers_per_annum=kilometers_per_annum,
+        off_grid_energy_percent=off_grid_energy_percent
+    )
+
+    grid = finance_sweep(
+        drive_away_price=running['drive_away_price'],
+        annual_coo_base=running['annual_coo_base'],
+        deposits=axes['deposit'],
+        interest_rates_apr=axes['interest_rate_apr'],
+        loan_terms_months=axes['loan_term_months'],
+        balloon_payment_percents=axes['balloon_payment_percent'],
+        trade_in_value=trade_in_value,
+        loan_establishment_fee=loan_establishment_fee,
+        admin_fee_monthly=admin_fee_monthly,
+        dealer_incentive=dealer_incentive
+    )
+
+    return {
+        "variant_id": variant_id,
+        "state": state,
+        "kilometers_per_annum": kilometers_per_annum,
+        "drive_away_price": running['drive_away_price'],
+        "annual_coo_without_finance": running['annual_coo_base'],
+        # Grids are nested lists indexed [deposit][interest_rate_apr][loan_term_months][balloon_payment_percent]
+        "axes": {name: values.tolist() for name, values in axes.items()},
+        "grid": {name: values.round(2).tolist() for name, values in grid.items()},
+    }
+
+
+class VehicleCostBatch:
+    """Column arrays of cost inputs for many (variant, state) pricing rows.
+
+    Mirrors calculate_vehicle_cost_no_finance / calculate_vehicle_cost_with_finance,
+    but computes every row in one vectorised pass instead of one Python call per row.
+    """
+
+    def __init__(self, columns, skipped=0):
+        self.variant_id = columns['variant_id']
+        self.state = columns['state']
+        self.drive_away_price = columns['drive_away_price']
+        self.registration = columns['registration']
+        self.fuel_efficiency = columns['fuel_efficiency']
+        self.annual_tailpipe_co2 = columns['annual_tailpipe_co2']
+        self.electricity_efficiency = columns['electricity_efficiency']
+        self.insurance_annual = columns['insurance_annual']
+        self.fuel_price_per_litre = columns['fuel_price_per_litre']
+        self.emissions_factor = columns['emissions_factor']
+        self.skipped = skipped
+
+    def __len__(self):
+        return len(self.variant_id)
+
+    @classmethod
+    def load(cls, variant_ids=None):
+        """Load every priced variant (optionally limited to variant_ids) in two queries plus the reference-data cache"""
+        prices = CarPricing.objects.exclude(state__isnull=True).exclude(state='')
+        vehicles = Vehicles.objects.all()
+        if variant_ids is not None:
+            prices = prices.filter(car_variant_id__in=variant_ids)
+            vehicles = vehicles.filter(id__in=variant_ids)
+
+        price_rows = prices.order_by('car_variant_id', 'state').values_list(
+            'car_variant_id', 'state', 'drive_away_price', 'registration'
+        )
+        vehicle_rows = {
+            row[0]: row[1:]
+            for row in vehicles.values_list('id', 'body', 'drivetrain', 'fuel_consumption_comb', 'annual_tailpipe_co2')
+        }
+
+        emissions_factors = reference_data.emissions_factors()
+
+        # Retail prices are stored in cents per litre, one column per state
+        fuel_retail_price = reference_data.latest_fuel_price(FuelRetailPrice.FUEL_PETROL, FuelRetailPrice.YEAR_CY)
+
+        columns = {key: [] for key in [
+            'variant_id', 'state', 'drive_away_price', 'registration', 'fuel_efficiency', 'annual_tailpipe_co2',
+            'electricity_efficiency', 'insurance_annual', 'fuel_price_per_litre', 'emissions_factor',
+        ]}
+        skipped = 0
+
+        for variant_id, state, drive_away_price, registration in price_rows:
+            state = state.strip().upper()
+            vehicle = vehicle_rows.get(variant_id)
+            if (vehicle is None or state not in emissions_factors or fuel_retail_price is None
+                    or fuel_retail_price.get(state.lower()) is None):
+                skipped += 1
+                continue
+
+            body, drivetrain, fuel_consumption_comb, annual_tailpipe_co2 = vehicle
+            body_cost = reference_data.body_cost(body)
+            if body_cost is not None:
+                insurance_annual = (float(body_cost.insurance_cost_comprehensive_annual_min) + float(body_cost.insurance_cost_comprehensive_annual_max)) / 2
+            else:
+                insurance_annual = DEFAULT_INSURANCE_ANNUAL_EV if drivetrain == 'EV' else DEFAULT_INSURANCE_ANNUAL
+
+            columns['variant_id'].append(variant_id)
+            columns['state'].append(state)
+            columns['drive_away_price'].append(float(drive_away_price))
+            columns['registration'].append(float(registration))
+            columns['fuel_efficiency'].append(float(fuel_consumption_comb))
+            columns['annual_tailpipe_co2'].append(float(annual_tailpipe_co2))
+            columns['electricity_efficiency'].append(ELECTRICITY_EFFICIENCY_KWH_PER_KM.get(drivetrain, 0.0))
+            columns['insurance_annual'].append(insurance_annual)
+            columns['fuel_price_per_litre'].append(float(fuel_retail_price[state.lower()]) / 100)
+            columns['emissions_factor'].append(emissions_factors[state])
+
+        arrays = {
+            key: np.array(values, dtype=np.int64 if key == 'variant_id' else object if key == 'state' else float)
+            for key, values in columns.items()
+        }
+        return cls(arrays, skipped=skipped)
+
+    def running_costs(self, kilometers_per_annum, off_grid_energy_percent):
+        """Annual running costs, depreciation and CO2 for every row"""
+        km = np.asarray(kilometers_per_annum, dtype=float)
+        off_grid = np.asarray(off_grid_energy_percent, dtype=float)
+
+        fuel_cost_pa = self.fuel_price_per_litre * (self.fuel_efficiency * km / 100)
+
+        # NOTE: no electricity price data yet, same as the scalar calculator
+        electricity_kwh_pa = self.electricity_efficiency * km
+        electricity_cost_pa = np.zeros_like(fuel_cost_pa)
+        total_fuel_electricity = fuel_cost_pa + electricity_cost_pa
+
+        maintenance_annual = np.full_like(fuel_cost_pa, DEFAULT_SERVICE_COST_5YR / 5)
+        other_running_costs = self.insurance_annual + self.registration + maintenance_annual
+        annual_coo_base = total_fuel_electricity + other_running_costs
+
+        estimated_resale_value = self.drive_away_price * DEFAULT_RESALE_VALUE_PERCENT
+        depreciation_5yr = self.drive_away_price - estimated_resale_value
+        with np.errstate(divide='ignore', invalid='ignore'):
+            depreciation_percent = np.where(self.drive_away_price > 0, depreciation_5yr / self.drive_away_price * 100, 0.0)
+            co2_g_km = np.where(km > 0, self.annual_tailpipe_co2 / km * 1000, 0.0)
+
+        co2_tailpipe_pa = co2_g_km * km / 1000
+        co2_electricity_pa = electricity_kwh_pa * self.emissions_factor * (1 - off_grid / 100)
+
+        return {
+            "drive_away_price": self.drive_away_price,
+            "annual_coo_base": annual_coo_base,
+            "fuel_electricity_total": total_fuel_electricity,
+            "fuel_cost_annual": fuel_cost_pa,
+            "electricity_cost_annual": electricity_cost_pa,
+            "other_running_costs_total": other_running_costs,
+            "insurance_annual": self.insurance_annual,
+            "registration_annual": self.registration,
+            "maintenance_annual": maintenance_annual,
+            "depreciation_5yr_amount": depreciation_5yr,
+            "depreciation_5yr_percent": depreciation_percent,
+            "estimated_resale_value": estimated_resale_value,
+            "co2_emissions_total_kg": co2_tailpipe_pa + co2_electricity_pa,
+            "co2_tailpipe_kg": co2_tailpipe_pa,
+            "co2_electricity_kg": co2_electricity_pa
+        }
+
+    def finance_costs(self, deposit, trade_in_value, interest_rate_apr, loan_term_months, balloon_payment_percent,
+                      loan_establishment_fee, admin_fee_monthly, dealer_incentive, finance_type=None):
+        """Loan amount, PMT and total loan cost for every row"""
+        drive_away_price = self.drive_away_price - dealer_incentive
+        loan_amount = drive_away_price - deposit - trade_in_value
+        balloon_payment_amount = drive_away_price * (balloon_payment_percent / 100)
+
+        monthly_payment = pmt_with_balloon(
+            loan_amount, balloon_payment_amount, (interest_rate_apr / 100) / 12, loan_term_months, admin_fee_monthly
+        )
+        total_loan_cost = (monthly_payment * loan_term_months) + balloon_payment_amount + loan_establishment_fee - loan_amount
+        annualized_loan_cost = total_loan_cost / (loan_term_months / 12) if loan_term_months > 0 else np.zeros_like(total_loan_cost)
+
+        return {
+            "drive_away_price": drive_away_price,
+            "loan_amount": loan_amount,
+            "balloon_payment_amount": balloon_payment_amount,
+            "monthly_repayment_total": monthly_payment,
+            "total_loan_cost": total_loan_cost,
+            "annualized_loan_cost": annualized_loan_cost,
+        }
+
+    def core_ratings(self, kilometers_per_annum, off_grid_energy_percent, with_finance, finance_params=None):
+        """Unrounded 5-year COO, emissions, scores and star rating for every row"""
+        running = self.running_costs(kilometers_per_annum, off_grid_energy_percent)
+        annual_coo = running['annual_coo_base']
+        if with_finance:
+            annual_coo = annual_coo + self.finance_costs(**finance_params)['annualized_loan_cost']
+
+        coo_5yr = annual_coo * 5
+        emissions_5yr = running['co2_emissions_total_kg'] * 5
+
+        e_min, e_max = EMISSIONS_SCORE_RANGE
+        p_min, p_max = COO_SCORE_RANGE_WITH_FINANCE if with_finance else COO_SCORE_RANGE
+        p_score = np.clip(1 - (coo_5yr - p_min) / (p_max - p_min), 0, 1)
+        e_score = np.clip(1 - (emissions_5yr - e_min) / (e_max - e_min), 0, 1)
+        core_rating = (0.8 * p_score) + (0.2 * e_score)
+
+        band = np.select(
+            [core_rating >= threshold for threshold, _, _ in STAR_RATING_BANDS],
+            list(range(len(STAR_RATING_BANDS))),
+            default=len(STAR_RATING_BANDS) - 1,
+        )
+        star_ratings = np.array([star_rating for _, star_rating, _ in STAR_RATING_BANDS])
+
+        return {
+            'cost_of_ownership_5yr': coo_5yr,
+            'emissions_5yr_kg': emissions_5yr,
+            'coo_score': p_score,
+            'emissions_score': e_score,
+            'core_rating': core_rating,
+            'star_rating': star_ratings[band],
+            'rating_band': band,
+        }
@@ -1,10 +1,23 @@
 # calc_app/services/car_calculations.py
 
 from django.conf import settings
+from django.db import connection
+from django.db.models import Prefetch
 from api.models import CarMakes, CarPricing, FuelRetailPrice
-from api.models import Vehicles, CarBodyCost, ElectricityGridEmissions
+from api.models import Vehicles, CarRatingResult
+from api.services import reference_data
+from calc_app.services.rating_results import start_rating_run, complete_rating_run, fail_rating_run, get_current_rating_run, save_rating_results
 import math
 
+class QueryCounter:
+    """execute_wrapper that counts the SQL statements issued on a connection"""
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
 class CarCalculationsProcessor:
     def __init__(self):
         print(f"Starting process...")
@@ -12,84 +25,123 @@ class CarCalculationsProcessor:
     def process_all_car_make_data(self):
         print(f"Processing all cars...")
 
-        car_makes = CarMakes.objects.filter(is_active=True).order_by('name')
         processed_makes = []
         failed_makes = []
         total_variants_created = 0
-        
-        for car_make in car_makes:
-            
-            self.process_single_car_make_data(car_make)
 
+        query_counter = QueryCounter()
+        with connection.execute_wrapper(query_counter):
+            # Results go to a new run and only become visible once it completes
+            run = start_rating_run()
+            try:
+                car_makes = CarMakes.objects.filter(is_active=True).order_by('name')
+
+                for car_make in car_makes:
+                    try:
+                        self.process_single_car_make_data(car_make, run)
+                        processed_makes.append(car_make.name)
+                    except Exception as e:
+                        print(f"Error processing {car_make.name}: {e}")
+                        failed_makes.append(car_make.name)
+            except Exception:
+                fail_rating_run(run)
+                raise
+
+            # A partial run must never replace the live one
+            if failed_makes:
+                fail_rating_run(run)
+            else:
+                complete_rating_run(run)
 
         return {
+            'run_id': run.id,
+            'run_status': run.status,
+            'rows_written': run.rows_written,
             'processed_makes': processed_makes,
             'failed_makes': failed_makes,
-            'total_variants_created': total_variants_created
+            'total_variants_created': total_variants_created,
+            'query_count': query_counter.count
         }
 
-    def process_single_car_make_data(self, car_make):
+    def process_single_car_make_data(self, car_make, run=None):
         """Process a single car make"""
 
-        variants = car_make.variants.filter(is_active=True).order_by('model', 'variant', 'sub_variant')
-
-        weight_price_percent = .8       #W(p)
-        weight_emission_percent = .2    #W(e)
-
+        query_counter = QueryCounter()
+        with connection.execute_wrapper(query_counter):
+            # A single make is refreshed in place within the live run
+            publish_run = False
+            if run is None:
+                run = get_current_rating_run()
+                if run is None:
+                    run = start_rating_run()
+                    publish_run = True
+
+            # Prices for every variant come back in one extra query
+            variants = list(
+                car_make.variants
+                .filter(is_active=True)
+                .order_by('model', 'variant', 'sub_variant')
+                .prefetch_related(Prefetch('prices', queryset=CarPricing.objects.order_by('id')))
+            )
+            # Vehicles share their primary key with the variant
+            vehicles = Vehicles.objects.in_bulk([variant.id for variant in variants])
+
+        prices_processed = 0
+        prices_skipped = 0
+        results = []
 
         for variant in variants:
-            """prices = variant.prices
-            for price in prices:
-                print(f'{car_make.name} {variant.variant} {variant.variant} {price.state} {price.msrp}')"""
+            vehicle = vehicles.get(variant.id)
+
+            for price in variant.prices.all():
+                price_state = (price.state or '').strip().upper()
+                emissions_factor = reference_data.emissions_factor(price_state) if price_state else None
+                if vehicle is None or emissions_factor is None:
+                    prices_skipped += 1
+                    continue
+
+                try:
+                    fuel_price_per_litre = get_fuel_price_per_litre(price_state)
+                except ValueError:
+                    prices_skipped += 1
+                    continue
+
+                # Same inputs and scoring as calculate_core_rating() at the default usage profile
+                running = compute_vehicle_running_costs(
+                    vehicle=vehicle,
+                    pricing=price,
+                    fuel_price_per_litre=fuel_price_per_litre,
+                    emissions_factor_kg_per_kwh=emissions_factor,
+                    body_cost=reference_data.body_cost(vehicle.body),
+                    kilometers_per_annum=DEFAULT_KILOMETERS_PER_ANNUM,
+                    off_grid_energy_percent=DEFAULT_OFF_GRID_ENERGY_PERCENT
+                )
+                rating = score_core_rating(running['annual_coo_base'], running['co2_emissions_total_kg'], with_finance=False)
+
+                prices_processed += 1
+                results.append(CarRatingResult(
+                    run=run,
+                    car_variant_id=variant.id,
+                    state=price_state,
+                    core_rating=rating['core_rating'],
+                    cost_of_ownership_5yr=rating['cost_of_ownership_5yr'],
+                    emissions_5yr_kg=rating['emissions_5yr_kg'],
+                ))
+
+        with connection.execute_wrapper(query_counter):
+            results_written = save_rating_results(results)
+            if publish_run:
+                complete_rating_run(run)
 
-            user_entry = {
-                'fuel_efficiency': variant.fuel_efficiency_combined_l_100km,
-                'est_avg_km_pa': 17000
-            }
-            prices = CarPricing.objects.filter(car_variant_id=variant.id)
-                
-            for price in prices:
-                #Cost of keeping this car on the road per year
-                a_coktc = {
-                    'sched_maintenance': 0,
-                    'petrol_cost': 0,
-                    'electricity_cost': 0,
-                    'registration_fees': 0,
-                    'insurance_cost': 0,        #incl Comprehensive
-                }
-
-                year_to = int(variant.year) - 1
-                fuel_type = variant.drivetrain
-                avg_fuel_retail = 0
-                price_state = price.state
-                price_state = price_state.strip().lower()
-
-                if fuel_type is not None and bool(fuel_type):
-                    fuel_type = fuel_type.strip().lower()
-                    fuel_retail_price = FuelRetailPrice.objects.filter(year_type='cy', year_to=year_to, fuel_type=fuel_type).first()
-                    if fuel_retail_price is not None:
-                        avg_fuel_retail = getattr(fuel_retail_price, price_state)
-
-                a_coktc['sched_maintenance'] = 2500 / 5     #='User Entry'!D11/5
-                a_coktc['petrol_cost'] = user_entry['fuel_efficiency'] * user_entry['est_avg_km_pa'] / 100 * avg_fuel_retail / 100              #D17    #=D10*D15/100*'Average Petrol Retail'!D26/100
-
-                cost_of_keeping_the_car = 0.00
-                for k, v in a_coktc.items():
-                    cost_of_keeping_the_car += float(v)
-                
-
-                #Total Cost Of Ownership (COO) over 5 years
-                b_tcoo = cost_of_keeping_the_car * 5 / 100
-
-                e = 0 #E
-
-                # = 1 - [P - P(min)] / [P(max) - P(min)]
-                p = 0 
-
-                core_rating = (weight_price_percent * p) + (weight_emission_percent * e)  #W(p) * P + (W(e) * E
-
-                
-                print(f'{car_make.name} {variant.variant} {variant.variant} : CORE Rating = {core_rating} {user_entry['fuel_efficiency']} {a_coktc['petrol_cost'] }') 
+        return {
+            'car_make': car_make.name,
+            'run_id': run.id,
+            'variants_processed': len(variants),
+            'prices_processed': prices_processed,
+            'prices_skipped': prices_skipped,
+            'results_written': results_written,
+            'query_count': query_counter.count
+        }
 
 """
 year_to = 2025 - 1
@@ -100,38 +152,139 @@ if fuel_type is not None and bool(fuel_type):
     avg_fuel_retail = FuelRetailPrice.objects.filter(year_type='cy', year_to=year_to, fuel_type=fuel_type).first()
 """
 
-def calculate_vehicle_cost_with_finance(
-    variant_id: int,
-    state: str,
-    kilometers_per_annum: int,
-    off_grid_energy_percent: float,
-    finance_type: str,
-    deposit: float,
-    trade_in_value: float,
-    interest_rate_apr: float,
-    loan_term_months: int,
-    balloon_payment_percent: float,
-    loan_establishment_fee: float,
-    admin_fee_monthly: float,
-    dealer_incentive: float
-):
+# Default usage profile applied when the caller does not supply one
+DEFAULT_KILOMETERS_PER_ANNUM = 17000
+DEFAULT_OFF_GRID_ENERGY_PERCENT = 20.0
+
+# Fallbacks while Vehicles has no servicing/resale columns
+DEFAULT_SERVICE_COST_5YR = 2500.0
+DEFAULT_RESALE_VALUE_PERCENT = 0.45
+
+# Electricity use per km by drivetrain, anything else is treated as ICE
+ELECTRICITY_EFFICIENCY_KWH_PER_KM = {
+    'EV': 0.15,
+    'PHEV': 0.12,
+    'Hybrid': 0.12,
+}
+
+# Annual comprehensive insurance when no CarBodyCost row matches the body
+DEFAULT_INSURANCE_ANNUAL_EV = 2450.0
+DEFAULT_INSURANCE_ANNUAL = 2050.0
+
+# Min/Max normalization values from the stored procedure
+EMISSIONS_SCORE_RANGE = (10000, 50000)
+COO_SCORE_RANGE = (15000, 55000)
+COO_SCORE_RANGE_WITH_FINANCE = (20000, 65000)
+
+# CORE rating thresholds, highest first
+STAR_RATING_BANDS = [
+    (0.8, 5, 'EXCEPTIONAL: Among the best on the market'),
+    (0.6, 4, 'STRONG: Great ownership savings and responsible emissions'),
+    (0.4, 3, 'MODERATE: Solid overall with fair balance'),
+    (0.2, 2, 'LOW: Higher ownership costs or emissions'),
+    (0.0, 1, 'LIMITED: Better options exist'),
+]
+
+# Default finance parameters used for the "with finance" CORE rating
+DEFAULT_FINANCE_PARAMS = {
+    'finance_type': 'Loan',
+    'deposit': 10000,
+    'trade_in_value': 0,
+    'interest_rate_apr': 7.5,
+    'loan_term_months': 60,
+    'balloon_payment_percent': 30,
+    'loan_establishment_fee': 500,
+    'admin_fee_monthly': 10,
+    'dealer_incentive': 0
+}
+
+def get_fuel_price_per_litre(state: str, fuel_type: str = FuelRetailPrice.FUEL_PETROL):
+    """Latest calendar-year average retail fuel price for a state, in dollars per litre"""
+    state_column = (state or '').strip().lower()
+    fuel_retail_price = reference_data.latest_fuel_price(fuel_type, FuelRetailPrice.YEAR_CY)
+    if fuel_retail_price is None or fuel_retail_price.get(state_column) is None:
+        raise ValueError(f"State fuel cost data for '{state}' not found.")
+
+    # Retail prices are stored in cents per litre
+    return float(fuel_retail_price[state_column]) / 100
 
+def _load_vehicle_cost_inputs(variant_id: int, state: str):
+    """Fetch everything needed to cost a single variant in a state"""
     try:
         vehicle = Vehicles.objects.get(pk=variant_id)
         pricing = CarPricing.objects.get(car_variant_id=variant_id, state=state)
-        fuel_prices = FuelRetailPrice.objects.get(state=state)
-        grid_emissions = ElectricityGridEmissions.objects.get(state=state)
-        body_cost = CarBodyCost.objects.filter(type=vehicle.body).first()
 
     except Vehicles.DoesNotExist:
         raise ValueError(f"Vehicle with ID {variant_id} not found.")
     except CarPricing.DoesNotExist:
         raise ValueError(f"Pricing for vehicle {variant_id} in state {state} not found.")
-    except FuelRetailPrice.DoesNotExist:
-        raise ValueError(f"State fuel cost data for '{state}' not found.")
-    except ElectricityGridEmissions.DoesNotExist:
+
+    # Reference tables come from the in-process cache rather than three more queries
+    emissions_factor = reference_data.emissions_factor(state)
+    if emissions_factor is None:
         raise ValueError(f"State grid emissions data for '{state}' not found.")
 
+    body_cost = reference_data.body_cost(vehicle.body)
+    fuel_price_per_litre = get_fuel_price_per_litre(state)
+
+    return {
+        'vehicle': vehicle,
+        'pricing': pricing,
+        'fuel_price_per_litre': fuel_price_per_litre,
+        'emissions_factor_kg_per_kwh': emissions_factor,
+        'body_cost': body_cost,
+    }
+
+def _load_vehicle_cost_inputs_bulk(variant_ids, state: str):
+    """Fetch cost inputs for many variants in one state with two queries.
+
+    Returns (inputs by variant_id, error message by variant_id).
+    """
+    emissions_factor = reference_data.emissions_factor(state)
+    if emissions_factor is None:
+        raise ValueError(f"State grid emissions data for '{state}' not found.")
+    fuel_price_per_litre = get_fuel_price_per_litre(state)
+
+    vehicles = Vehicles.objects.in_bulk(variant_ids)
+
+    # Same row as CarPricing.objects.get(car_variant_id=..., state=...) when there is exactly one
+    pricing_by_variant = {}
+    duplicate_pricing = set()
+    for pricing in CarPricing.objects.filter(car_variant_id__in=variant_ids, state=state):
+        if pricing.car_variant_id in pricing_by_variant:
+            duplicate_pricing.add(pricing.car_variant_id)
+        pricing_by_variant[pricing.car_variant_id] = pricing
+
+    inputs = {}
+    errors = {}
+    for variant_id in variant_ids:
+        vehicle = vehicles.get(variant_id)
+        if vehicle is None:
+            errors[variant_id] = f"Vehicle with ID {variant_id} not found."
+        elif variant_id not in pricing_by_variant:
+            errors[variant_id] = f"Pricing for vehicle {variant_id} in state {state} not found."
+        elif variant_id in duplicate_pricing:
+            errors[variant_id] = f"Multiple pricing rows for vehicle {variant_id} in state {state}."
+        else:
+            inputs[variant_id] = {
+                'vehicle': vehicle,
+                'pricing': pricing_by_variant[variant_id],
+                'fuel_price_per_litre': fuel_price_per_litre,
+                'emissions_factor_kg_per_kwh': emissions_factor,
+                'body_cost': reference_data.body_cost(vehicle.body),
+            }
+    return inputs, errors
+
+def compute_vehicle_running_costs(
+    vehicle,
+    pricing,
+    fuel_price_per_litre: float,
+    emissions_factor_kg_per_kwh: float,
+    body_cost,
+    kilometers_per_annum: int,
+    off_grid_energy_percent: float
+):
+    """Annual running costs, depreciation and CO2 for already loaded rows (no queries)"""
 
     # Vehicle specifications
     fuel_efficiency = float(vehicle.fuel_consumption_comb)
@@ -140,27 +293,22 @@ def calculate_vehicle_cost_with_finance(
     registration_cost = float(pricing.registration)
 
     # Using dummy values if they don't exist. Replace with actual model fields.
-    estimated_service_cost_5yr = getattr(vehicle, 'estimated_5yr_dealer_servicing_cost', 2500.0)
-    estimated_resale_value_5yr = getattr(vehicle, 'estimated_5yr_resale_value', drive_away_price * 0.45)
+    estimated_service_cost_5yr = getattr(vehicle, 'estimated_5yr_dealer_servicing_cost', DEFAULT_SERVICE_COST_5YR)
+    estimated_resale_value_5yr = getattr(vehicle, 'estimated_5yr_resale_value', drive_away_price * DEFAULT_RESALE_VALUE_PERCENT)
     co2_emissions_g_km = float(vehicle.annual_tailpipe_co2 / (kilometers_per_annum or 17000) * 1000) if kilometers_per_annum else 0
 
     # Electricity efficiency
-    if drivetrain == 'EV':
-        electricity_efficiency_kwh_per_km = 0.15
-    elif drivetrain in ['PHEV', 'Hybrid']:
-        electricity_efficiency_kwh_per_km = 0.12
-    else:
-        electricity_efficiency_kwh_per_km = 0.0
+    electricity_efficiency_kwh_per_km = ELECTRICITY_EFFICIENCY_KWH_PER_KM.get(drivetrain, 0.0)
 
     # Insurance cost
     if body_cost:
         insurance_annual = (float(body_cost.insurance_cost_comprehensive_annual_min) + float(body_cost.insurance_cost_comprehensive_annual_max)) / 2
     else:
-        insurance_annual = 2450.0 if drivetrain == 'EV' else 2050.0
+        insurance_annual = DEFAULT_INSURANCE_ANNUAL_EV if drivetrain == 'EV' else DEFAULT_INSURANCE_ANNUAL
 
     # Fuel & Electricity Calculations
     fuel_litres_pa = (fuel_efficiency * kilometers_per_annum) / 100
-    fuel_cost_pa = float(fuel_prices.petrol_price_per_litre) * fuel_litres_pa
+    fuel_cost_pa = fuel_price_per_litre * fuel_litres_pa
 
     # NOTE: This part needs electricity price data which is not available in the new models.
     # I'll set electricity_cost_pa to 0 for now.
@@ -183,10 +331,39 @@ def calculate_vehicle_cost_with_finance(
 
     # CO2 Emissions
     co2_tailpipe_pa = (co2_emissions_g_km * kilometers_per_annum) / 1000
-    co2_electricity_pa = electricity_kwh_pa * float(grid_emissions.emissions_factor_kg_per_kwh) * (1 - off_grid_energy_percent / 100)
+    co2_electricity_pa = electricity_kwh_pa * emissions_factor_kg_per_kwh * (1 - off_grid_energy_percent / 100)
     co2_total_pa = co2_tailpipe_pa + co2_electricity_pa
 
-    # Finance Calculations
+    return {
+        "drive_away_price": drive_away_price,
+        "annual_coo_base": annual_coo_base,
+        "fuel_electricity_total": total_fuel_electricity,
+        "fuel_cost_annual": fuel_cost_pa,
+        "electricity_cost_annual": electricity_cost_pa,
+        "other_running_costs_total": other_running_costs,
+        "insurance_annual": insurance_annual,
+        "registration_annual": registration_cost,
+        "maintenance_annual": maintenance_annual,
+        "depreciation_5yr_amount": depreciation_5yr,
+        "depreciation_5yr_percent": depreciation_percent,
+        "estimated_resale_value": estimated_resale_value_5yr,
+        "co2_emissions_total_kg": co2_total_pa,
+        "co2_tailpipe_kg": co2_tailpipe_pa,
+        "co2_electricity_kg": co2_electricity_pa
+    }
+
+def compute_finance_costs(
+    drive_away_price: float,
+    deposit: float,
+    trade_in_value: float,
+    interest_rate_apr: float,
+    loan_term_months: int,
+    balloon_payment_percent: float,
+    loan_establishment_fee: float,
+    admin_fee_monthly: float,
+    dealer_incentive: float
+):
+    """Loan amount, monthly repayment (PMT with balloon) and total cost of the loan"""
     drive_away_price_after_incentive = drive_away_price - dealer_incentive
     loan_amount = drive_away_price_after_incentive - deposit - trade_in_value
     balloon_payment_amount = drive_away_price_after_incentive * (balloon_payment_percent / 100)
@@ -204,138 +381,166 @@ def calculate_vehicle_cost_with_finance(
     total_loan_cost = (monthly_payment * loan_term_months) + balloon_payment_amount + loan_establishment_fee - loan_amount
     annualized_loan_cost = total_loan_cost / (loan_term_months / 12) if loan_term_months > 0 else 0
 
-    # Final COO with Finance
-    annual_coo_with_finance = annual_coo_base + annualized_loan_cost
+    return {
+        "drive_away_price": drive_away_price_after_incentive,
+        "loan_amount": loan_amount,
+        "balloon_payment_amount": balloon_payment_amount,
+        "monthly_repayment_total": monthly_payment,
+        "total_loan_cost": total_loan_cost,
+        "annualized_loan_cost": annualized_loan_cost,
+    }
+
+def compute_vehicle_cost_with_finance(
+    vehicle,
+    pricing,
+    fuel_price_per_litre: float,
+    emissions_factor_kg_per_kwh: float,
+    body_cost,
+    kilometers_per_annum: int,
+    off_grid_energy_percent: float,
+    finance_type: str,
+    deposit: float,
+    trade_in_value: float,
+    interest_rate_apr: float,
+    loan_term_months: int,
+    balloon_payment_percent: float,
+    loan_establishment_fee: float,
+    admin_fee_monthly: float,
+    dealer_incentive: float
+):
+    """Cost of ownership with finance for already loaded rows (no queries)"""
+    running = compute_vehicle_running_costs(
+        vehicle, pricing, fuel_price_per_litre, emissions_factor_kg_per_kwh, body_cost,
+        kilometers_per_annum, off_grid_energy_percent
+    )
+    finance = compute_finance_costs(
+        running['drive_away_price'], deposit, trade_in_value, interest_rate_apr, loan_term_months,
+        balloon_payment_percent, loan_establishment_fee, admin_fee_monthly, dealer_incentive
+    )
 
     return {
-        "variant_id": variant_id,
-        "state": state,
         "kilometers_per_annum": kilometers_per_annum,
-        "drive_away_price": drive_away_price_after_incentive,
+        "drive_away_price": finance['drive_away_price'],
         "finance_type": finance_type,
         "deposit": deposit,
         "trade_in_value": trade_in_value,
-        "loan_amount": loan_amount,
+        "loan_amount": finance['loan_amount'],
         "interest_rate_apr": interest_rate_apr,
         "loan_term_months": loan_term_months,
-        "balloon_payment_amount": balloon_payment_amount,
+        "balloon_payment_amount": finance['balloon_payment_amount'],
         "balloon_payment_percent": balloon_payment_percent,
-        "monthly_repayment_total": monthly_payment,
-        "total_loan_cost": total_loan_cost,
-        "annualized_loan_cost": annualized_loan_cost,
-        "annual_coo_without_finance": annual_coo_base,
-        "annual_coo_with_finance": annual_coo_with_finance,
-        "fuel_electricity_total": total_fuel_electricity,
-        "fuel_cost_annual": fuel_cost_pa,
-        "electricity_cost_annual": electricity_cost_pa,
-        "other_running_costs_total": other_running_costs,
-        "insurance_annual": insurance_annual,
-        "registration_annual": registration_cost,
-        "maintenance_annual": maintenance_annual,
-        "depreciation_5yr_amount": depreciation_5yr,
-        "depreciation_5yr_percent": depreciation_percent,
-        "estimated_resale_value": estimated_resale_value_5yr,
-        "co2_emissions_total_kg": co2_total_pa,
-        "co2_tailpipe_kg": co2_tailpipe_pa,
-        "co2_electricity_kg": co2_electricity_pa
+        "monthly_repayment_total": finance['monthly_repayment_total'],
+        "total_loan_cost": finance['total_loan_cost'],
+        "annualized_loan_cost": finance['annualized_loan_cost'],
+        "annual_coo_without_finance": running['annual_coo_base'],
+        "annual_coo_with_finance": running['annual_coo_base'] + finance['annualized_loan_cost'],
+        "fuel_electricity_total": running['fuel_electricity_total'],
+        "fuel_cost_annual": running['fuel_cost_annual'],
+        "electricity_cost_annual": running['electricity_cost_annual'],
+        "other_running_costs_total": running['other_running_costs_total'],
+        "insurance_annual": running['insurance_annual'],
+        "registration_annual": running['registration_annual'],
+        "maintenance_annual": running['maintenance_annual'],
+        "depreciation_5yr_amount": running['depreciation_5yr_amount'],
+        "depreciation_5yr_percent": running['depreciation_5yr_percent'],
+        "estimated_resale_value": running['estimated_resale_value'],
+        "co2_emissions_total_kg": running['co2_emissions_total_kg'],
+        "co2_tailpipe_kg": running['co2_tailpipe_kg'],
+        "co2_electricity_kg": running['co2_electricity_kg']
     }
 
+def calculate_vehicle_cost_with_finance(
+    variant_id: int,
+    state: str,
+    kilometers_per_annum: int,
+    off_grid_energy_percent: float,
+    finance_type: str,
+    deposit: float,
+    trade_in_value: float,
+    interest_rate_apr: float,
+    loan_term_months: int,
+    balloon_payment_percent: float,
+    loan_establishment_fee: float,
+    admin_fee_monthly: float,
+    dealer_incentive: float
+):
+    inputs = _load_vehicle_cost_inputs(variant_id, state)
+
+    cost_data = compute_vehicle_cost_with_finance(
+        **inputs,
+        kilometers_per_annum=kilometers_per_annum,
+        off_grid_energy_percent=off_grid_energy_percent,
+        finance_type=finance_type,
+        deposit=deposit,
+        trade_in_value=trade_in_value,
+        interest_rate_apr=interest_rate_apr,
+        loan_term_months=loan_term_months,
+        balloon_payment_percent=balloon_payment_percent,
+        loan_establishment_fee=loan_establishment_fee,
+        admin_fee_monthly=admin_fee_monthly,
+        dealer_incentive=dealer_incentive
+    )
+
+    return {"variant_id": variant_id, "state": state, **cost_data}
+
 def calculate_vehicle_cost_no_finance(
     variant_id: int,
     state: str,
     kilometers_per_annum: int,
     off_grid_energy_percent: float
 ):
-    try:
-        vehicle = Vehicles.objects.get(pk=variant_id)
-        pricing = CarPricing.objects.get(car_variant_id=variant_id, state=state)
-        fuel_prices = FuelRetailPrice.objects.get(state=state)
-        grid_emissions = ElectricityGridEmissions.objects.get(state=state)
-        body_cost = CarBodyCost.objects.filter(type=vehicle.body).first()
-
-    except Vehicles.DoesNotExist:
-        raise ValueError(f"Vehicle with ID {variant_id} not found.")
-    except CarPricing.DoesNotExist:
-        raise ValueError(f"Pricing for vehicle {variant_id} in state {state} not found.")
-    except FuelRetailPrice.DoesNotExist:
-        raise ValueError(f"State cost data for '{state}' not found.")
-    except ElectricityGridEmissions.DoesNotExist:
-        raise ValueError(f"State grid emissions data for '{state}' not found.")
+    inputs = _load_vehicle_cost_inputs(variant_id, state)
 
-    # Vehicle specifications
-    fuel_efficiency = float(vehicle.fuel_consumption_comb)
-    drivetrain = vehicle.drivetrain
-    drive_away_price = float(pricing.drive_away_price)
-    registration_cost = float(pricing.registration)
-
-    # Estimated values from the model
-    estimated_service_cost_5yr = getattr(vehicle, 'estimated_5yr_dealer_servicing_cost', 2500.0)
-    estimated_resale_value_5yr = getattr(vehicle, 'estimated_5yr_resale_value', drive_away_price * 0.45)
-    co2_emissions_g_km = float(vehicle.annual_tailpipe_co2 / (kilometers_per_annum or 17000) * 1000) if kilometers_per_annum else 0
-
-    # Electricity efficiency
-    if drivetrain == 'EV':
-        electricity_efficiency_kwh_per_km = 0.15
-    elif drivetrain in ['PHEV', 'Hybrid']:
-        electricity_efficiency_kwh_per_km = 0.12
-    else:
-        electricity_efficiency_kwh_per_km = 0.0
-
-    # Insurance cost
-    if body_cost:
-        insurance_annual = (float(body_cost.insurance_cost_comprehensive_annual_min) + float(body_cost.insurance_cost_comprehensive_annual_max)) / 2
-    else:
-        insurance_annual = 2450.0 if drivetrain == 'EV' else 2050.0
+    cost_data = compute_vehicle_running_costs(
+        **inputs,
+        kilometers_per_annum=kilometers_per_annum,
+        off_grid_energy_percent=off_grid_energy_percent
+    )
 
-    # Fuel & Electricity Calculations
-    fuel_litres_pa = (fuel_efficiency * kilometers_per_annum) / 100
-    fuel_cost_pa = float(fuel_prices.petrol_price_per_litre) * fuel_litres_pa
-
-    # NOTE: This part needs electricity price data which is not available in the new models.
-    # I'll set electricity_cost_pa to 0 for now.
-    electricity_kwh_pa = electricity_efficiency_kwh_per_km * kilometers_per_annum
-    electricity_cost_pa = 0.0
-    # float(electricity_price.price_per_kwh) * electricity_kwh_pa * (1 - off_grid_energy_percent / 100)
-
-    total_fuel_electricity = fuel_cost_pa + electricity_cost_pa
+    # Return a dictionary with all calculated values
+    return {"variant_id": variant_id, "state": state, "kilometers_per_annum": kilometers_per_annum, **cost_data}
 
-    # Other Running Costs
-    maintenance_annual = estimated_service_cost_5yr / 5
-    other_running_costs = insurance_annual + registration_cost + maintenance_annual
+def calculate_vehicle_costs_batch(
+    variant_ids,
+    state: str,
+    kilometers_per_annum: int,
+    off_grid_energy_percent: float,
+    finance_params: dict = None
+):
+    """Cost of ownership for many variants sharing one usage (and optional finance) profile.
 
-    # Annual Cost of Ownership (Base)
-    annual_coo_base = total_fuel_electricity + other_running_costs
+    Results keep the order of variant_ids; a variant that cannot be costed gets an "error" entry
+    instead of failing the whole batch.
+    """
+    inputs_by_variant, errors = _load_vehicle_cost_inputs_bulk(variant_ids, state)
 
-    # Depreciation
-    depreciation_5yr = drive_away_price - estimated_resale_value_5yr
-    depreciation_percent = (depreciation_5yr / drive_away_price) * 100 if drive_away_price > 0 else 0
+    results = []
+    for variant_id in variant_ids:
+        if variant_id in errors:
+            results.append({"variant_id": variant_id, "state": state, "error": errors[variant_id]})
+            continue
+
+        inputs = inputs_by_variant[variant_id]
+        if finance_params is not None:
+            cost_data = compute_vehicle_cost_with_finance(
+                **inputs,
+                kilometers_per_annum=kilometers_per_annum,
+                off_grid_energy_percent=off_grid_energy_percent,
+                **finance_params
+            )
+        else:
+            cost_data = {
+                "kilometers_per_annum": kilometers_per_annum,
+                **compute_vehicle_running_costs(
+                    **inputs,
+                    kilometers_per_annum=kilometers_per_annum,
+                    off_grid_energy_percent=off_grid_energy_percent
+                )
+            }
+        results.append({"variant_id": variant_id, "state": state, **cost_data})
 
-    # CO2 Emissions
-    co2_tailpipe_pa = (co2_emissions_g_km * kilometers_per_annum) / 1000
-    co2_electricity_pa = electricity_kwh_pa * float(grid_emissions.emissions_factor_kg_per_kwh) * (1 - off_grid_energy_percent / 100)
-    co2_total_pa = co2_tailpipe_pa + co2_electricity_pa
+    return results
 
-    # Return a dictionary with all calculated values
-    return {
-        "variant_id": variant_id,
-        "state": state,
-        "kilometers_per_annum": kilometers_per_annum,
-        "drive_away_price": drive_away_price,
-        "annual_coo_base": annual_coo_base,
-        "fuel_electricity_total": total_fuel_electricity,
-        "fuel_cost_annual": fuel_cost_pa,
-        "electricity_cost_annual": electricity_cost_pa,
-        "other_running_costs_total": other_running_costs,
-        "insurance_annual": insurance_annual,
-        "registration_annual": registration_cost,
-        "maintenance_annual": maintenance_annual,
-        "depreciation_5yr_amount": depreciation_5yr,
-        "depreciation_5yr_percent": depreciation_percent,
-        "estimated_resale_value": estimated_resale_value_5yr,
-        "co2_emissions_total_kg": co2_total_pa,
-        "co2_tailpipe_kg": co2_tailpipe_pa,
-        "co2_electricity_kg": co2_electricity_pa
-    }
 def calculate_vehicle_emissions(
     vehicle_id: int = None,
     make: str = None,
@@ -353,10 +558,8 @@ def calculate_vehicle_emissions(
     calc_state = state or 'QLD'
     calc_annual_km = annual_km or 14000
 
-    try:
-        grid_emissions = ElectricityGridEmissions.objects.get(state=calc_state)
-        a17_electricity_factor = float(grid_emissions.emissions_factor_kg_per_kwh)
-    except ElectricityGridEmissions.DoesNotExist:
+    a17_electricity_factor = reference_data.emissions_factor(calc_state)
+    if a17_electricity_factor is None:
         # Fallback to a default value if the state is not found
         a17_electricity_factor = 0.73 # Default for QLD
 
@@ -423,6 +626,45 @@ def calculate_vehicle_emissions(
     sorted_results = sorted(results, key=lambda x: x['total_co2_kg_pa'], reverse=True)
     return sorted_results
 
+def score_core_rating(annual_coo: float, emissions_annual_kg: float, with_finance: bool):
+    """Normalise 5-year COO and emissions into the CORE rating and star rating"""
+
+    e_min, e_max = EMISSIONS_SCORE_RANGE
+    p_min, p_max = COO_SCORE_RANGE_WITH_FINANCE if with_finance else COO_SCORE_RANGE
+
+    # Calculate 5-year totals
+    coo_5yr = annual_coo * 5
+    emissions_5yr = emissions_annual_kg * 5
+
+    # Calculate normalized scores ---
+    # Cost score (P_score)
+    p_score = 1 - ((coo_5yr - p_min) / (p_max - p_min)) if (p_max - p_min) != 0 else 0
+    p_score = max(0, min(1, p_score)) # Clamp between 0 and 1
+
+    # Emissions score (E_score)
+    e_score = 1 - ((emissions_5yr - e_min) / (e_max - e_min)) if (e_max - e_min) != 0 else 0
+    e_score = max(0, min(1, e_score)) # Clamp between 0 and 1
+
+    # Calculate CORE rating ---
+    core_rating = (0.8 * p_score) + (0.2 * e_score)
+
+    # Convert to star rating ---
+    star_rating, description = STAR_RATING_BANDS[-1][1:]
+    for threshold, band_star_rating, band_description in STAR_RATING_BANDS:
+        if core_rating >= threshold:
+            star_rating, description = band_star_rating, band_description
+            break
+
+    return {
+        'cost_of_ownership_5yr': round(coo_5yr, 2),
+        'emissions_5yr_kg': round(emissions_5yr, 2),
+        'coo_score': round(p_score, 4),
+        'emissions_score': round(e_score, 4),
+        'core_rating': round(core_rating, 4),
+        'star_rating': star_rating,
+        'rating_description': description
+    }
+
 def calculate_core_rating(
     variant_id: int,
     state: str,
@@ -432,30 +674,13 @@ def calculate_core_rating(
     finance_params: dict = None
 ):
     # Default values from the stored procedure
-    calc_kilometers_per_annum = kilometers_per_annum or 17000
-    calc_off_grid_energy_percent = off_grid_energy_percent if off_grid_energy_percent is not None else 20.0
-
-    # Min/Max normalization values from the stored procedure
-    e_min, e_max = 10000, 50000
-    if with_finance:
-        p_min, p_max = 20000, 65000
-    else:
-        p_min, p_max = 15000, 55000
+    calc_kilometers_per_annum = kilometers_per_annum or DEFAULT_KILOMETERS_PER_ANNUM
+    calc_off_grid_energy_percent = off_grid_energy_percent if off_grid_energy_percent is not None else DEFAULT_OFF_GRID_ENERGY_PERCENT
 
     if with_finance:
         if not finance_params:
             # Default finance parameters if not provided
-            finance_params = {
-                'finance_type': 'Loan',
-                'deposit': 10000,
-                'trade_in_value': 0,
-                'interest_rate_apr': 7.5,
-                'loan_term_months': 60,
-                'balloon_payment_percent': 30,
-                'loan_establishment_fee': 500,
-                'admin_fee_monthly': 10,
-                'dealer_incentive': 0
-            }
+            finance_params = DEFAULT_FINANCE_PARAMS
         cost_data = calculate_vehicle_cost_with_finance(
             variant_id=variant_id,
             state=state,
@@ -475,45 +700,4 @@ def calculate_core_rating(
         annual_coo = cost_data['annual_coo_base']
         emissions_annual_kg = cost_data['co2_emissions_total_kg']
 
-    # Calculate 5-year totals
-    coo_5yr = annual_coo * 5
-    emissions_5yr = emissions_annual_kg * 5
-
-    # Calculate normalized scores ---
-    # Cost score (P_score)
-    p_score = 1 - ((coo_5yr - p_min) / (p_max - p_min)) if (p_max - p_min) != 0 else 0
-    p_score = max(0, min(1, p_score)) # Clamp between 0 and 1
-
-    # Emissions score (E_score)
-    e_score = 1 - ((emissions_5yr - e_min) / (e_max - e_min)) if (e_max - e_min) != 0 else 0
-    e_score = max(0, min(1, e_score)) # Clamp between 0 and 1
-
-    # Calculate CORE rating ---
-    core_rating = (0.8 * p_score) + (0.2 * e_score)
-
-    # Convert to star rating ---
-    if core_rating >= 0.8:
-        star_rating = 5
-        description = 'EXCEPTIONAL: Among the best on the market'
-    elif core_rating >= 0.6:
-        star_rating = 4
-        description = 'STRONG: Great ownership savings and responsible emissions'
-    elif core_rating >= 0.4:
-        star_rating = 3
-        description = 'MODERATE: Solid overall with fair balance'
-    elif core_rating >= 0.2:
-        star_rating = 2
-        description = 'LOW: Higher ownership costs or emissions'
-    else:
-        star_rating = 1
-        description = 'LIMITED: Better options exist'
-
-    return {
-        'cost_of_ownership_5yr': round(coo_5yr, 2),
-        'emissions_5yr_kg': round(emissions_5yr, 2),
-        'coo_score': round(p_score, 4),
-        'emissions_score': round(e_score, 4),
-        'core_rating': round(core_rating, 4),
-        'star_rating': star_rating,
-        'rating_description': description
-    }
+    return score_core_rating(annual_coo, emissions_annual_kg, with_finance)
@@ -0,0 +1,136 @@
+# calc_app/services/parallel_ratings.py
+
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+
+import django
+from django.apps import apps
+from django.db import connections
+from api.models import CarMakes, CarPricing, RatingRun
+from api.vehicle_cards import build_vehicle_cards
+from calc_app.services.rating_results import start_rating_run, complete_rating_run, fail_rating_run
+
+# Shards per worker, so a slow shard does not leave the other workers idle
+SHARDS_PER_WORKER = 4
+
+
+def _init_worker():
+    """Give every worker process its own database connection"""
+    if not apps.ready:
+        # spawn/forkserver start methods begin with a fresh interpreter
+        django.setup()
+    # Forked workers inherit the parent's open sockets, which must never be shared
+    connections.close_all()
+
+
+def _process_car_makes(car_make_ids, run_id):
+    from calc_app.services.car_calculations import CarCalculationsProcessor
+
+    run = RatingRun.objects.get(pk=run_id)
+    processor = CarCalculationsProcessor()
+    result = {'processed_makes': [], 'failed_makes': [], 'rows': 0, 'query_count': 0}
+    for car_make in CarMakes.objects.filter(car_make_id__in=car_make_ids).order_by('name'):
+        try:
+            make_result = processor.process_single_car_make_data(car_make, run)
+            result['processed_makes'].append(car_make.name)
+            result['rows'] += make_result['results_written']
+            result['query_count'] += make_result['query_count']
+        except Exception as e:
+            print(f"Error processing {car_make.name}: {e}")
+            result['failed_makes'].append(car_make.name)
+    return result
+
+
+def _build_matrix_shard(variant_ids):
+    from calc_app.services.rating_matrix import build_core_rating_matrix
+
+    # Cards are rebuilt once every shard is done, so savings use the final state averages
+    result = build_core_rating_matrix(variant_ids=variant_ids, build_cards=False)
+    return {'rows': result['rows_written'], 'prices_skipped': result['prices_skipped']}
+
+
+def shard(items, shard_count):
+    """Split a sorted list into contiguous, roughly equal ranges"""
+    shard_count = max(1, min(shard_count, len(items)))
+    size, remainder = divmod(len(items), shard_count)
+    shards = []
+    start = 0
+    for i in range(shard_count):
+        end = start + size + (1 if i < remainder else 0)
+        shards.append(items[start:end])
+        start = end
+    return [s for s in shards if s]
+
+
+def run_sharded(task, shards, workers, on_progress=None):
+    """Run task(shard) across a process pool, reporting progress as shards complete"""
+    # Close the parent's connections before forking so no socket is inherited mid-use
+    connections.close_all()
+
+    started = time.monotonic()
+    results = []
+    rows = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+        futures = [executor.submit(task, s) for s in shards]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            rows += result['rows']
+            if on_progress:
+                elapsed = time.monotonic() - started
+                on_progress({
+                    'shards_done': len(results),
+                    'shards_total': len(shards),
+                    'rows': rows,
+                    'elapsed': elapsed,
+                    'rows_per_second': rows / elapsed if elapsed > 0 else 0,
+                })
+    return results
+
+
+def process_car_makes_in_parallel(workers, on_progress=None):
+    """Shard active car makes across worker processes, all writing into one rating run"""
+    car_make_ids = list(CarMakes.objects.filter(is_active=True).order_by('car_make_id').values_list('car_make_id', flat=True))
+
+    run = start_rating_run()
+    try:
+        task = partial(_process_car_makes, run_id=run.id)
+        results = run_sharded(task, shard(car_make_ids, workers * SHARDS_PER_WORKER), workers, on_progress)
+    except Exception:
+        fail_rating_run(run)
+        raise
+
+    # A partial run must never replace the live one
+    failed_makes = sorted(name for r in results for name in r['failed_makes'])
+    if failed_makes:
+        fail_rating_run(run)
+    else:
+        complete_rating_run(run)
+
+    return {
+        'run_id': run.id,
+        'run_status': run.status,
+        'rows_written': run.rows_written,
+        'processed_makes': sorted(name for r in results for name in r['processed_makes']),
+        'failed_makes': failed_makes,
+        'prices_processed': sum(r['rows'] for r in results),
+        'query_count': sum(r['query_count'] for r in results),
+    }
+
+
+def build_core_rating_matrix_in_parallel(workers, on_progress=None):
+    """Shard the CORE rating matrix build by variant-id range across worker processes"""
+    variant_ids = list(
+        CarPricing.objects
+        .order_by('car_variant_id')
+        .values_list('car_variant_id', flat=True)
+        .distinct()
+    )
+    results = run_sharded(_build_matrix_shard, shard(variant_ids, workers * SHARDS_PER_WORKER), workers, on_progress)
+    build_vehicle_cards()
+
+    return {
+        'rows_written': sum(r['rows'] for r in results),
+        'prices_skipped': sum(r['prices_skipped'] for r in results),
+    }
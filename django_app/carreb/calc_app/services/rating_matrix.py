@@ -0,0 +1,114 @@
+# calc_app/services/rating_matrix.py
+
+from django.utils import timezone
+from api.models import CoreRatingMatrix
+from api.services import bulk_upsert
+from api.vehicle_cards import build_vehicle_cards, get_state_average_coo
+from calc_app.services.car_calculations import DEFAULT_FINANCE_PARAMS, STAR_RATING_BANDS
+from calc_app.services.batch_engine import VehicleCostBatch
+
+# Usage profiles the matrix is precomputed for. Requests are snapped to the nearest band.
+KM_BANDS = [5000, 10000, 15000, 17000, 20000, 25000, 30000, 40000]
+OFF_GRID_BANDS = [0, 20, 40, 60, 80, 100]
+FINANCE_FLAGS = [False, True]
+
+MATRIX_BATCH_SIZE = 1000
+
+MATRIX_RESULT_FIELDS = [
+    'cost_of_ownership_5yr',
+    'emissions_5yr_kg',
+    'coo_score',
+    'emissions_score',
+    'core_rating',
+    'star_rating',
+    'rating_description',
+]
+
+
+def nearest_band(value, bands):
+    """Snap a usage value to the closest precomputed band"""
+    return min(bands, key=lambda band: abs(band - float(value)))
+
+
+def get_core_rating_from_matrix(variant_id, state, kilometers_per_annum, off_grid_energy_percent, with_finance):
+    """Return the precomputed CORE rating for a usage profile, or None if it has not been built"""
+    if not variant_id or not state:
+        return None
+
+    row = (
+        CoreRatingMatrix.objects
+        .filter(
+            variant_id=variant_id,
+            state=state.strip().upper(),
+            km_band=nearest_band(kilometers_per_annum or 17000, KM_BANDS),
+            off_grid_band=nearest_band(off_grid_energy_percent if off_grid_energy_percent is not None else 20.0, OFF_GRID_BANDS),
+            with_finance=bool(with_finance),
+        )
+        .values(*MATRIX_RESULT_FIELDS)
+        .first()
+    )
+    if row is None:
+        return None
+
+    # Match the response shape of calculate_core_rating()
+    for field in ['cost_of_ownership_5yr', 'emissions_5yr_kg', 'coo_score', 'emissions_score', 'core_rating']:
+        row[field] = float(row[field])
+    return row
+
+
+def _upsert_matrix_rows(rows):
+    return bulk_upsert(
+        CoreRatingMatrix,
+        rows,
+        unique_fields=['variant_id', 'state', 'km_band', 'off_grid_band', 'with_finance'],
+        update_fields=['drive_away_price', *MATRIX_RESULT_FIELDS, 'updated_at'],
+        batch_size=MATRIX_BATCH_SIZE,
+    )
+
+
+def build_core_rating_matrix(variant_ids=None, build_cards=True):
+    """(Re)compute the CORE rating matrix for every variant x state x usage profile"""
+    batch = VehicleCostBatch.load(variant_ids)
+    now = timezone.now()
+
+    # Rows are written every MATRIX_BATCH_SIZE so memory stays flat however large the catalogue is
+    written = 0
+    rows = []
+    for km_band in KM_BANDS:
+        for off_grid_band in OFF_GRID_BANDS:
+            for with_finance in FINANCE_FLAGS:
+                # One vectorised pass over every priced variant for this usage profile
+                ratings = batch.core_ratings(km_band, off_grid_band, with_finance, DEFAULT_FINANCE_PARAMS)
+
+                for i in range(len(batch)):
+                    rows.append(CoreRatingMatrix(
+                        variant_id=int(batch.variant_id[i]),
+                        state=batch.state[i],
+                        km_band=km_band,
+                        off_grid_band=off_grid_band,
+                        with_finance=with_finance,
+                        drive_away_price=round(float(batch.drive_away_price[i]), 2),
+                        cost_of_ownership_5yr=round(float(ratings['cost_of_ownership_5yr'][i]), 2),
+                        emissions_5yr_kg=round(float(ratings['emissions_5yr_kg'][i]), 2),
+                        coo_score=round(float(ratings['coo_score'][i]), 4),
+                        emissions_score=round(float(ratings['emissions_score'][i]), 4),
+                        core_rating=round(float(ratings['core_rating'][i]), 4),
+                        star_rating=int(ratings['star_rating'][i]),
+                        rating_description=STAR_RATING_BANDS[ratings['rating_band'][i]][2],
+                        created_at=now,
+                        updated_at=now,
+                    ))
+                    if len(rows) >= MATRIX_BATCH_SIZE:
+                        written += _upsert_matrix_rows(rows)
+                        rows = []
+
+    written += _upsert_matrix_rows(rows)
+
+    if build_cards:
+        # Result cards carry the default-profile ratings; the matrix just changed, so do the state averages
+        build_vehicle_cards(variant_ids, state_average_coo=get_state_average_coo(refresh=True))
+
+    return {
+        'rows_written': written,
+        'prices_skipped': batch.skipped,
+    }
@@ -0,0 +1,87 @@
+# calc_app/services/rating_results.py
+
+from django.utils import timezone
+from api.models import RatingRun, CarRatingResult
+from api.services import bulk_upsert
+
+RESULT_BATCH_SIZE = 1000
+
+# Completed runs kept for rollback; older runs are pruned after a new one completes
+KEEP_COMPLETED_RUNS = 2
+
+
+def start_rating_run():
+    """Open a new run; its results stay invisible until complete_rating_run()"""
+    return RatingRun.objects.create(status=RatingRun.STATUS_RUNNING)
+
+
+def complete_rating_run(run):
+    """Publish a run. Readers switch to it with this single-row update."""
+    run.rows_written = CarRatingResult.objects.filter(run=run).count()
+    run.status = RatingRun.STATUS_COMPLETE
+    run.completed_at = timezone.now()
+    run.save(update_fields=['rows_written', 'status', 'completed_at'])
+    prune_rating_runs()
+    return run
+
+
+def fail_rating_run(run):
+    run.status = RatingRun.STATUS_FAILED
+    run.completed_at = timezone.now()
+    run.save(update_fields=['status', 'completed_at'])
+
+
+def get_current_rating_run():
+    """Latest completed run, or None"""
+    return (
+        RatingRun.objects
+        .filter(status=RatingRun.STATUS_COMPLETE)
+        .order_by('-completed_at', '-id')
+        .first()
+    )
+
+
+def get_current_rating_results():
+    """Results of the latest completed run"""
+    run = get_current_rating_run()
+    if run is None:
+        return CarRatingResult.objects.none()
+    return CarRatingResult.objects.filter(run=run)
+
+
+def save_rating_results(results):
+    """Upsert CarRatingResult rows in chunks, keyed by (run, car_variant, state)"""
+    now = timezone.now()
+    for result in results:
+        result.updated_at = now
+
+    return bulk_upsert(
+        CarRatingResult,
+        results,
+        unique_fields=['run', 'car_variant', 'state'],
+        update_fields=['core_rating', 'cost_of_ownership_5yr', 'emissions_5yr_kg', 'updated_at'],
+        batch_size=RESULT_BATCH_SIZE,
+    )
+
+
+def prune_rating_runs(keep=KEEP_COMPLETED_RUNS):
+    """Delete superseded runs in small batches so the live run is never locked"""
+    keep_ids = list(
+        RatingRun.objects
+        .filter(status=RatingRun.STATUS_COMPLETE)
+        .order_by('-completed_at', '-id')
+        .values_list('id', flat=True)[:keep]
+    )
+    if not keep_ids:
+        return 0
+
+    stale_runs = RatingRun.objects.exclude(id__in=keep_ids).exclude(status=RatingRun.STATUS_RUNNING)
+    deleted = 0
+    for run_id in stale_runs.values_list('id', flat=True):
+        while True:
+            ids = list(CarRatingResult.objects.filter(run_id=run_id).values_list('id', flat=True)[:RESULT_BATCH_SIZE])
+            if not ids:
+                break
+            deleted += CarRatingResult.objects.filter(id__in=ids).delete()[0]
+        RatingRun.objects.filter(id=run_id).delete()
+    return deleted
@@ -0,0 +1,102 @@
+# calc_app/services/recommendations.py
+
+import heapq
+
+from api.models import CoreRatingMatrix
+from api.vehicle_cards import coo_savings, get_state_average_coo
+from calc_app.services.car_calculations import DEFAULT_KILOMETERS_PER_ANNUM, DEFAULT_OFF_GRID_ENERGY_PERCENT
+
+# Weight of each matrix score per search preference; selected preferences are summed
+RECOMMENDATION_WEIGHTS = {
+    'save_money': {'coo_score': 1.0, 'emissions_score': 0.0, 'core_rating': 0.0},
+    'greener_car': {'coo_score': 0.0, 'emissions_score': 1.0, 'core_rating': 0.0},
+    'good_all_rounder': {'coo_score': 0.0, 'emissions_score': 0.0, 'core_rating': 1.0},
+}
+
+# Candidates read per ranking signal. Each pool is read in index order and stops at the limit,
+# so the cost does not grow with the size of the catalogue.
+CANDIDATE_POOL_SIZE = 500
+
+
+def get_recommendation_weights(save_money=False, greener_car=False, good_all_rounder=False):
+    """Summed score weights for the selected preferences (all-rounder when none is selected)"""
+    selected = [
+        name for name, flag in [
+            ('save_money', save_money), ('greener_car', greener_car), ('good_all_rounder', good_all_rounder)
+        ] if flag
+    ] or ['good_all_rounder']
+
+    weights = {'coo_score': 0.0, 'emissions_score': 0.0, 'core_rating': 0.0}
+    for name in selected:
+        for score, weight in RECOMMENDATION_WEIGHTS[name].items():
+            weights[score] += weight
+    return weights
+
+
+def _default_profile_rows(state):
+    return CoreRatingMatrix.objects.filter(
+        state=(state or '').strip().upper(),
+        km_band=DEFAULT_KILOMETERS_PER_ANNUM,
+        off_grid_band=int(DEFAULT_OFF_GRID_ENERGY_PERCENT),
+        with_finance=False,
+    )
+
+
+def _candidate_pool(state, budget, weights, exclude_variant_ids=None):
+    """Matrix rows within budget: one bounded pool per weighted signal, each served by its (profile, score) index"""
+    rows = _default_profile_rows(state)
+    if budget:
+        rows = rows.filter(drive_away_price__lte=budget)
+    if exclude_variant_ids:
+        rows = rows.exclude(variant_id__in=exclude_variant_ids)
+
+    candidates = {}
+    for score in [score for score, weight in weights.items() if weight > 0]:
+        for row in rows.order_by(f'-{score}', 'variant_id').values(
+            'variant_id', 'drive_away_price', 'cost_of_ownership_5yr', 'emissions_5yr_kg',
+            'coo_score', 'emissions_score', 'core_rating', 'star_rating'
+        )[:CANDIDATE_POOL_SIZE]:
+            candidates[row['variant_id']] = row
+    return candidates
+
+
+def recommend_vehicles(state, budget=None, save_money=False, greener_car=False, good_all_rounder=False,
+                       limit=1, exclude_variant_ids=None):
+    """Top-k variants for a search profile, ranked against the precomputed CORE rating matrix.
+
+    Returns dicts with variant_id, score, drive_away_price, cost_of_ownership_5yr, emissions_5yr_kg,
+    core_rating, star_rating and savings, best first. Savings are measured against the state average,
+    the same figure the vehicle card shows.
+    """
+    weights = get_recommendation_weights(save_money, greener_car, good_all_rounder)
+    candidates = _candidate_pool(state, budget, weights, exclude_variant_ids)
+    if not candidates:
+        return []
+
+    state_average_coo = get_state_average_coo()
+    state = (state or '').strip().upper()
+
+    def savings(row):
+        coo = float(row['cost_of_ownership_5yr'])
+        return coo_savings(coo, state_average_coo.get(state, coo))
+
+    def weighted_score(row):
+        return sum(float(row[score]) * weight for score, weight in weights.items())
+
+    # Bounded heap: O(n log k) over the pool instead of sorting it
+    best = heapq.nlargest(limit, candidates.values(), key=lambda row: (weighted_score(row), -row['variant_id']))
+
+    return [
+        {
+            'variant_id': row['variant_id'],
+            'score': round(weighted_score(row), 4),
+            'drive_away_price': float(row['drive_away_price']),
+            'cost_of_ownership_5yr': float(row['cost_of_ownership_5yr']),
+            'emissions_5yr_kg': float(row['emissions_5yr_kg']),
+            'core_rating': float(row['core_rating']),
+            'star_rating': row['star_rating'],
+            'savings': savings(row),
+        }
+        for row in best
+    ]
+
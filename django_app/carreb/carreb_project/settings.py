@@ -53,7 +53,8 @@ INSTALLED_APPS = [
     'drf_yasg',
     'corsheaders',
     'api',
-    #'scraper_app',
+    'calc_app',
+    'scraper_app',
     'payments',
 ]
 
@@ -117,8 +118,8 @@ DATABASES = {
         'PORT': os.environ.get("SCPR_DB_PORT"),
     }
 }
-#DATABASE_ROUTERS = ['scraper_app.routers.ExternalDBRouter']
-DATABASE_ROUTERS = []
+# GVGVehicleData (unmanaged, no migrations) is read from scraper_db; everything else stays on default
+DATABASE_ROUTERS = ['scraper_app.routers.ExternalDBRouter']
 
 
 MIGRATION_MODULES = {
@@ -178,4 +179,57 @@ CORS_ALLOWED_ORIGINS = os.environ.get('CORS_ORIGIN_WHITELIST').split(' ') #['htt
 
 APPEND_SLASH=False
 COOKIE_SECURE=os.environ.get('COOKIE_SECURE', True)
-SCRAPER_DL_PATH=os.environ.get('SCRAPER_DL_MEDIA')
\ No newline at end of file
+SCRAPER_DL_PATH=os.environ.get('SCRAPER_DL_MEDIA')
+
+# Seconds before the in-process FuelRetailPrice / ElectricityGridEmissions / CarBodyCost cache is reloaded
+REFERENCE_DATA_CACHE_TTL = int(os.environ.get('REFERENCE_DATA_CACHE_TTL', 300))
+
+# Buffered CarSearchLog writes (api.search_log_writer): batch size, flush interval in seconds,
+# the JSONL file rows are spilled to while the database is unavailable, and the most rows held
+# in memory before new ones are spilled straight to that file
+SEARCH_LOG_BATCH_SIZE = int(os.environ.get('SEARCH_LOG_BATCH_SIZE', 100))
+SEARCH_LOG_FLUSH_INTERVAL = float(os.environ.get('SEARCH_LOG_FLUSH_INTERVAL', 1.0))
+SEARCH_LOG_SPILL_PATH = os.environ.get('SEARCH_LOG_SPILL_PATH', os.path.join(BASE_DIR, 'search_log_spill.jsonl'))
+SEARCH_LOG_MAX_PENDING = int(os.environ.get('SEARCH_LOG_MAX_PENDING', 10000))
+
+# Seconds a search session's match result is served from the cache (GetCarMatchBySIDView)
+SEARCH_SESSION_CACHE_TTL = int(os.environ.get('SEARCH_SESSION_CACHE_TTL', 300))
+
+# Seconds the per-state average COO behind card savings is reused by single-vehicle card rebuilds
+VEHICLE_CARD_STATE_AVERAGE_TTL = int(os.environ.get('VEHICLE_CARD_STATE_AVERAGE_TTL', 3600))
+
+# Background vehicle image pass (scraper_app.image_worker): concurrent downloads, per-host request
+# rate and burst, image search rate, and the checkpoint file used to resume an interrupted pass
+SCRAPER_IMAGE_WORKERS = int(os.environ.get('SCRAPER_IMAGE_WORKERS', 4))
+SCRAPER_HOST_RATE = float(os.environ.get('SCRAPER_HOST_RATE', 1.0))
+SCRAPER_HOST_BURST = int(os.environ.get('SCRAPER_HOST_BURST', 2))
+SCRAPER_SEARCH_RATE = float(os.environ.get('SCRAPER_SEARCH_RATE', 0.2))
+SCRAPER_IMAGE_CHECKPOINT_PATH = os.environ.get('SCRAPER_IMAGE_CHECKPOINT_PATH', os.path.join(BASE_DIR, 'image_pass_checkpoint.json'))
+
+# Widths and formats of the resized vehicle image copies (scraper_app.image_derivatives)
+IMAGE_DERIVATIVE_WIDTHS = [int(w) for w in os.environ.get('IMAGE_DERIVATIVE_WIDTHS', '240,480,720').split(',')]
+IMAGE_DERIVATIVE_FORMATS = os.environ.get('IMAGE_DERIVATIVE_FORMATS', 'webp,avif').split(',')
+
+# Scraped image candidates narrower than this (px) are rejected from their header, before the full download
+SCRAPER_MIN_IMAGE_WIDTH = int(os.environ.get('SCRAPER_MIN_IMAGE_WIDTH', 480))
+
+# Outbound HTTP client (api.http_client): pooled connections overall and per host,
+# hard timeout per attempt in seconds, retries, and the base of the jittered exponential backoff
+SCRAPER_HTTP_POOL_SIZE = int(os.environ.get('SCRAPER_HTTP_POOL_SIZE', 32))
+SCRAPER_HTTP_PER_HOST = int(os.environ.get('SCRAPER_HTTP_PER_HOST', 4))
+SCRAPER_HTTP_TIMEOUT = float(os.environ.get('SCRAPER_HTTP_TIMEOUT', 15))
+SCRAPER_HTTP_RETRIES = int(os.environ.get('SCRAPER_HTTP_RETRIES', 3))
+SCRAPER_HTTP_BACKOFF = float(os.environ.get('SCRAPER_HTTP_BACKOFF', 0.5))
+
+# On-disk image search cache (scraper_app.search_cache): file path (defaults to beside SCRAPER_DL_PATH),
+# and seconds before results, or a query that found nothing, are searched again
+SCRAPER_SEARCH_CACHE_PATH = os.environ.get('SCRAPER_SEARCH_CACHE_PATH')
+SCRAPER_SEARCH_CACHE_TTL = int(os.environ.get('SCRAPER_SEARCH_CACHE_TTL', 30 * 86400))
+SCRAPER_SEARCH_CACHE_NEGATIVE_TTL = int(os.environ.get('SCRAPER_SEARCH_CACHE_NEGATIVE_TTL', 86400))
+
+# Image deduplication (scraper_app.image_dedup): max dHash bit distance treated as the same picture,
+# whether the image pass links a sibling year's image instead of downloading a new one (off by default,
+# a facelift can change the car's look), and the most model years a reused sibling may be away
+IMAGE_DEDUP_MAX_DISTANCE = int(os.environ.get('IMAGE_DEDUP_MAX_DISTANCE', 6))
+SCRAPER_REUSE_SIBLING_IMAGES = os.environ.get('SCRAPER_REUSE_SIBLING_IMAGES', 'False') == 'True'
+SCRAPER_SIBLING_MAX_YEAR_GAP = int(os.environ.get('SCRAPER_SIBLING_MAX_YEAR_GAP', 1))
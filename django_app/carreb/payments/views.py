@@ -177,10 +177,10 @@ class PaymentSuccessCallbackView(APIView):
         """Migrate search result to user's garage"""
         try:
             # Import here to avoid circular imports
-            from api.models import CarSearchLog
+            from api.search_log_writer import get_search_log
             
-            # Find the search log
-            search_log = CarSearchLog.objects.filter(uid=search_uid).first()
+            # Find the search log (flushing it first if this worker still buffers it)
+            search_log = get_search_log(search_uid)
             if not search_log:
                 return {'status': 'search_not_found'}
             
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import re
+import time
+
+from django.db import transaction
+from api.models import Vehicles
+from api.services import rebuild_vehicle_facets
+from api.vehicle_cards import build_vehicle_cards
+from scraper_app.models import GVGVehicleData
+from .services import parse_vehicle_engine_spec, parse_vehicle_transmission_spec, parse_vehicle_tailpipe, normalize_liter_string, generate_vehicle_id
+
+# Source rows read, parsed and inserted per round trip
+GVG_IMPORT_CHUNK_SIZE = 1000
+
+# Raw GVG columns covered by the row fingerprint
+GVG_SOURCE_FIELDS = [f.attname for f in GVGVehicleData._meta.concrete_fields if f.attname != 'id']
+
+# Vehicles columns rewritten when a source row changes; vehicle_id is kept stable
+GVG_UPDATE_FIELDS = [f.attname for f in Vehicles._meta.concrete_fields if f.attname not in ('id', 'vehicle_id')]
+
+# Columns used to match vehicles imported before source_id existed to their GVG rows
+GVG_LEGACY_MATCH_FIELDS = ['year', 'make', 'model', 'body', 'engine', 'transmission', 'drivetrain', 'vehicle_class']
+
+
+def _not_na(value, default=''):
+    return value if (value != 'N/A') else default
+
+
+def gvg_row_hash(vehicle):
+    """Fingerprint of a GVG row's raw values"""
+    values = [getattr(vehicle, field) for field in GVG_SOURCE_FIELDS]
+    return hashlib.sha256(json.dumps(values).encode()).hexdigest()
+
+
+def parse_gvg_vehicle(vehicle):
+    """Build an unsaved Vehicles row from a GVGVehicleData row"""
+    match = re.search(r'(\d+)\s*door', vehicle.body, re.IGNORECASE)
+    doors = int(match.group(1)) if match else None
+    match = re.search(r'(\d+)\s*seat', vehicle.body, re.IGNORECASE)
+    seats = int(match.group(1)) if match else None
+    body = re.sub(r'\d+\s*door\s*\d+\s*seat\s*', '', vehicle.body, flags=re.IGNORECASE).strip()
+    # Make names are literal text ("C+", "Lynk & Co (Geely)"), never a pattern
+    model = re.sub(re.escape(vehicle.make_name), "", vehicle.model, flags=re.IGNORECASE).strip()
+
+    engine = parse_vehicle_engine_spec(vehicle.engine)
+    transmission = parse_vehicle_transmission_spec(vehicle.transmission)
+    tailpipe_comb = parse_vehicle_tailpipe(vehicle.tailpipe_comb)
+    tailpipe_urban = parse_vehicle_tailpipe(vehicle.tailpipe_urban)
+    tailpipe_extra = parse_vehicle_tailpipe(vehicle.tailpipe_extra)
+
+    return Vehicles(
+        year = vehicle.year,
+        make = vehicle.make,
+        make_name = vehicle.make_name,
+        model = model,
+        vehicle_class = vehicle.vehicle_class,
+        body = body,
+        doors = doors,
+        seats = seats,
+        engine = vehicle.engine,
+        engine_capacity = normalize_liter_string(engine['engine_capacity']),
+        engine_cylinder = engine['engine_cylinder'],
+        induction = engine['induction'],
+        engine_type = engine['engine_type'],
+        fuel_grade = engine['fuel_grade'],
+        transmission = vehicle.transmission,
+        transmission_speed = transmission['speed'],
+        transmission_type = transmission['type'],
+        drivetrain = vehicle.drivetrain,
+        tailpipe_comb = _not_na(vehicle.tailpipe_comb),
+        tailpipe_comb_value = _not_na(tailpipe_comb['value']),
+        tailpipe_comb_note = _not_na(tailpipe_comb['note']),
+        tailpipe_urban = _not_na(vehicle.tailpipe_urban),
+        tailpipe_urban_value = _not_na(tailpipe_urban['value']),
+        tailpipe_urban_note = _not_na(tailpipe_urban['note']),
+        tailpipe_extra = _not_na(vehicle.tailpipe_extra),
+        tailpipe_extra_value = _not_na(tailpipe_extra['value']),
+        tailpipe_extra_note = _not_na(tailpipe_extra['note']),
+        annual_cost = _not_na(vehicle.annual_cost, 0),
+        fuel_consumption_comb = _not_na(vehicle.fuel_consumption_comb, 0),
+        fuel_consumption_urban = _not_na(vehicle.fuel_consumption_urban, 0),
+        fuel_consumption_extra = _not_na(vehicle.fuel_consumption_extra, 0),
+        energy_consumption = _not_na(vehicle.energy_consumption, 0),
+        electric_range = _not_na(vehicle.electric_range, 0),
+        air_pollution_standard = vehicle.air_pollution_standard,
+        annual_tailpipe_co2 = vehicle.annual_tailpipe_co2,
+        fuel_lifecycle_co2 = vehicle.fuel_lifecycle_co2,
+        noise_data = vehicle.noise_data,
+        source_id = vehicle.id,
+        source_hash = gvg_row_hash(vehicle)
+    )
+
+
+def _insert_vehicles(vehicles):
+    """Assign ids and vehicle_ids up front, then insert the chunk in one statement"""
+    with transaction.atomic():
+        # Lock the current highest row so concurrent imports cannot allocate the same ids
+        last_id = Vehicles.objects.select_for_update().order_by('-id').values_list('id', flat=True).first() or 0
+        for offset, vehicle in enumerate(vehicles, start=1):
+            vehicle.id = last_id + offset
+            vehicle.vehicle_id = generate_vehicle_id(vehicle.year, vehicle.id)
+        Vehicles.objects.bulk_create(vehicles, batch_size=GVG_IMPORT_CHUNK_SIZE)
+    return [vehicle.id for vehicle in vehicles]
+
+
+def _legacy_vehicles():
+    """Vehicles imported before source_id existed, keyed by GVG_LEGACY_MATCH_FIELDS"""
+    legacy = {}
+    rows = Vehicles.objects.filter(source_id__isnull=True).order_by('id').values_list('id', 'vehicle_id', *GVG_LEGACY_MATCH_FIELDS)
+    for row in rows.iterator(chunk_size=GVG_IMPORT_CHUNK_SIZE):
+        legacy.setdefault(row[2:], []).append(row[:2])
+    return legacy
+
+
+def import_gvg_vehicles(chunk_size=GVG_IMPORT_CHUNK_SIZE):
+    """
+    Incrementally sync GVGVehicleData into Vehicles: new rows are inserted, rows whose fingerprint
+    changed are updated in place, and unchanged rows are skipped. Returns a summary, not the rows.
+    """
+    started = time.monotonic()
+    inserted_ids = []
+    updated_ids = []
+    unchanged = 0
+    last_source_id = 0
+    legacy = _legacy_vehicles()
+
+    while True:
+        # Keyset pagination: memory stays bounded and the read cursor is never open during writes
+        source_rows = list(GVGVehicleData.objects.filter(id__gt=last_source_id).order_by('id')[:chunk_size])
+        if not source_rows:
+            break
+        last_source_id = source_rows[-1].id
+
+        known = {}
+        existing = Vehicles.objects.filter(source_id__in=[source.id for source in source_rows])
+        for pk, source_id, source_hash in existing.values_list('id', 'source_id', 'source_hash'):
+            known[source_id] = (pk, source_hash)
+
+        inserts = []
+        updates = []
+        for source in source_rows:
+            if source.id in known:
+                pk, source_hash = known[source.id]
+                if source_hash == gvg_row_hash(source):
+                    unchanged += 1
+                    continue
+                vehicle = parse_gvg_vehicle(source)
+                vehicle.id = pk
+            else:
+                vehicle = parse_gvg_vehicle(source)
+                matches = legacy.get(tuple(getattr(vehicle, field) for field in GVG_LEGACY_MATCH_FIELDS))
+                if matches:
+                    # Adopt the row from an earlier full import, keeping its vehicle_id
+                    vehicle.id, vehicle.vehicle_id = matches.pop(0)
+
+            (updates if vehicle.id else inserts).append(vehicle)
+
+        if updates:
+            with transaction.atomic():
+                Vehicles.objects.bulk_update(updates, GVG_UPDATE_FIELDS, batch_size=chunk_size)
+            updated_ids += [vehicle.id for vehicle in updates]
+        if inserts:
+            inserted_ids += _insert_vehicles(inserts)
+
+        processed = len(inserted_ids) + len(updated_ids) + unchanged
+        print(
+            f"{processed} GVG rows checked: {len(inserted_ids)} inserted, {len(updated_ids)} updated, {unchanged} unchanged "
+            f"({processed / (time.monotonic() - started):.0f} rows/s)"
+        )
+
+    changed_ids = inserted_ids + updated_ids
+    if changed_ids:
+        # bulk_create / bulk_update skip the save signals, so refresh the derived tables explicitly
+        rebuild_vehicle_facets()
+        build_vehicle_cards(changed_ids)
+
+    elapsed = time.monotonic() - started
+    processed = len(changed_ids) + unchanged
+    return {
+        "records": processed,
+        "inserted": len(inserted_ids),
+        "updated": len(updated_ids),
+        "unchanged": unchanged,
+        "seconds": round(elapsed, 2),
+        "rows_per_second": round(processed / elapsed) if elapsed > 0 else 0,
+    }
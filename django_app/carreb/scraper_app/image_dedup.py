@@ -0,0 +1,189 @@
+import os
+import time
+
+from PIL import Image
+from django.conf import settings
+from api.models import Vehicles, VehicleImages
+from api.services import normalize_facet_key
+from api.vehicle_cards import build_vehicle_cards_for_images
+from .image_derivatives import derivative_filename
+
+# dHash grid: 9x8 greyscale pixels give 64 left/right gradient bits
+HASH_SIZE = 8
+
+# Bands the 64-bit hash is split into for candidate lookup. With at most BANDS - 1 differing bits,
+# at least one band of a true near-duplicate matches exactly (pigeonhole).
+HASH_BANDS = 8
+
+IMAGE_DEDUP_BATCH_SIZE = 500
+
+
+def dhash(path):
+    """64-bit difference hash of an image file"""
+    with Image.open(path) as image:
+        # JPEG draft mode decodes straight at a reduced scale, which is most of the cost saved
+        image.draft('L', (HASH_SIZE * 8, HASH_SIZE * 8))
+        pixels = list(image.convert('L').resize((HASH_SIZE + 1, HASH_SIZE), Image.LANCZOS).getdata())
+
+    value = 0
+    for row in range(HASH_SIZE):
+        for col in range(HASH_SIZE):
+            left = pixels[row * (HASH_SIZE + 1) + col]
+            right = pixels[row * (HASH_SIZE + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+class PHashIndex:
+    """In-memory near-duplicate index over 64-bit perceptual hashes"""
+
+    def __init__(self, max_distance=None):
+        self.max_distance = getattr(settings, 'IMAGE_DEDUP_MAX_DISTANCE', 6) if max_distance is None else max_distance
+        # Banded lookup only finds every match while fewer bits differ than there are bands
+        if not 0 <= self.max_distance < HASH_BANDS:
+            raise ValueError(f"IMAGE_DEDUP_MAX_DISTANCE must be between 0 and {HASH_BANDS - 1}, got {self.max_distance}.")
+        self._bands = [{} for _ in range(HASH_BANDS)]
+        self._bits = 64 // HASH_BANDS
+
+    def _band_keys(self, value):
+        mask = (1 << self._bits) - 1
+        return [(value >> (band * self._bits)) & mask for band in range(HASH_BANDS)]
+
+    def add(self, value, item):
+        for band, key in zip(self._bands, self._band_keys(value)):
+            band.setdefault(key, []).append((value, item))
+
+    def find(self, value):
+        """Closest indexed item within max_distance bits, or None"""
+        best = None
+        for band, key in zip(self._bands, self._band_keys(value)):
+            for candidate, item in band.get(key, ()):
+                distance = bin(candidate ^ value).count('1')
+                if distance <= self.max_distance and (best is None or distance < best[0]):
+                    best = (distance, item)
+        return best[1] if best else None
+
+
+def _image_files(image):
+    files = [image.image_name]
+    for width in image.image_widths or []:
+        for image_format in image.image_formats or []:
+            files.append(derivative_filename(image.image_name, width, image_format))
+    return files
+
+
+def _model_keys(images):
+    """vehicle_id -> (make, model) key of the vehicle each image belongs to"""
+    vehicles = Vehicles.objects.filter(vehicle_id__in={image.vehicle_id for image in images})
+    return {
+        vehicle_id: (normalize_facet_key(make_name), normalize_facet_key(model))
+        for vehicle_id, make_name, model in vehicles.values_list('vehicle_id', 'make_name', 'model')
+    }
+
+
+def dedupe_vehicle_images(dry_run=False, on_progress=None):
+    """
+    Hash every downloaded image and point near-duplicates of the same make and model at the first
+    (canonical) copy, deleting the duplicate files and their derivatives once nothing references them.
+    With dry_run nothing is written or deleted; the proposed links and deletions are returned instead.
+    """
+    directory = settings.SCRAPER_DL_PATH
+    started = time.monotonic()
+    images = list(
+        VehicleImages.objects
+        .exclude(image_name__isnull=True)
+        .exclude(image_name__in=['', '-'])
+        .order_by('id')
+    )
+    model_keys = _model_keys(images)
+
+    # Only the same make and model can share a picture, so each gets its own index
+    indexes = {}
+    canonical_by_name = {}
+    changed = {}
+    links = []
+    duplicate_files = {}
+    hashed = 0
+    missing = 0
+    for position, image in enumerate(images, start=1):
+        model_key = model_keys.get(image.vehicle_id)
+        if model_key is None:
+            continue
+
+        canonical = canonical_by_name.get((model_key, image.image_name))
+        if canonical is None:
+            if not image.phash:
+                try:
+                    image.phash = f"{dhash(os.path.join(directory, image.image_name)):016x}"
+                except OSError as e:
+                    print(f"Cannot hash {image.image_name}: {e}")
+                    missing += 1
+                    continue
+                hashed += 1
+                changed[image.id] = image
+
+            if model_key not in indexes:
+                indexes[model_key] = PHashIndex()
+            index = indexes[model_key]
+            canonical = index.find(int(image.phash, 16))
+            if canonical is None:
+                index.add(int(image.phash, 16), image)
+                canonical = image
+            else:
+                duplicate_files[image.image_name] = _image_files(image)
+            canonical_by_name[(model_key, image.image_name)] = canonical
+
+        if image.image_name != canonical.image_name:
+            links.append({'vehicle_id': image.vehicle_id, 'from': image.image_name, 'to': canonical.image_name})
+            image.image_name = canonical.image_name
+            image.image_widths = canonical.image_widths
+            image.image_formats = canonical.image_formats
+            image.image_placeholder = canonical.image_placeholder
+            image.phash = canonical.phash
+            changed[image.id] = image
+        elif not image.phash:
+            image.phash = canonical.phash
+            changed[image.id] = image
+
+        if on_progress and position % IMAGE_DEDUP_BATCH_SIZE == 0:
+            on_progress({'done': position, 'total': len(images), 'relinked': len(links), 'elapsed': time.monotonic() - started})
+
+    # A duplicate's files (with its derivatives) go only once no row points at it any more,
+    # e.g. another model may still use the same file
+    referenced = {image.image_name for image in images}
+    if not dry_run:
+        VehicleImages.objects.bulk_update(
+            list(changed.values()),
+            ['image_name', 'image_widths', 'image_formats', 'image_placeholder', 'phash'],
+            batch_size=IMAGE_DEDUP_BATCH_SIZE,
+        )
+        # bulk_update skips the save signal, so refresh the result cards here
+        build_vehicle_cards_for_images([link['vehicle_id'] for link in links])
+        referenced.update(VehicleImages.objects.filter(image_name__in=duplicate_files).values_list('image_name', flat=True))
+
+    removed_files = sorted(
+        filename
+        for image_name, filenames in duplicate_files.items()
+        if image_name not in referenced
+        for filename in filenames
+        if os.path.exists(os.path.join(directory, filename))
+    )
+    bytes_freed = 0
+    for filename in removed_files:
+        path = os.path.join(directory, filename)
+        bytes_freed += os.path.getsize(path)
+        if not dry_run:
+            os.remove(path)
+
+    return {
+        'dry_run': dry_run,
+        'images': len(images),
+        'hashed': hashed,
+        'relinked': len(links),
+        'links': links,
+        'files_removed': len(removed_files),
+        'removed_files': removed_files,
+        'bytes_freed': bytes_freed,
+        'missing': missing,
+        'seconds': round(time.monotonic() - started, 2),
+    }
@@ -0,0 +1,123 @@
+import base64
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from io import BytesIO
+
+from PIL import Image, ImageFilter, features
+from django.conf import settings
+from django.db import connections
+from api.models import VehicleImages
+from api.vehicle_cards import build_vehicle_cards_for_images
+
+# Encoder options per derivative format
+DERIVATIVE_FORMATS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 6},
+    'avif': {'format': 'AVIF', 'quality': 60},
+}
+
+# Width of the inline blur placeholder; the frontend stretches and blurs it while the real image loads
+PLACEHOLDER_WIDTH = 16
+
+# Images handed to the process pool per round of database updates
+DERIVATIVE_BATCH_SIZE = 200
+
+
+def get_derivative_widths():
+    return sorted(int(w) for w in getattr(settings, 'IMAGE_DERIVATIVE_WIDTHS', [240, 480, 720]))
+
+
+def get_derivative_formats():
+    """Configured formats the installed Pillow can encode"""
+    formats = getattr(settings, 'IMAGE_DERIVATIVE_FORMATS', ['webp', 'avif'])
+    return [f for f in formats if f in DERIVATIVE_FORMATS and features.check(f)]
+
+
+def derivative_filename(image_name, width, image_format):
+    stem = os.path.splitext(image_name)[0]
+    return f"{stem}-{width}w.{image_format}"
+
+
+def render_image_derivatives(directory, image_name, widths, formats):
+    """
+    Write every width x format copy of one image and return (image_name, widths, placeholder).
+    Runs in a worker process (or an image pass thread), so it only touches the filesystem.
+    """
+    with Image.open(os.path.join(directory, image_name)) as source:
+        source = source.convert('RGB')
+
+        # Never upscale; an image narrower than every width gets one copy at its own width
+        written_widths = [w for w in widths if w <= source.width] or [source.width]
+        for width in written_widths:
+            height = round(source.height * width / source.width)
+            resized = source if width == source.width else source.resize((width, height), Image.LANCZOS)
+            for image_format in formats:
+                resized.save(os.path.join(directory, derivative_filename(image_name, width, image_format)), **DERIVATIVE_FORMATS[image_format])
+
+        tiny = source.resize((PLACEHOLDER_WIDTH, max(1, round(source.height * PLACEHOLDER_WIDTH / source.width))), Image.BILINEAR)
+        buffer = BytesIO()
+        tiny.filter(ImageFilter.GaussianBlur(1)).save(buffer, format='WEBP', quality=30)
+        placeholder = f"data:image/webp;base64,{base64.b64encode(buffer.getvalue()).decode()}"
+
+    return image_name, written_widths, placeholder
+
+
+def build_image_derivatives(workers=None, rebuild=False, on_progress=None):
+    """Generate derivatives for every downloaded image that lacks them, spreading the resizing over a process pool"""
+    directory = settings.SCRAPER_DL_PATH
+    widths = get_derivative_widths()
+    formats = get_derivative_formats()
+
+    images = VehicleImages.objects.exclude(image_name__isnull=True).exclude(image_name__in=['', '-'])
+    if not rebuild:
+        images = images.filter(image_widths=[])
+    images = list(images.order_by('id').values_list('id', 'vehicle_id', 'image_name'))
+
+    # Forked workers must not inherit open database sockets
+    connections.close_all()
+
+    started = time.monotonic()
+    written = 0
+    failed = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for start in range(0, len(images), DERIVATIVE_BATCH_SIZE):
+            batch = images[start:start + DERIVATIVE_BATCH_SIZE]
+            futures = {
+                executor.submit(render_image_derivatives, directory, image_name, widths, formats): (pk, vehicle_id, image_name)
+                for pk, vehicle_id, image_name in batch
+            }
+
+            updates = []
+            for future in as_completed(futures):
+                pk, vehicle_id, image_name = futures[future]
+                try:
+                    _, written_widths, placeholder = future.result()
+                except Exception as e:
+                    print(f"Derivatives failed for {image_name}: {e}")
+                    failed.append(image_name)
+                    continue
+                updates.append(VehicleImages(id=pk, vehicle_id=vehicle_id, image_widths=written_widths, image_formats=formats, image_placeholder=placeholder))
+
+            VehicleImages.objects.bulk_update(updates, ['image_widths', 'image_formats', 'image_placeholder'])
+            # bulk_update skips the save signal, so refresh the result cards here
+            build_vehicle_cards_for_images([image.vehicle_id for image in updates])
+            written += len(updates)
+
+            if on_progress:
+                elapsed = time.monotonic() - started
+                on_progress({
+                    'done': start + len(batch),
+                    'total': len(images),
+                    'written': written,
+                    'failed': len(failed),
+                    'elapsed': elapsed,
+                    'images_per_second': (start + len(batch)) / elapsed if elapsed > 0 else 0,
+                })
+
+    return {
+        'images': written,
+        'failed': failed,
+        'widths': widths,
+        'formats': formats,
+        'seconds': round(time.monotonic() - started, 2),
+    }
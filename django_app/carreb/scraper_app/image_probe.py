@@ -0,0 +1,79 @@
+import struct
+
+from api.http_client import http_client
+
+# Give up on a candidate whose dimensions are not known after this many bytes
+PROBE_MAX_HEADER_BYTES = 64 * 1024
+
+# JPEG start-of-frame markers (baseline, progressive, lossless, ...); the rest carry no dimensions
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def _jpeg_size(data):
+    i = 2
+    while i + 9 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte
+            i += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:
+            # Markers without a length field
+            i += 2
+            continue
+        segment_length = struct.unpack('>H', data[i + 2:i + 4])[0]
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack('>HH', data[i + 5:i + 9])
+            return width, height
+        i += 2 + segment_length
+    return None
+
+
+def _webp_size(data):
+    if len(data) < 30:
+        return None
+    chunk = data[12:16]
+    if chunk == b'VP8 ':
+        width, height = struct.unpack('<HH', data[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b'VP8L':
+        bits = int.from_bytes(data[21:25], 'little')
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b'VP8X':
+        return int.from_bytes(data[24:27], 'little') + 1, int.from_bytes(data[27:30], 'little') + 1
+    return None
+
+
+def image_size_from_header(data):
+    """(width, height) from the first bytes of a JPEG, PNG, WebP or GIF, or None if not known yet"""
+    if data[:8] == b'\x89PNG\r\n\x1a\n':
+        return struct.unpack('>II', data[16:24]) if len(data) >= 24 else None
+    if data[:2] == b'\xff\xd8':
+        return _jpeg_size(data)
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return _webp_size(data)
+    if data[:6] in (b'GIF87a', b'GIF89a'):
+        return struct.unpack('<HH', data[6:10]) if len(data) >= 10 else None
+    return None
+
+
+def landscape_inspector(min_width=0):
+    """Streaming check for http_client.fetch: reject portrait or narrow images from their header bytes"""
+    def inspect(data):
+        size = image_size_from_header(data)
+        if size is None:
+            # Unknown format or header beyond the probe window; leave the decision to Pillow
+            return True if len(data) >= PROBE_MAX_HEADER_BYTES else None
+        width, height = size
+        return width > height and width >= min_width
+    return inspect
+
+
+def fetch_landscape_image(url, headers=None, min_width=0):
+    """
+    Stream an image and abort as soon as its header shows it is portrait or narrower than min_width.
+    Returns the full body for accepted candidates, or None.
+    """
+    return http_client.fetch_sync(url, headers=headers, inspect=landscape_inspector(min_width))
@@ -0,0 +1,254 @@
+import fcntl
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from api.models import Vehicles, VehicleImages
+from api.vehicle_cards import build_vehicle_cards_for_images
+from .services import download_duck_image
+from .image_derivatives import get_derivative_formats, get_derivative_widths, render_image_derivatives
+
+# Vehicles handed to the pool at a time; the checkpoint advances once a whole chunk is done
+IMAGE_PASS_CHUNK_SIZE = 50
+
+# Marker stored in VehicleImages.image_name when no usable image was found
+NO_IMAGE = '-'
+
+
+def get_checkpoint_path():
+    return getattr(settings, 'SCRAPER_IMAGE_CHECKPOINT_PATH', None) or os.path.join(settings.BASE_DIR, 'image_pass_checkpoint.json')
+
+
+def acquire_pass_lock():
+    """
+    Exclusive lock file next to the checkpoint, held for the whole pass so only one pass runs across
+    every process and host sharing it. Returns the open lock file (closing it releases the lock),
+    or None if another pass holds it.
+    """
+    lock_file = open(f"{get_checkpoint_path()}.lock", 'w')
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+def load_checkpoint():
+    try:
+        with open(get_checkpoint_path()) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_checkpoint(checkpoint):
+    """Write the checkpoint atomically, so a crash never leaves a half-written file"""
+    path = get_checkpoint_path()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, path)
+
+
+def _download(vehicle):
+    try:
+        response = download_duck_image(vehicle['make_name'] or '', vehicle['model'] or '', vehicle['year'] or '')
+    except Exception as e:
+        response = {"error": str(e)}
+    print(f"{vehicle['vehicle_id']}: {response}")
+    return response.get('filename') or NO_IMAGE
+
+
+def _render_derivatives(image_name, widths, formats):
+    """(widths, placeholder) for a new download, or None; build_image_derivatives retries failures later"""
+    try:
+        _, written_widths, placeholder = render_image_derivatives(settings.SCRAPER_DL_PATH, image_name, widths, formats)
+    except Exception as e:
+        print(f"Derivatives failed for {image_name}: {e}")
+        return None
+    return written_widths, placeholder
+
+
+def _pending_chunk(after_id, size):
+    """Next vehicles after after_id, with their VehicleImages row, that still need an image"""
+    vehicles = list(
+        Vehicles.objects
+        .filter(id__gt=after_id)
+        .order_by('id')
+        .values('id', 'vehicle_id', 'make_name', 'model', 'year')[:size]
+    )
+    images = {
+        image.vehicle_id: image
+        for image in VehicleImages.objects.filter(vehicle_id__in=[v['vehicle_id'] for v in vehicles])
+    }
+    pending = [
+        (vehicle, images[vehicle['vehicle_id']])
+        for vehicle in vehicles
+        if vehicle['vehicle_id'] in images and not images[vehicle['vehicle_id']].image_name
+    ]
+    return vehicles, pending
+
+
+def _year_gap(a, b):
+    """Model years between a and b, or None when either year is not a number"""
+    try:
+        return abs(int(a) - int(b))
+    except (TypeError, ValueError):
+        return None
+
+
+def _sibling_images(vehicles, max_year_gap):
+    """
+    vehicle_id -> VehicleImages row of the same make and model from the nearest other year, at most
+    max_year_gap years away, that already has an image, for the vehicles that have such a sibling
+    """
+    if not vehicles:
+        return {}
+    pending_ids = {vehicle['vehicle_id'] for vehicle in vehicles}
+    candidates = list(
+        Vehicles.objects
+        .filter(make_name__in={v['make_name'] for v in vehicles}, model__in={v['model'] for v in vehicles})
+        .exclude(vehicle_id__in=pending_ids)
+        .values('vehicle_id', 'make_name', 'model', 'year')
+    )
+    images = {
+        image.vehicle_id: image
+        for image in VehicleImages.objects
+        .filter(vehicle_id__in=[c['vehicle_id'] for c in candidates])
+        .exclude(image_name__isnull=True)
+        .exclude(image_name__in=['', NO_IMAGE])
+    }
+
+    by_model = {}
+    for candidate in candidates:
+        if candidate['vehicle_id'] in images:
+            by_model.setdefault((candidate['make_name'], candidate['model']), []).append(candidate)
+
+    siblings = {}
+    for vehicle in vehicles:
+        nearest, nearest_gap = None, None
+        for candidate in by_model.get((vehicle['make_name'], vehicle['model']), []):
+            gap = _year_gap(candidate['year'], vehicle['year'])
+            # Unparseable or distant years never qualify, so the vehicle is downloaded instead
+            if gap is None or gap > max_year_gap:
+                continue
+            if nearest_gap is None or gap < nearest_gap:
+                nearest, nearest_gap = candidate, gap
+        if nearest is not None:
+            siblings[vehicle['vehicle_id']] = images[nearest['vehicle_id']]
+    return siblings
+
+
+def run_image_pass(workers=None, resume=True, on_progress=None):
+    """
+    Download missing vehicle images on a bounded thread pool. Requests are paced per host by
+    host_rate_limiter, and progress is checkpointed per chunk so an interrupted pass resumes.
+    Derivatives of each chunk's new downloads are written before the chunk is saved.
+    """
+    workers = max(1, workers or getattr(settings, 'SCRAPER_IMAGE_WORKERS', 4))
+    reuse_siblings = getattr(settings, 'SCRAPER_REUSE_SIBLING_IMAGES', False)
+    max_year_gap = getattr(settings, 'SCRAPER_SIBLING_MAX_YEAR_GAP', 1)
+    checkpoint = load_checkpoint() if resume else {}
+    if checkpoint.get('status') == 'complete':
+        checkpoint = {}
+    checkpoint.update({
+        'status': 'running',
+        'last_vehicle_id': checkpoint.get('last_vehicle_id', 0),
+        'checked': checkpoint.get('checked', 0),
+        'downloaded': checkpoint.get('downloaded', 0),
+        'not_found': checkpoint.get('not_found', 0),
+        'reused': checkpoint.get('reused', 0),
+        'total': Vehicles.objects.count(),
+        'started_at': checkpoint.get('started_at') or timezone.now().isoformat(),
+    })
+    save_checkpoint(checkpoint)
+
+    widths = get_derivative_widths()
+    formats = get_derivative_formats()
+
+    started = time.monotonic()
+    done_this_run = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='image-pass') as executor:
+        while True:
+            vehicles, pending = _pending_chunk(checkpoint['last_vehicle_id'], IMAGE_PASS_CHUNK_SIZE)
+            if not vehicles:
+                break
+
+            # Another year of the same model already has an image: link it instead of searching again
+            siblings = _sibling_images([vehicle for vehicle, _ in pending], max_year_gap) if reuse_siblings else {}
+            reused = []
+            for vehicle, image in pending:
+                sibling = siblings.get(vehicle['vehicle_id'])
+                if sibling:
+                    image.image_name = sibling.image_name
+                    image.image_widths = sibling.image_widths
+                    image.image_formats = sibling.image_formats
+                    image.image_placeholder = sibling.image_placeholder
+                    image.phash = sibling.phash
+                    reused.append(image)
+            to_download = [(vehicle, image) for vehicle, image in pending if vehicle['vehicle_id'] not in siblings]
+
+            filenames = executor.map(_download, [vehicle for vehicle, _ in to_download])
+            images = list(reused)
+            for (vehicle, image), filename in zip(to_download, filenames):
+                image.image_name = filename
+                images.append(image)
+
+            # Resize the new downloads on the same pool, so their cards get WebP/AVIF copies right away
+            new_images = [image for _, image in to_download if image.image_name != NO_IMAGE]
+            rendered = executor.map(partial(_render_derivatives, widths=widths, formats=formats), [image.image_name for image in new_images])
+            for image, derivatives in zip(new_images, rendered):
+                if derivatives:
+                    image.image_widths, image.image_placeholder = derivatives
+                    image.image_formats = formats
+            VehicleImages.objects.bulk_update(images, ['image_name', 'image_widths', 'image_formats', 'image_placeholder', 'phash'])
+            # bulk_update skips the save signal, so refresh the result cards here
+            build_vehicle_cards_for_images([image.vehicle_id for image in images if image.image_name != NO_IMAGE])
+
+            downloaded = sum(1 for image in images if image.image_name != NO_IMAGE) - len(reused)
+            done_this_run += len(images)
+            checkpoint['last_vehicle_id'] = vehicles[-1]['id']
+            checkpoint['checked'] += len(vehicles)
+            checkpoint['downloaded'] += downloaded
+            checkpoint['reused'] += len(reused)
+            checkpoint['not_found'] += len(to_download) - downloaded
+            checkpoint['updated_at'] = timezone.now().isoformat()
+            save_checkpoint(checkpoint)
+
+            if on_progress:
+                elapsed = time.monotonic() - started
+                on_progress({**checkpoint, 'elapsed': elapsed, 'images_per_minute': done_this_run * 60 / elapsed if elapsed > 0 else 0})
+
+    checkpoint['status'] = 'complete'
+    checkpoint['updated_at'] = timezone.now().isoformat()
+    save_checkpoint(checkpoint)
+    return checkpoint
+
+
+def _run_in_background(workers, lock_file):
+    try:
+        run_image_pass(workers)
+    except Exception as e:
+        print(f"Image pass failed: {e}")
+        checkpoint = load_checkpoint()
+        checkpoint.update({'status': 'failed', 'error': str(e)})
+        save_checkpoint(checkpoint)
+    finally:
+        lock_file.close()
+        close_old_connections()
+
+
+def start_image_pass(workers=None):
+    """Start (or resume) the image pass on a background thread. Returns False if a pass is already running."""
+    lock_file = acquire_pass_lock()
+    if lock_file is None:
+        return False
+    threading.Thread(target=_run_in_background, args=(workers, lock_file), name='image-pass', daemon=True).start()
+    return True
@@ -0,0 +1,95 @@
+# scraper_app/management/commands/benchmark_spec_parsers.py
+# python3 manage.py benchmark_spec_parsers
+# python3 manage.py benchmark_spec_parsers --rows 200000 --repeat 5
+import time
+
+from django.core.management.base import BaseCommand
+from api.models import Vehicles
+from scraper_app import services
+from . import _original_spec_parsers as original
+
+
+class Command(BaseCommand):
+    help = 'Compare the original if/elif spec parsers with the rule-table parsers, with and without the memo cache, over stored GVG spec strings'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000, help='Number of spec rows to parse (stored rows are cycled)')
+        parser.add_argument('--repeat', type=int, default=3, help='Timed passes per path (best is reported)')
+
+    def time_best(self, func, repeat, before=None):
+        best = None
+        for _ in range(repeat):
+            if before:
+                before()
+            started = time.perf_counter()
+            output = func()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        return best, output
+
+    def handle(self, *args, **options):
+        stored = list(
+            Vehicles.objects
+            .values_list('engine', 'transmission', 'tailpipe_comb', 'tailpipe_urban', 'tailpipe_extra')
+            .order_by('id')[:options['rows']]
+        )
+        if not stored:
+            self.stdout.write(self.style.ERROR('No vehicles to benchmark against'))
+            return
+        rows = [stored[i % len(stored)] for i in range(options['rows'])]
+        repeat = max(1, options['repeat'])
+
+        def parse_rows(engine_spec, liter_string, transmission_spec, tailpipe):
+            output = []
+            for engine, transmission, comb, urban, extra in rows:
+                spec = engine_spec(engine or '')
+                output.append((
+                    spec,
+                    liter_string(spec['engine_capacity'] or ''),
+                    transmission_spec(transmission or ''),
+                    tailpipe(comb or ''),
+                    tailpipe(urban or ''),
+                    tailpipe(extra or ''),
+                ))
+            return output
+
+        def original_path():
+            return parse_rows(
+                original.parse_vehicle_engine_spec,
+                original.normalize_liter_string,
+                original.parse_vehicle_transmission_spec,
+                original.parse_vehicle_tailpipe,
+            )
+
+        def uncached_path():
+            return parse_rows(
+                services._parse_vehicle_engine_spec.__wrapped__,
+                services.normalize_liter_string.__wrapped__,
+                services._parse_vehicle_transmission_spec.__wrapped__,
+                services._parse_vehicle_tailpipe.__wrapped__,
+            )
+
+        def cached_path():
+            return parse_rows(
+                services.parse_vehicle_engine_spec,
+                services.normalize_liter_string,
+                services.parse_vehicle_transmission_spec,
+                services.parse_vehicle_tailpipe,
+            )
+
+        # The cache is cleared before every pass, so misses on distinct strings are included
+        original_time, original_output = self.time_best(original_path, repeat)
+        uncached_time, uncached_output = self.time_best(uncached_path, repeat, services.clear_spec_parser_caches)
+        cached_time, cached_output = self.time_best(cached_path, repeat, services.clear_spec_parser_caches)
+
+        distinct = len({row[0] for row in rows})
+        self.stdout.write(f'{len(rows)} rows, {distinct} distinct engine strings')
+        self.stdout.write(f'original if/elif parsers:     {original_time * 1000:.1f} ms ({len(rows) / original_time:.0f} rows/s)')
+        self.stdout.write(f'rule-table parsers, no cache: {uncached_time * 1000:.1f} ms ({len(rows) / uncached_time:.0f} rows/s)')
+        self.stdout.write(f'rule-table parsers, memoized: {cached_time * 1000:.1f} ms ({len(rows) / cached_time:.0f} rows/s)')
+        self.stdout.write(self.style.SUCCESS(
+            f'speedup over the original parsers: {original_time / uncached_time:.1f}x uncached, {original_time / cached_time:.1f}x memoized'
+        ))
+
+        if not (original_output == uncached_output == cached_output):
+            self.stdout.write(self.style.ERROR('Outputs differ from the original parsers'))
@@ -0,0 +1,27 @@
+# scraper_app/management/commands/build_image_derivatives.py
+# python3 manage.py build_image_derivatives
+# python3 manage.py build_image_derivatives --workers 8 --rebuild
+from django.core.management.base import BaseCommand
+from scraper_app.image_derivatives import build_image_derivatives
+
+
+class Command(BaseCommand):
+    help = 'Write resized WebP/AVIF copies and blur placeholders for downloaded vehicle images'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: one per CPU)')
+        parser.add_argument('--rebuild', action='store_true', help='Regenerate derivatives for images that already have them')
+
+    def report_progress(self, progress):
+        self.stdout.write(
+            f'[{progress["done"]}/{progress["total"]}] {progress["written"]} written, {progress["failed"]} failed '
+            f'in {progress["elapsed"]:.1f}s ({progress["images_per_second"]:.1f} images/s)'
+        )
+
+    def handle(self, *args, **options):
+        result = build_image_derivatives(options['workers'], rebuild=options['rebuild'], on_progress=self.report_progress)
+        self.stdout.write(
+            self.style.SUCCESS(f'{result["images"]} images at widths {result["widths"]} as {", ".join(result["formats"])} in {result["seconds"]}s')
+        )
+        if result['failed']:
+            self.stdout.write(self.style.ERROR(f'Failed: {", ".join(result["failed"])}'))
@@ -0,0 +1,42 @@
+# scraper_app/management/commands/dedupe_vehicle_images.py
+# python3 manage.py dedupe_vehicle_images --dry-run
+# python3 manage.py dedupe_vehicle_images
+from django.core.management.base import BaseCommand, CommandError
+from scraper_app.image_dedup import dedupe_vehicle_images
+
+
+class Command(BaseCommand):
+    help = 'Link visually identical images (dHash) of the same make and model to one canonical file and delete the duplicates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Report the links and deletions without changing anything')
+
+    def report_progress(self, progress):
+        self.stdout.write(f'[{progress["done"]}/{progress["total"]}] {progress["relinked"]} relinked in {progress["elapsed"]:.1f}s')
+
+    def handle(self, *args, **options):
+        try:
+            result = dedupe_vehicle_images(dry_run=options['dry_run'], on_progress=self.report_progress)
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        if result['dry_run']:
+            for link in result['links']:
+                self.stdout.write(f'link {link["vehicle_id"]}: {link["from"]} -> {link["to"]}')
+            for filename in result['removed_files']:
+                self.stdout.write(f'delete {filename}')
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'Dry run, nothing changed. {result["images"]} images: {result["relinked"]} would be relinked, '
+                    f'{result["files_removed"]} files removed ({result["bytes_freed"] / 1048576:.1f} MB)'
+                )
+            )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f'{result["images"]} images ({result["hashed"]} newly hashed): {result["relinked"]} relinked, '
+                    f'{result["files_removed"]} files removed ({result["bytes_freed"] / 1048576:.1f} MB) in {result["seconds"]}s'
+                )
+            )
+        if result['missing']:
+            self.stdout.write(self.style.ERROR(f'{result["missing"]} image files could not be read'))
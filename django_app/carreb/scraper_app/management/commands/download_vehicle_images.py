@@ -0,0 +1,32 @@
+# scraper_app/management/commands/download_vehicle_images.py
+# python3 manage.py download_vehicle_images
+# python3 manage.py download_vehicle_images --workers 8 --restart
+from django.core.management.base import BaseCommand, CommandError
+from scraper_app.image_worker import acquire_pass_lock, run_image_pass
+
+
+class Command(BaseCommand):
+    help = 'Download missing vehicle images on a rate-limited worker pool, resuming from the last checkpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None, help='Concurrent downloads (default SCRAPER_IMAGE_WORKERS)')
+        parser.add_argument('--restart', action='store_true', help='Ignore the checkpoint and start from the first vehicle')
+
+    def report_progress(self, progress):
+        self.stdout.write(
+            f'[{progress["checked"]}/{progress["total"]}] {progress["downloaded"]} downloaded, {progress["not_found"]} not found '
+            f'in {progress["elapsed"]:.0f}s ({progress["images_per_minute"]:.1f} images/min)'
+        )
+
+    def handle(self, *args, **options):
+        # Same lock as the API-started pass, so the two never download at once
+        lock_file = acquire_pass_lock()
+        if lock_file is None:
+            raise CommandError('An image pass is already running')
+        try:
+            result = run_image_pass(options['workers'], resume=not options['restart'], on_progress=self.report_progress)
+        finally:
+            lock_file.close()
+        self.stdout.write(
+            self.style.SUCCESS(f'Image pass complete: {result["checked"]} vehicles checked, {result["downloaded"]} downloaded, {result["not_found"]} not found')
+        )
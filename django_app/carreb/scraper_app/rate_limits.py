@@ -0,0 +1,59 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+from django.conf import settings
+
+# Host the image search requests go to
+SEARCH_HOST = 'duckduckgo.com'
+
+
+class TokenBucket:
+    """Allows `rate` acquisitions per second on average, with bursts of up to `capacity`"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class HostRateLimiter:
+    """One token bucket per host, shared by every thread of the process"""
+
+    def __init__(self, rate=None, capacity=None, search_rate=None):
+        self.rate = rate or getattr(settings, 'SCRAPER_HOST_RATE', 1.0)
+        self.capacity = capacity or getattr(settings, 'SCRAPER_HOST_BURST', 2)
+        self.search_rate = search_rate or getattr(settings, 'SCRAPER_SEARCH_RATE', 0.2)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host):
+        with self._lock:
+            if host not in self._buckets:
+                if host == SEARCH_HOST:
+                    self._buckets[host] = TokenBucket(self.search_rate, 1)
+                else:
+                    self._buckets[host] = TokenBucket(self.rate, self.capacity)
+            return self._buckets[host]
+
+    def acquire(self, url_or_host):
+        host = urlparse(url_or_host).netloc if '//' in url_or_host else url_or_host
+        self.bucket(host.lower()).acquire()
+
+
+host_rate_limiter = HostRateLimiter()
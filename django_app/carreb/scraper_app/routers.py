@@ -8,3 +8,9 @@ class ExternalDBRouter:
         if hasattr(model, '_use_external'):
             return 'scraper_db'
         return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # scraper_db holds externally managed source data, nothing is ever migrated into it
+        if db == 'scraper_db':
+            return False
+        return None
@@ -0,0 +1,89 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from django.conf import settings
+
+# Result fields the scraper reads; everything else DDGS returns is dropped before caching
+CACHED_RESULT_FIELDS = ['image', 'width', 'height', 'source', 'url']
+
+
+def get_search_cache_path():
+    """Defaults to a file beside SCRAPER_DL_PATH (not inside it, so it is never served as media)"""
+    path = getattr(settings, 'SCRAPER_SEARCH_CACHE_PATH', None)
+    if path:
+        return path
+    download_path = os.path.normpath(settings.SCRAPER_DL_PATH or settings.MEDIA_ROOT)
+    return os.path.join(os.path.dirname(download_path), 'image_search_cache.sqlite3')
+
+
+class ImageSearchCache:
+    """
+    Persistent query -> image search results cache in SQLite. Results are stored as zlib-compressed
+    JSON; queries that returned nothing are cached too, for a shorter negative_ttl.
+    """
+
+    def __init__(self, path=None, ttl=None, negative_ttl=None):
+        self.path = path
+        self.ttl = ttl or getattr(settings, 'SCRAPER_SEARCH_CACHE_TTL', 30 * 86400)
+        self.negative_ttl = negative_ttl or getattr(settings, 'SCRAPER_SEARCH_CACHE_NEGATIVE_TTL', 86400)
+        self._connection = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        if self._connection is None:
+            path = self.path or get_search_cache_path()
+            os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.execute(
+                'CREATE TABLE IF NOT EXISTS image_searches ('
+                'query TEXT PRIMARY KEY, results BLOB NOT NULL, result_count INTEGER NOT NULL, searched_at REAL NOT NULL)'
+            )
+        return self._connection
+
+    def get(self, query):
+        """Cached results (possibly an empty list), or None on a miss or expired entry"""
+        with self._lock:
+            row = self._connect().execute(
+                'SELECT results, result_count, searched_at FROM image_searches WHERE query = ?', (query,)
+            ).fetchone()
+        if row is None:
+            return None
+        results, result_count, searched_at = row
+        ttl = self.ttl if result_count else self.negative_ttl
+        if time.time() - searched_at > ttl:
+            return None
+        return json.loads(zlib.decompress(results))
+
+    def set(self, query, results):
+        results = [{field: result[field] for field in CACHED_RESULT_FIELDS if field in result} for result in results]
+        blob = zlib.compress(json.dumps(results, separators=(',', ':')).encode())
+        with self._lock:
+            self._connect().execute(
+                'INSERT OR REPLACE INTO image_searches (query, results, result_count, searched_at) VALUES (?, ?, ?, ?)',
+                (query, blob, len(results), time.time()),
+            )
+        return results
+
+    def purge_expired(self):
+        """Delete expired entries. Returns the number removed."""
+        now = time.time()
+        with self._lock:
+            cursor = self._connect().execute(
+                'DELETE FROM image_searches WHERE (result_count > 0 AND searched_at < ?) OR (result_count = 0 AND searched_at < ?)',
+                (now - self.ttl, now - self.negative_ttl),
+            )
+        return cursor.rowcount
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+image_search_cache = ImageSearchCache()
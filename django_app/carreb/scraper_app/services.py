@@ -1,8 +1,8 @@
 import re
 import os
-import requests
-import time
+import threading
 import random
+from functools import lru_cache
 
 from django.conf import settings
 #from django.http import JsonResponse
@@ -11,237 +11,309 @@ from duckduckgo_search import DDGS
 from PIL import Image
 from io import BytesIO
 from django.utils.text import slugify
+from .rate_limits import host_rate_limiter, SEARCH_HOST
+from .image_probe import fetch_landscape_image
+from api.http_client import http_client
+from .search_cache import image_search_cache
+
+
+# Spec strings repeat heavily across GVG rows, so parsed results are memoized per raw string
+SPEC_PARSE_CACHE_SIZE = 8192
+
+CAPACITY_RE = re.compile(r'\b[\d.]+L\b')
+CYLINDER_RE = re.compile(r'\b\d+cyl\b')
+CYLINDER_IGNORECASE_RE = re.compile(r'\b\d+cyl\b', re.IGNORECASE)
+FUEL_GRADE_RE = re.compile(r'\b\S*RO[N]?\b')
+FUEL_GRADE_IGNORECASE_RE = re.compile(r'\b\S*RO[N]?\b', re.IGNORECASE)
+FUEL_GRADE_SUFFIX_RE = re.compile(r'RO[N]?$')
+FUEL_GRADE_SPLIT_RE = re.compile(r'(.*?)(\b.*?RO[N]?\b)')
+ENGINE_TYPE_RE = re.compile(r'\b(Petrol|Diesel|Hybrid|Electric)\b', re.IGNORECASE)
+ENGINE_SPEC_PARTS_RE = re.compile(r'[\d.]+L|\d+cyl|\S*RO[N]?')
+TRANSMISSION_SPEED_RE = re.compile(r'\b(\d+)\s*(spd|speed)', re.IGNORECASE)
+TRANSMISSION_SPEED_PART_RE = re.compile(r'\b\d+\s*(spd|speed)\b', re.IGNORECASE)
+TAILPIPE_RE = re.compile(r'^(\S+)(?:\s*\[(.*?)\])?$')
+LITER_RE = re.compile(r'^(\d+(?:\.\d+)?)(L)$', re.IGNORECASE)
+
+
+def _engine_spec(engine_capacity='', engine_cylinder='', induction='', engine_type='', fuel_grade=''):
+    return {
+        "engine_capacity": engine_capacity,
+        "engine_cylinder": engine_cylinder,
+        "induction": induction,
+        "engine_type": engine_type,
+        "fuel_grade": fuel_grade
+    }
 
 
-#Parse vehicle engine
-def parse_vehicle_engine_spec(engine):
+def _parse_electric_plugin_petrol(engine):
+    # Match engine capacity (e.g. "0.6L", "2.0L", etc.)
+    capacity_match = CAPACITY_RE.search(engine)
+    engine_capacity = capacity_match.group() if capacity_match else ''
 
-    engine_capacity = ''
-    engine_cylinder = ''
-    induction = ''
-    engine_type = ''
-    fuel_grade = ''
-    
-    if 'Electric Plug-in Electric/Petrol' in engine:
-        # Match engine capacity (e.g. "0.6L", "2.0L", etc.)
-        capacity_match = re.search(r'\b[\d.]+L\b', engine)
-        engine_capacity = capacity_match.group() if capacity_match else ''
-
-        # Find where engine capacity ends
-        if engine_capacity:
-            after_capacity = engine.split(engine_capacity, 1)[1].strip()
-        else:
-            after_capacity = engine.strip()
+    # Find where engine capacity ends
+    if engine_capacity:
+        after_capacity = engine.split(engine_capacity, 1)[1].strip()
+    else:
+        after_capacity = engine.strip()
 
-        # Match fuel type (ends with RON or RO — flexible)
-        fuel_match = re.search(r'(.*?)(\b.*?RO[N]?\b)', after_capacity)
-        if fuel_match:
-            engine_type = fuel_match.group(1).strip()
-            fuel_grade = fuel_match.group(2).strip()
-        else:
-            engine_type = after_capacity
-            fuel_grade = ''
+    # Match fuel type (ends with RON or RO — flexible)
+    fuel_match = FUEL_GRADE_SPLIT_RE.search(after_capacity)
+    if fuel_match:
+        engine_type = fuel_match.group(1).strip()
+        fuel_grade = fuel_match.group(2).strip()
+    else:
+        engine_type = after_capacity
+        fuel_grade = ''
 
-    elif 'cyl Plug-in Electric/Petrol' in engine:
-        # Find engine capacity (e.g., "1.5L")
-        capacity_match = re.search(r'\b[\d.]+L\b', engine)
-        engine_capacity = capacity_match.group(0) if capacity_match else ''
+    return _engine_spec(engine_capacity=engine_capacity, engine_type=engine_type, fuel_grade=fuel_grade)
 
-        # Find engine cylinder (e.g., "4cyl")
-        cyl_match = re.search(r'\b\d+cyl\b', engine)
-        engine_cylinder = cyl_match.group(0) if cyl_match else ''
 
-        # Find fuel type (e.g., "91RON")
-        fuel_match = re.search(r'\b\S*RO[N]?\b', engine)
-        fuel_grade = fuel_match.group(0) if fuel_match else ''
+def _parse_cyl_plugin_petrol(engine):
+    # Find engine capacity (e.g., "1.5L")
+    capacity_match = CAPACITY_RE.search(engine)
+    engine_capacity = capacity_match.group(0) if capacity_match else ''
 
-        # Everything in between = engine type
-        engine_type = engine
-        for val in [engine_capacity, engine_cylinder, fuel_grade]:
-            if val:
-                engine_type = engine_type.replace(val, '')
-        engine_type = engine_type.strip()
+    # Find engine cylinder (e.g., "4cyl")
+    cyl_match = CYLINDER_RE.search(engine)
+    engine_cylinder = cyl_match.group(0) if cyl_match else ''
 
-    elif 'Turbo Petrol' in engine:
-        tokens = engine.split()
+    # Find fuel type (e.g., "91RON")
+    fuel_match = FUEL_GRADE_RE.search(engine)
+    fuel_grade = fuel_match.group(0) if fuel_match else ''
 
-        engine_capacity = next((t for t in tokens if t.endswith("L")), '')
-        engine_cylinder = next((t for t in tokens if t.endswith("cyl")), '')
-        induction = next((t for t in tokens if "Turbo" in t), '')
-        fuel_grade = next((t for t in tokens if re.search(r'RO[N]?$', t)), '')
+    # Everything in between = engine type
+    engine_type = engine
+    for val in [engine_capacity, engine_cylinder, fuel_grade]:
+        if val:
+            engine_type = engine_type.replace(val, '')
+    engine_type = engine_type.strip()
 
-        # Remaining token after extracting above
-        used_tokens = {engine_capacity, engine_cylinder, induction, fuel_grade}
-        engine_type = next((t for t in tokens if t not in used_tokens), '')
+    return _engine_spec(engine_capacity, engine_cylinder, '', engine_type, fuel_grade)
 
-    elif 'Petrol' in engine and 'Turbo' not in engine:
-        engine_capacity = re.search(r'\b[\d.]+L\b', engine)
-        engine_capacity = engine_capacity.group() if engine_capacity else ''
 
-        engine_cylinder = re.search(r'\b\d+cyl\b', engine, re.IGNORECASE)
-        engine_cylinder = engine_cylinder.group() if engine_cylinder else ''
+def _parse_turbo_petrol(engine):
+    tokens = engine.split()
 
-        engine_type = re.search(r'\b(Petrol|Diesel|Hybrid|Electric)\b', engine, re.IGNORECASE)
-        engine_type = engine_type.group() if engine_type else ''
+    engine_capacity = next((t for t in tokens if t.endswith("L")), '')
+    engine_cylinder = next((t for t in tokens if t.endswith("cyl")), '')
+    induction = next((t for t in tokens if "Turbo" in t), '')
+    fuel_grade = next((t for t in tokens if FUEL_GRADE_SUFFIX_RE.search(t)), '')
 
-        fuel_grade = re.search(r'\b\S*RO[N]?\b', engine, re.IGNORECASE)  # matches RON or similar
-        fuel_grade = fuel_grade.group() if fuel_grade else ''
+    # Remaining token after extracting above
+    used_tokens = {engine_capacity, engine_cylinder, induction, fuel_grade}
+    engine_type = next((t for t in tokens if t not in used_tokens), '')
 
-    elif 'Diesel' in engine and 'Turbo' not in engine:
-        engine_capacity = re.search(r'\b[\d.]+L\b', engine)
-        engine_capacity = engine_capacity.group() if engine_capacity else ''
+    return _engine_spec(engine_capacity, engine_cylinder, induction, engine_type, fuel_grade)
 
-        engine_cylinder = re.search(r'\b\d+cyl\b', engine, re.IGNORECASE)
-        engine_cylinder = engine_cylinder.group() if engine_cylinder else ''
 
-        engine_type = re.search(r'\b(Petrol|Diesel|Hybrid|Electric)\b', engine, re.IGNORECASE)
-        engine_type = engine_type.group() if engine_type else ''
+def _parse_petrol(engine):
+    engine_capacity = CAPACITY_RE.search(engine)
+    engine_capacity = engine_capacity.group() if engine_capacity else ''
 
-    elif 'Turbo Diesel' in engine:
-        tokens = engine.split()
+    engine_cylinder = CYLINDER_IGNORECASE_RE.search(engine)
+    engine_cylinder = engine_cylinder.group() if engine_cylinder else ''
 
-        engine_capacity = next((t for t in tokens if t.endswith("L")), '')
-        engine_cylinder = next((t for t in tokens if t.endswith("cyl")), '')
-        induction = next((t for t in tokens if "Turbo" in t), '')
-        fuel_grade = ''
+    engine_type = ENGINE_TYPE_RE.search(engine)
+    engine_type = engine_type.group() if engine_type else ''
 
-        # Remaining token after extracting above
-        used_tokens = {engine_capacity, engine_cylinder, induction, fuel_grade}
-        engine_type = next((t for t in tokens if t not in used_tokens), '')
-        
-    elif 'cyl Electric/Petrol' in engine:
-        # Match engine capacity (ends with L)
-        capacity_match = re.search(r'\b[\d.]+L\b', engine)
-        engine_capacity = capacity_match.group(0) if capacity_match else None
+    fuel_grade = FUEL_GRADE_IGNORECASE_RE.search(engine)  # matches RON or similar
+    fuel_grade = fuel_grade.group() if fuel_grade else ''
 
-        # Match cylinder (ends with cyl)
-        cyl_match = re.search(r'\b\d+cyl\b', engine)
-        engine_cylinder = cyl_match.group(0) if cyl_match else None
+    return _engine_spec(engine_capacity, engine_cylinder, '', engine_type, fuel_grade)
 
-        # Match fuel type (ends with RON or RO)
-        fuel_match = re.search(r'\b\S*RO[N]?\b', engine)
-        fuel_grade = fuel_match.group(0) if fuel_match else None
 
-        # Remove all matched parts to get engine type
-        engine_type = re.sub(r'[\d.]+L|\d+cyl|\S*RO[N]?', '', engine).strip()
-    
-    elif 'Turbo Plug-in Electric/Petrol' in engine:
-        parts = engine.split()
-    
-        engine_capacity = next((p for p in parts if p.endswith('L')), '')
-        engine_cylinder = next((p for p in parts if p.endswith('cyl')), '')
+def _parse_diesel(engine):
+    engine_capacity = CAPACITY_RE.search(engine)
+    engine_capacity = engine_capacity.group() if engine_capacity else ''
+
+    engine_cylinder = CYLINDER_IGNORECASE_RE.search(engine)
+    engine_cylinder = engine_cylinder.group() if engine_cylinder else ''
+
+    engine_type = ENGINE_TYPE_RE.search(engine)
+    engine_type = engine_type.group() if engine_type else ''
+
+    return _engine_spec(engine_capacity, engine_cylinder, '', engine_type, '')
+
+
+def _parse_turbo_diesel(engine):
+    tokens = engine.split()
+
+    engine_capacity = next((t for t in tokens if t.endswith("L")), '')
+    engine_cylinder = next((t for t in tokens if t.endswith("cyl")), '')
+    induction = next((t for t in tokens if "Turbo" in t), '')
+    fuel_grade = ''
+
+    # Remaining token after extracting above
+    used_tokens = {engine_capacity, engine_cylinder, induction, fuel_grade}
+    engine_type = next((t for t in tokens if t not in used_tokens), '')
+
+    return _engine_spec(engine_capacity, engine_cylinder, induction, engine_type, fuel_grade)
+
+
+def _parse_cyl_electric_petrol(engine):
+    # Match engine capacity (ends with L)
+    capacity_match = CAPACITY_RE.search(engine)
+    engine_capacity = capacity_match.group(0) if capacity_match else None
+
+    # Match cylinder (ends with cyl)
+    cyl_match = CYLINDER_RE.search(engine)
+    engine_cylinder = cyl_match.group(0) if cyl_match else None
+
+    # Match fuel type (ends with RON or RO)
+    fuel_match = FUEL_GRADE_RE.search(engine)
+    fuel_grade = fuel_match.group(0) if fuel_match else None
+
+    # Remove all matched parts to get engine type
+    engine_type = ENGINE_SPEC_PARTS_RE.sub('', engine).strip()
+
+    return _engine_spec(engine_capacity, engine_cylinder, '', engine_type, fuel_grade)
+
+
+def _parse_turbo_plugin_petrol(engine):
+    parts = engine.split()
+
+    engine_capacity = next((p for p in parts if p.endswith('L')), '')
+    engine_cylinder = next((p for p in parts if p.endswith('cyl')), '')
+    induction = ''
+    fuel_grade = ''
+    engine_type = ''
+
+    # Induction: assume it's the word right after "cyl"
+    try:
+        cyl_index = parts.index(engine_cylinder)
+        induction = parts[cyl_index + 1]
+    except (ValueError, IndexError):
         induction = ''
-        fuel_grade = ''
+
+    # Fuel type: last word ending in RON
+    fuel_grade = next((p for p in reversed(parts) if p.endswith('RON')), '')
+
+    # Engine type: all words between induction and fuel_type
+    try:
+        fuel_index = parts.index(fuel_grade)
+        engine_type = ' '.join(parts[cyl_index + 2:fuel_index])
+    except (ValueError, IndexError):
         engine_type = ''
 
-        # Induction: assume it's the word right after "cyl"
-        try:
-            cyl_index = parts.index(engine_cylinder)
-            induction = parts[cyl_index + 1]
-        except (ValueError, IndexError):
-            induction = ''
+    return _engine_spec(engine_capacity, engine_cylinder, induction, engine_type, fuel_grade)
 
-        # Fuel type: last word ending in RON
-        fuel_grade = next((p for p in reversed(parts) if p.endswith('RON')), '')
 
-        # Engine type: all words between induction and fuel_type
-        try:
-            fuel_index = parts.index(fuel_grade)
-            engine_type = ' '.join(parts[cyl_index + 2:fuel_index])
-        except (ValueError, IndexError):
-            engine_type = ''
+def _parse_turbo_electric_petrol(engine):
+    parts = engine.split()
 
-    elif 'Turbo Electric/Petrol' in engine:
-        parts = engine.split()
+    engine_capacity = next((p for p in parts if p.endswith('L')), '')
+    engine_cylinder = next((p for p in parts if p.endswith('cyl')), '')
+    fuel_grade = next((p for p in reversed(parts) if p.endswith('RO') or p.endswith('RON')), '')
 
-        engine_capacity = next((p for p in parts if p.endswith('L')), '')
-        engine_cylinder = next((p for p in parts if p.endswith('cyl')), '')
-        fuel_grade = next((p for p in reversed(parts) if p.endswith('RO') or p.endswith('RON')), '')
+    # Remove matched parts to extract the rest
+    remaining = [p for p in parts if p not in {engine_capacity, engine_cylinder, fuel_grade}]
 
-        # Remove matched parts to extract the rest
-        remaining = [p for p in parts if p not in {engine_capacity, engine_cylinder, fuel_grade}]
+    # Assume first remaining = induction, rest = engine type
+    induction = remaining[0] if remaining else ''
+    engine_type = ' '.join(remaining[1:]) if len(remaining) > 1 else ''
 
-        # Assume first remaining = induction, rest = engine type
-        induction = remaining[0] if remaining else ''
-        engine_type = ' '.join(remaining[1:]) if len(remaining) > 1 else ''
+    return _engine_spec(engine_capacity, engine_cylinder, induction, engine_type, fuel_grade)
 
-    elif 'Turbo Electric/Diesel' in engine:
-        parts = engine.split()
 
-        engine_capacity = next((p for p in parts if p.endswith('L')), None)
-        engine_cylinder = next((p for p in parts if p.endswith('cyl')), None)
-        fuel_grade = ''
+def _parse_turbo_electric_diesel(engine):
+    parts = engine.split()
 
-        # Remove matched parts to extract the rest
-        remaining = [p for p in parts if p not in {engine_capacity, engine_cylinder, fuel_grade}]
+    engine_capacity = next((p for p in parts if p.endswith('L')), None)
+    engine_cylinder = next((p for p in parts if p.endswith('cyl')), None)
+    fuel_grade = ''
 
-        # Assume first remaining = induction, rest = engine type
-        induction = remaining[0] if remaining else None
-        engine_type = ' '.join(remaining[1:]) if len(remaining) > 1 else None
-    
-    elif 'Turbo Plug-in Electric/Diesel' in engine:
-        parts = engine.split()
-    
-        engine_capacity = next((p for p in parts if p.endswith('L')), '')
-        engine_cylinder = next((p for p in parts if p.endswith('cyl')), '')
+    # Remove matched parts to extract the rest
+    remaining = [p for p in parts if p not in {engine_capacity, engine_cylinder, fuel_grade}]
+
+    # Assume first remaining = induction, rest = engine type
+    induction = remaining[0] if remaining else None
+    engine_type = ' '.join(remaining[1:]) if len(remaining) > 1 else None
+
+    return _engine_spec(engine_capacity, engine_cylinder, induction, engine_type, fuel_grade)
+
+
+def _parse_turbo_plugin_diesel(engine):
+    parts = engine.split()
+
+    engine_capacity = next((p for p in parts if p.endswith('L')), '')
+    engine_cylinder = next((p for p in parts if p.endswith('cyl')), '')
+
+    # Induction: assume it's the word right after "cyl"
+    try:
+        cyl_index = parts.index(engine_cylinder)
+        induction = parts[cyl_index + 1]
+    except (ValueError, IndexError):
         induction = ''
-        fuel_grade = ''
-        engine_type = ''
 
-        # Induction: assume it's the word right after "cyl"
-        try:
-            cyl_index = parts.index(engine_cylinder)
-            induction = parts[cyl_index + 1]
-        except (ValueError, IndexError):
-            induction = ''
+    # No fuel grade is published for diesel, so the engine type is never split out
+    return _engine_spec(engine_capacity, engine_cylinder, induction, '', '')
 
-        # Fuel type: last word ending in RON
-        fuel_grade = ''
 
-        # Engine type: all words between induction and fuel_type
-        try:
-            fuel_index = parts.index(fuel_grade)
-            engine_type = ' '.join(parts[cyl_index + 2:fuel_index])
-        except (ValueError, IndexError):
-            engine_type = ''
+def _parse_pure_electric(engine):
+    return _engine_spec(engine_type='Pure Electric')
 
 
-    elif 'Pure Electric' in engine:
-        engine_type = 'Pure Electric'
+# (marker, excluded marker, parser). The first matching rule wins, so order matters.
+ENGINE_SPEC_RULES = [
+    ('Electric Plug-in Electric/Petrol', None, _parse_electric_plugin_petrol),
+    ('cyl Plug-in Electric/Petrol', None, _parse_cyl_plugin_petrol),
+    ('Turbo Petrol', None, _parse_turbo_petrol),
+    ('Petrol', 'Turbo', _parse_petrol),
+    ('Diesel', 'Turbo', _parse_diesel),
+    ('Turbo Diesel', None, _parse_turbo_diesel),
+    ('cyl Electric/Petrol', None, _parse_cyl_electric_petrol),
+    ('Turbo Plug-in Electric/Petrol', None, _parse_turbo_plugin_petrol),
+    ('Turbo Electric/Petrol', None, _parse_turbo_electric_petrol),
+    ('Turbo Electric/Diesel', None, _parse_turbo_electric_diesel),
+    ('Turbo Plug-in Electric/Diesel', None, _parse_turbo_plugin_diesel),
+    ('Pure Electric', None, _parse_pure_electric),
+]
 
-    return {
-        "engine_capacity": engine_capacity,
-        "engine_cylinder": engine_cylinder,
-        "induction": induction,
-        "engine_type": engine_type,
-        "fuel_grade": fuel_grade
-    }
 
+@lru_cache(maxsize=SPEC_PARSE_CACHE_SIZE)
+def _parse_vehicle_engine_spec(engine):
+    for marker, excluded, parse in ENGINE_SPEC_RULES:
+        if marker in engine and not (excluded and excluded in engine):
+            return parse(engine)
+    return _engine_spec()
 
-# Parse vehicle transmission
-def parse_vehicle_transmission_spec(transmission):
+
+#Parse vehicle engine
+def parse_vehicle_engine_spec(engine):
+    # Copy, so callers cannot modify the cached result
+    return dict(_parse_vehicle_engine_spec(engine))
+
+
+@lru_cache(maxsize=SPEC_PARSE_CACHE_SIZE)
+def _parse_vehicle_transmission_spec(transmission):
 
      # Match the transmission speed (number before "spd" or "speed")
-    speed_match = re.search(r'\b(\d+)\s*(spd|speed)', transmission, re.IGNORECASE)
+    speed_match = TRANSMISSION_SPEED_RE.search(transmission)
     speed = int(speed_match.group(1)) if speed_match else None
 
     # Remove the speed part to get transmission type
-    transmission_type = re.sub(r'\b\d+\s*(spd|speed)\b', '', transmission, flags=re.IGNORECASE).strip()
+    transmission_type = TRANSMISSION_SPEED_PART_RE.sub('', transmission).strip()
 
     return {
         "speed": speed,
         "type": transmission_type
     }
 
-# Parse tailpipe
-def parse_vehicle_tailpipe(tailpipe_value):
+
+# Parse vehicle transmission
+def parse_vehicle_transmission_spec(transmission):
+    return dict(_parse_vehicle_transmission_spec(transmission))
+
+
+@lru_cache(maxsize=SPEC_PARSE_CACHE_SIZE)
+def _parse_vehicle_tailpipe(tailpipe_value):
     s = tailpipe_value.strip()
 
     if s.upper() == 'N/A':
         return {'value': '', 'note': ''}
 
     # Extract value and optional note in brackets
-    match = re.match(r'^(\S+)(?:\s*\[(.*?)\])?$', s)
+    match = TAILPIPE_RE.match(s)
     if not match:
         return {'value': '', 'note': ''}
 
@@ -255,9 +327,14 @@ def parse_vehicle_tailpipe(tailpipe_value):
     return {'value': value, 'note': note}
 
 
+# Parse tailpipe
+def parse_vehicle_tailpipe(tailpipe_value):
+    return dict(_parse_vehicle_tailpipe(tailpipe_value))
+
 
+@lru_cache(maxsize=SPEC_PARSE_CACHE_SIZE)
 def normalize_liter_string(s):
-    match = re.match(r'^(\d+(?:\.\d+)?)(L)$', s.strip(), re.IGNORECASE)
+    match = LITER_RE.match(s.strip())
     if not match:
         return s  # Return as-is if it doesn't match pattern
 
@@ -268,11 +345,36 @@ def normalize_liter_string(s):
     return f"{value}{unit.upper()}"
 
 
+def clear_spec_parser_caches():
+    for parser in [_parse_vehicle_engine_spec, _parse_vehicle_transmission_spec, _parse_vehicle_tailpipe, normalize_liter_string]:
+        parser.cache_clear()
+
+
 def generate_vehicle_id(year, latest_number):
     next_number = latest_number + 1
     return f"CRB-{year}-{next_number:06d}"
 
 
+_ddgs_local = threading.local()
+
+
+def get_ddgs():
+    """One DDGS client per thread, reused across searches instead of reopened per query"""
+    if getattr(_ddgs_local, 'client', None) is None:
+        _ddgs_local.client = DDGS()
+    return _ddgs_local.client
+
+
+def search_images(query, max_results):
+    """DDGS image search, answered from the on-disk cache when the query was already searched"""
+    key = f"{max_results}:{query}"
+    results = image_search_cache.get(key)
+    if results is None:
+        host_rate_limiter.acquire(SEARCH_HOST)
+        results = image_search_cache.set(key, list(get_ddgs().images(query, max_results=max_results)))
+    return results
+
+
 #def download_duck_image(request):
 def download_duck_image_v1(make, model, year):
     make = make.strip() #request.GET.get('make')
@@ -297,8 +399,7 @@ def download_duck_image_v1(make, model, year):
         })
 
     try:
-        with DDGS() as ddgs:
-            results = list(ddgs.images(query, max_results=30))
+        results = search_images(query, max_results=30)
 
         if not results:
             return Response({"error": "No image found"}, status=404)
@@ -327,11 +428,10 @@ def download_duck_image_v1(make, model, year):
 
         # Download the image
         img_url = image_info['image']
-        response = requests.get(img_url, timeout=10)
-        response.raise_for_status()
+        content = http_client.fetch_sync(img_url)
 
         # ✅ 3. Resize image to width 720px using Pillow
-        image = Image.open(BytesIO(response.content))
+        image = Image.open(BytesIO(content))
         if image.width > 720:
             ratio = 720 / image.width
             new_size = (720, int(image.height * ratio))
@@ -371,16 +471,18 @@ def download_duck_image(make, model, year):
 
     # Check if image already exists
     if os.path.exists(file_path):
-        return Response({
+        return {
             "message": "Image already exists",
             "filename": filename,
             "url": f"{settings.MEDIA_URL}{filename}"
-        })
+        }
+
+    # Candidates narrower than this are skipped
+    min_width = getattr(settings, 'SCRAPER_MIN_IMAGE_WIDTH', 480)
 
     # Image search
     def get_image_url(query):
-        with DDGS() as ddgs:
-            results = list(ddgs.images(query, max_results=10))
+        results = search_images(query, max_results=10)
         
         user_agents = [
             'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Ubuntu Chromium/37.0.2062.94 Chrome/37.0.2062.94 Safari/537.36',
@@ -424,23 +526,28 @@ def download_duck_image(make, model, year):
             'Mozilla/5.0 (Windows NT 6.0) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/45.0.2454.85 Safari/537.36'
         ]
         for result in results:
-            delay = random.choice([15, 30, 45, 60])
-            print(f"Next in {delay}sec.")
-            time.sleep(delay)
+            print(f"{make}-{model}-{year} = {result.get('image')}")
 
-            print(f"{make}-{model}-{year} = {result['image']}")
+            # The search result already reports the size of most candidates
+            reported_width, reported_height = int(result.get('width') or 0), int(result.get('height') or 0)
+            if reported_width and reported_height and (reported_width <= reported_height or reported_width < min_width):
+                continue
             
             if 'image' in result:
                 try:
-                    #img_resp = requests.get(result['image'], timeout=10)
+                    # Per-host token bucket instead of a fixed random sleep per candidate
+                    host_rate_limiter.acquire(result['image'])
                     headers = {
                         "User-Agent": random.choice(user_agents),
                         "Accept-Language": "en-US,en;q=0.9",
                         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
                         "Referer": "https://google.com"
                     }
-                    img_resp = requests.get(result['image'], headers=headers)
-                    img = Image.open(BytesIO(img_resp.content))
+                    # Reads only the header of portrait / undersized candidates before dropping the connection
+                    content = fetch_landscape_image(result['image'], headers=headers, min_width=min_width)
+                    if content is None:
+                        continue
+                    img = Image.open(BytesIO(content))
                     if img.width > img.height:  # landscape only
                         return img
                 except Exception:
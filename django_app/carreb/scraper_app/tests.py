@@ -1,3 +1,629 @@
-from django.test import TestCase
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from PIL import Image, ImageDraw
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from api.models import Vehicles, VehicleImages
+
+from .services import (
+    parse_vehicle_engine_spec,
+    parse_vehicle_transmission_spec,
+    parse_vehicle_tailpipe,
+    normalize_liter_string,
+    clear_spec_parser_caches,
+)
+from .image_probe import image_size_from_header, landscape_inspector
+from api.http_client import AsyncHttpClient, HttpFetchError
+from .search_cache import ImageSearchCache
+from .image_dedup import HASH_BANDS, PHashIndex, dedupe_vehicle_images
+from .image_worker import (
+    NO_IMAGE,
+    acquire_pass_lock,
+    load_checkpoint,
+    save_checkpoint,
+    start_image_pass,
+    run_image_pass,
+    _pending_chunk,
+)
+from .rate_limits import TokenBucket
+from .models import GVGVehicleData
+from .gvg_import import import_gvg_vehicles, parse_gvg_vehicle
+
+# Outputs recorded from the original if/elif parsers; the rule-table parsers must match them exactly
+GOLDEN_ENGINE_SPECS = [
+    ('0.6L Electric Plug-in Electric/Petrol 91RON', {'engine_capacity': '0.6L', 'engine_cylinder': '', 'induction': '', 'engine_type': '', 'fuel_grade': 'Electric Plug-in Electric/Petrol 91RON'}),
+    ('1.5L 3cyl Plug-in Electric/Petrol 95RON', {'engine_capacity': '1.5L', 'engine_cylinder': '3cyl', 'induction': '', 'engine_type': 'Plug-in Electric/Petrol', 'fuel_grade': '95RON'}),
+    ('2.5L 4cyl Plug-in Electric/Petrol 91RON', {'engine_capacity': '2.5L', 'engine_cylinder': '4cyl', 'induction': '', 'engine_type': 'Plug-in Electric/Petrol', 'fuel_grade': '91RON'}),
+    ('2.0L 4cyl Turbo Petrol 95RON', {'engine_capacity': '2.0L', 'engine_cylinder': '4cyl', 'induction': 'Turbo', 'engine_type': 'Petrol', 'fuel_grade': '95RON'}),
+    ('3.0L 6cyl Twin-Turbo Petrol 98RON', {'engine_capacity': '3.0L', 'engine_cylinder': '6cyl', 'induction': 'Twin-Turbo', 'engine_type': 'Petrol', 'fuel_grade': '98RON'}),
+    ('1.8L 4cyl Petrol 91RON', {'engine_capacity': '1.8L', 'engine_cylinder': '4cyl', 'induction': '', 'engine_type': 'Petrol', 'fuel_grade': '91RON'}),
+    ('5.0L 8cyl Petrol 98 RON', {'engine_capacity': '5.0L', 'engine_cylinder': '8cyl', 'induction': '', 'engine_type': 'Petrol', 'fuel_grade': 'RON'}),
+    ('2.5L 4cyl Electric/Petrol 91RON', {'engine_capacity': '2.5L', 'engine_cylinder': '4cyl', 'induction': '', 'engine_type': 'Electric', 'fuel_grade': '91RON'}),
+    ('2.8L 4cyl Diesel', {'engine_capacity': '2.8L', 'engine_cylinder': '4cyl', 'induction': '', 'engine_type': 'Diesel', 'fuel_grade': ''}),
+    ('2.8L 4cyl Turbo Diesel', {'engine_capacity': '2.8L', 'engine_cylinder': '4cyl', 'induction': 'Turbo', 'engine_type': 'Diesel', 'fuel_grade': ''}),
+    ('2.0L 4cyl Turbo Plug-in Electric/Petrol 95RON', {'engine_capacity': '2.0L', 'engine_cylinder': '4cyl', 'induction': 'Turbo', 'engine_type': 'Plug-in Electric/Petrol', 'fuel_grade': '95RON'}),
+    ('2.0L 4cyl Turbo Electric/Petrol 95RON', {'engine_capacity': '2.0L', 'engine_cylinder': '4cyl', 'induction': 'Turbo', 'engine_type': 'Electric/Petrol', 'fuel_grade': '95RON'}),
+    ('3.0L 6cyl Turbo Electric/Diesel', {'engine_capacity': '3.0L', 'engine_cylinder': '6cyl', 'induction': 'Turbo', 'engine_type': 'Electric/Diesel', 'fuel_grade': ''}),
+    ('2.0L 4cyl Turbo Plug-in Electric/Diesel', {'engine_capacity': '2.0L', 'engine_cylinder': '4cyl', 'induction': 'Turbo', 'engine_type': '', 'fuel_grade': ''}),
+    ('Pure Electric', {'engine_capacity': '', 'engine_cylinder': '', 'induction': '', 'engine_type': 'Pure Electric', 'fuel_grade': ''}),
+    ('Hydrogen Fuel Cell', {'engine_capacity': '', 'engine_cylinder': '', 'induction': '', 'engine_type': '', 'fuel_grade': ''}),
+    ('', {'engine_capacity': '', 'engine_cylinder': '', 'induction': '', 'engine_type': '', 'fuel_grade': ''}),
+]
+
+GOLDEN_TRANSMISSION_SPECS = [
+    ('Automatic 8 speed', {'speed': 8, 'type': 'Automatic'}),
+    ('Manual 6 spd', {'speed': 6, 'type': 'Manual'}),
+    ('Automatic (CVT)', {'speed': None, 'type': 'Automatic (CVT)'}),
+    ('Automatic 10 Speed Sports', {'speed': 10, 'type': 'Automatic  Sports'}),
+    ('Reduction gear', {'speed': None, 'type': 'Reduction gear'}),
+    ('', {'speed': None, 'type': ''}),
+]
+
+GOLDEN_TAILPIPE_SPECS = [
+    ('95', {'value': '95', 'note': ''}),
+    ('0 [est]', {'value': '0', 'note': 'est'}),
+    ('N/A', {'value': '', 'note': ''}),
+    (' 142 ', {'value': '142', 'note': ''}),
+    ('N/A [not tested]', {'value': 'N/A', 'note': 'not tested'}),
+    ('120 g/km', {'value': '', 'note': ''}),
+    ('', {'value': '', 'note': ''}),
+]
+
+GOLDEN_LITER_SPECS = [
+    ('2L', '2.0L'),
+    ('1.5L', '1.5L'),
+    ('1.50l', '1.50L'),
+    ('2 L', '2 L'),
+    ('N/A', 'N/A'),
+    ('', ''),
+]
+
+
+class SpecParserGoldenTests(SimpleTestCase):
+    def setUp(self):
+        clear_spec_parser_caches()
+
+    def assert_golden(self, parser, golden):
+        # Second pass is served from the memo cache
+        for _ in range(2):
+            for raw, expected in golden:
+                with self.subTest(raw=raw):
+                    self.assertEqual(parser(raw), expected)
+
+    def test_engine_specs(self):
+        self.assert_golden(parse_vehicle_engine_spec, GOLDEN_ENGINE_SPECS)
+
+    def test_transmission_specs(self):
+        self.assert_golden(parse_vehicle_transmission_spec, GOLDEN_TRANSMISSION_SPECS)
+
+    def test_tailpipe_specs(self):
+        self.assert_golden(parse_vehicle_tailpipe, GOLDEN_TAILPIPE_SPECS)
+
+    def test_liter_strings(self):
+        self.assert_golden(normalize_liter_string, GOLDEN_LITER_SPECS)
+
+    def test_cached_results_are_copies(self):
+        parse_vehicle_engine_spec('2.0L 4cyl Turbo Petrol 95RON')['engine_type'] = 'changed'
+        self.assertEqual(parse_vehicle_engine_spec('2.0L 4cyl Turbo Petrol 95RON')['engine_type'], 'Petrol')
+
+
+class ImageHeaderProbeTests(SimpleTestCase):
+    def encode(self, size, image_format, **options):
+        buffer = BytesIO()
+        Image.new('RGB', size, (200, 30, 30)).save(buffer, format=image_format, **options)
+        return buffer.getvalue()
+
+    def test_sizes_from_first_chunk(self):
+        cases = [
+            ('JPEG', {}),
+            ('JPEG', {'progressive': True}),
+            ('PNG', {}),
+            ('GIF', {}),
+            ('WEBP', {}),
+            ('WEBP', {'lossless': True}),
+        ]
+        for image_format, options in cases:
+            with self.subTest(image_format=image_format, options=options):
+                data = self.encode((1280, 853), image_format, **options)
+                self.assertEqual(tuple(image_size_from_header(data[:4096])), (1280, 853))
+
+    def test_truncated_or_unknown_header(self):
+        self.assertIsNone(image_size_from_header(self.encode((640, 480), 'PNG')[:12]))
+        self.assertIsNone(image_size_from_header(b'<html>blocked</html>'))
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def send_body(self, status, body):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client dropped the connection after reading the header
+            pass
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            server.ports.add(self.client_address[1])
+            server.in_flight += 1
+            server.max_in_flight = max(server.max_in_flight, server.in_flight)
+            hits = server.hits[self.path]
+        try:
+            if self.path == '/ok':
+                self.send_body(200, b'ok')
+            elif self.path == '/flaky':
+                self.send_body(503 if hits < 3 else 200, b'flaky')
+            elif self.path == '/missing':
+                self.send_body(404, b'missing')
+            elif self.path == '/hang':
+                time.sleep(1)
+                self.send_body(200, b'late')
+            elif self.path.startswith('/slow'):
+                time.sleep(0.2)
+                self.send_body(200, b'slow')
+            elif self.path in ('/portrait.png', '/landscape.png'):
+                self.send_body(200, server.images[self.path])
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+class StubServer(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Clients hang up mid-request on purpose here (timeouts, retries)
+        pass
+
+
+class AsyncHttpClientTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = StubServer(('127.0.0.1', 0), StubHandler)
+        cls.server.daemon_threads = True
+        cls.server.lock = threading.Lock()
+        cls.server.images = {}
+        for path, size in [('/portrait.png', (400, 900)), ('/landscape.png', (900, 400))]:
+            buffer = BytesIO()
+            Image.effect_noise(size, 60).save(buffer, format='PNG')
+            cls.server.images[path] = buffer.getvalue()
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.server.hits = {}
+        self.server.ports = set()
+        self.server.in_flight = 0
+        self.server.max_in_flight = 0
+        self.client = AsyncHttpClient(pool_size=10, per_host=2, timeout=0.5, retries=2, backoff=0.01)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_reuses_connections(self):
+        for _ in range(5):
+            self.assertEqual(self.client.fetch_sync(f"{self.base_url}/ok"), b'ok')
+        self.assertEqual(len(self.server.ports), 1)
+
+    def test_retries_transient_errors(self):
+        self.assertEqual(self.client.fetch_sync(f"{self.base_url}/flaky"), b'flaky')
+        self.assertEqual(self.server.hits['/flaky'], 3)
+
+    def test_does_not_retry_client_errors(self):
+        with self.assertRaises(HttpFetchError) as raised:
+            self.client.fetch_sync(f"{self.base_url}/missing")
+        self.assertEqual(raised.exception.status, 404)
+        self.assertEqual(self.server.hits['/missing'], 1)
+
+    def test_times_out_after_retries(self):
+        with self.assertRaises(HttpFetchError):
+            self.client.fetch_sync(f"{self.base_url}/hang")
+        self.assertEqual(self.server.hits['/hang'], 3)
+
+    def test_caps_concurrency_per_host(self):
+        urls = [f"{self.base_url}/slow{i}" for i in range(6)]
+        self.assertEqual(self.client.run(self.client.fetch_many(urls)), [b'slow'] * 6)
+        self.assertEqual(self.server.max_in_flight, 2)
+
+    def test_inspector_drops_portrait_images(self):
+        self.assertIsNone(self.client.fetch_sync(f"{self.base_url}/portrait.png", inspect=landscape_inspector()))
+        body = self.client.fetch_sync(f"{self.base_url}/landscape.png", inspect=landscape_inspector(min_width=480))
+        self.assertEqual(body, self.server.images['/landscape.png'])
+
+
+class ImageSearchCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ImageSearchCache(os.path.join(self.directory.name, 'searches.sqlite3'), ttl=60, negative_ttl=1)
+
+    def tearDown(self):
+        self.cache.close()
+        self.directory.cleanup()
+
+    def test_round_trip_keeps_only_used_fields(self):
+        self.assertIsNone(self.cache.get('2023 toyota corolla'))
+        self.cache.set('2023 toyota corolla', [{'image': 'https://a/1.jpg', 'width': 1200, 'height': 800, 'thumbnail': 'x'}])
+        self.assertEqual(self.cache.get('2023 toyota corolla'), [{'image': 'https://a/1.jpg', 'width': 1200, 'height': 800}])
+
+    def test_empty_results_expire_after_negative_ttl(self):
+        self.cache.set('1999 unknown car', [])
+        self.assertEqual(self.cache.get('1999 unknown car'), [])
+        self.cache.negative_ttl = 0
+        time.sleep(0.01)
+        self.assertIsNone(self.cache.get('1999 unknown car'))
+        self.assertEqual(self.cache.purge_expired(), 1)
+
+
+def save_photo(path, mirrored=False, size=(320, 200), quality=90):
+    """A gradient with two shapes; resized or recompressed copies hash the same, a mirror does not"""
+    image = Image.new('RGB', (320, 200))
+    draw = ImageDraw.Draw(image)
+    for x in range(320):
+        draw.line([(x, 0), (x, 199)], fill=(x * 255 // 320, 80, 160))
+    draw.rectangle([60, 50, 150, 140], fill=(250, 250, 250))
+    draw.ellipse([200, 90, 290, 180], fill=(10, 10, 10))
+    if mirrored:
+        image = image.transpose(Image.FLIP_LEFT_RIGHT)
+    image.resize(size).save(path, 'JPEG', quality=quality)
+
+
+def create_vehicle(pk, model, year='2024'):
+    vehicle_id = f'CRB-{year}-{pk:06d}'
+    Vehicles.objects.create(
+        id=pk, vehicle_id=vehicle_id, year=year, make='TOY', make_name='Toyota', model=model,
+        body='Sedan', doors=4, seats=5, engine='2.0L', engine_type='Petrol', transmission_speed=6,
+        drivetrain='FWD', annual_cost=1000, fuel_consumption_comb=6, fuel_consumption_urban=0,
+        fuel_consumption_extra=0, energy_consumption=0, electric_range=0, annual_tailpipe_co2=0,
+        fuel_lifecycle_co2=0, tailpipe_comb_value='150',
+    )
+    return vehicle_id
+
+
+class DedupeVehicleImagesTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(SCRAPER_DL_PATH=self.directory.name)
+        self.settings_override.enable()
+
+        save_photo(self.path('corolla-2023.jpg'))
+        save_photo(self.path('corolla-2024.jpg'), size=(300, 188), quality=60)
+        save_photo(self.path('corolla-2025.jpg'), mirrored=True)
+        # Derivatives of the 2024 duplicate, written by build_image_derivatives
+        for filename in ['corolla-2024-240w.webp', 'corolla-2024-480w.webp']:
+            save_photo(self.path(filename))
+
+        self.add_image(1, 'Corolla', 'corolla-2023.jpg')
+        self.add_image(2, 'Corolla', 'corolla-2024.jpg', widths=[240, 480], formats=['webp'])
+        self.add_image(3, 'Corolla', 'corolla-2025.jpg')
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.directory.cleanup()
+
+    def path(self, filename):
+        return os.path.join(self.directory.name, filename)
+
+    def add_image(self, pk, model, image_name, widths=(), formats=()):
+        vehicle_id = create_vehicle(pk, model)
+        VehicleImages.objects.create(vehicle_id=vehicle_id, image_name=image_name, image_widths=list(widths), image_formats=list(formats))
+
+    def image_names(self):
+        return dict(VehicleImages.objects.values_list('vehicle_id', 'image_name'))
+
+    def test_relinks_duplicate_and_removes_its_files(self):
+        result = dedupe_vehicle_images()
+
+        self.assertEqual(self.image_names(), {
+            'CRB-2024-000001': 'corolla-2023.jpg',
+            'CRB-2024-000002': 'corolla-2023.jpg',
+            'CRB-2024-000003': 'corolla-2025.jpg',
+        })
+        self.assertEqual(result['removed_files'], ['corolla-2024-240w.webp', 'corolla-2024-480w.webp', 'corolla-2024.jpg'])
+        self.assertEqual(sorted(os.listdir(self.directory.name)), ['corolla-2023.jpg', 'corolla-2025.jpg'])
+
+    def test_keeps_files_another_model_still_uses(self):
+        # Same file on a different model: it is that model's canonical copy and must survive
+        self.add_image(4, 'Camry', 'corolla-2024.jpg', widths=[240, 480], formats=['webp'])
+
+        result = dedupe_vehicle_images()
+
+        self.assertEqual(self.image_names()['CRB-2024-000002'], 'corolla-2023.jpg')
+        self.assertEqual(self.image_names()['CRB-2024-000004'], 'corolla-2024.jpg')
+        self.assertEqual(result['removed_files'], [])
+        self.assertTrue(os.path.exists(self.path('corolla-2024.jpg')))
+        self.assertTrue(os.path.exists(self.path('corolla-2024-240w.webp')))
+
+    def test_does_not_link_across_models(self):
+        save_photo(self.path('camry-2024.jpg'), size=(300, 188))
+        self.add_image(4, 'Camry', 'camry-2024.jpg')
+
+        dedupe_vehicle_images()
+
+        self.assertEqual(self.image_names()['CRB-2024-000004'], 'camry-2024.jpg')
+        self.assertTrue(os.path.exists(self.path('camry-2024.jpg')))
+
+    def test_dry_run_reports_without_changing_anything(self):
+        files_before = sorted(os.listdir(self.directory.name))
+        names_before = self.image_names()
+
+        result = dedupe_vehicle_images(dry_run=True)
+
+        self.assertEqual(result['links'], [{'vehicle_id': 'CRB-2024-000002', 'from': 'corolla-2024.jpg', 'to': 'corolla-2023.jpg'}])
+        self.assertEqual(result['files_removed'], 3)
+        self.assertEqual(self.image_names(), names_before)
+        self.assertEqual(sorted(os.listdir(self.directory.name)), files_before)
+        self.assertFalse(VehicleImages.objects.exclude(phash__isnull=True).exists())
+
+    def test_max_distance_must_be_below_hash_bands(self):
+        with self.assertRaises(ValueError):
+            PHashIndex(max_distance=HASH_BANDS)
+        with override_settings(IMAGE_DEDUP_MAX_DISTANCE=HASH_BANDS + 2):
+            with self.assertRaises(ValueError):
+                dedupe_vehicle_images()
+
+
+class TokenBucketTests(SimpleTestCase):
+    def test_allows_a_burst_then_paces_to_the_rate(self):
+        bucket = TokenBucket(rate=20, capacity=2)
+
+        started = time.monotonic()
+        bucket.acquire()
+        bucket.acquire()
+        burst = time.monotonic() - started
+        bucket.acquire()
+        paced = time.monotonic() - started
+
+        self.assertLess(burst, 0.02)
+        self.assertGreaterEqual(paced, 0.04)
+
+
+class ImagePassTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            SCRAPER_IMAGE_CHECKPOINT_PATH=os.path.join(self.directory.name, 'image_pass_checkpoint.json'),
+            SCRAPER_REUSE_SIBLING_IMAGES=False,
+            SCRAPER_DL_PATH=self.directory.name,
+            IMAGE_DERIVATIVE_WIDTHS=[120, 240],
+            IMAGE_DERIVATIVE_FORMATS=['webp'],
+        )
+        self.settings_override.enable()
+
+        # 1-4 need an image, 5 already has one, 6 has no VehicleImages row
+        for pk in range(1, 7):
+            vehicle_id = create_vehicle(pk, 'Corolla', year=str(2018 + pk))
+            if pk <= 4:
+                VehicleImages.objects.create(vehicle_id=vehicle_id)
+            elif pk == 5:
+                VehicleImages.objects.create(vehicle_id=vehicle_id, image_name='corolla-2023.jpg')
+
+        self.download = mock.patch(
+            'scraper_app.image_worker._download',
+            side_effect=lambda vehicle: NO_IMAGE if vehicle['id'] == 3 else f"{vehicle['vehicle_id']}.jpg",
+        )
+        self.download.start()
+
+    def tearDown(self):
+        self.download.stop()
+        self.settings_override.disable()
+        self.directory.cleanup()
+
+    def image_names(self):
+        return dict(VehicleImages.objects.values_list('vehicle_id', 'image_name'))
+
+    def test_pending_chunk_returns_vehicles_still_missing_an_image(self):
+        vehicles, pending = _pending_chunk(0, 5)
+
+        self.assertEqual([vehicle['id'] for vehicle in vehicles], [1, 2, 3, 4, 5])
+        self.assertEqual([vehicle['id'] for vehicle, _ in pending], [1, 2, 3, 4])
+
+        vehicles, pending = _pending_chunk(4, 5)
+
+        self.assertEqual([vehicle['id'] for vehicle in vehicles], [5, 6])
+        self.assertEqual(pending, [])
+
+    def test_resumes_after_the_checkpointed_vehicle(self):
+        save_checkpoint({'status': 'running', 'last_vehicle_id': 2, 'checked': 2, 'downloaded': 2, 'not_found': 0, 'reused': 0})
+
+        result = run_image_pass(workers=2)
+
+        self.assertEqual(result['status'], 'complete')
+        self.assertEqual(result['last_vehicle_id'], 6)
+        self.assertEqual((result['checked'], result['downloaded'], result['not_found']), (6, 3, 1))
+        self.assertIsNone(self.image_names()['CRB-2019-000001'])
+        self.assertEqual(self.image_names()['CRB-2021-000003'], NO_IMAGE)
+        self.assertEqual(self.image_names()['CRB-2022-000004'], 'CRB-2022-000004.jpg')
+        self.assertEqual(load_checkpoint(), result)
+
+    def test_completed_checkpoint_starts_over(self):
+        save_checkpoint({'status': 'complete', 'last_vehicle_id': 6, 'checked': 6})
+
+        result = run_image_pass(workers=1)
+
+        self.assertEqual(result['checked'], 6)
+        self.assertEqual(self.image_names()['CRB-2019-000001'], 'CRB-2019-000001.jpg')
+
+    def test_new_downloads_get_derivatives(self):
+        # The download of vehicle 2 left no readable file
+        for vehicle_id in ('CRB-2019-000001', 'CRB-2022-000004'):
+            save_photo(os.path.join(self.directory.name, f'{vehicle_id}.jpg'))
+
+        run_image_pass(workers=2)
+
+        images = {image.vehicle_id: image for image in VehicleImages.objects.all()}
+        for vehicle_id in ('CRB-2019-000001', 'CRB-2022-000004'):
+            self.assertEqual(images[vehicle_id].image_widths, [120, 240])
+            self.assertEqual(images[vehicle_id].image_formats, ['webp'])
+            self.assertTrue(images[vehicle_id].image_placeholder.startswith('data:image/webp;base64,'))
+            self.assertTrue(os.path.exists(os.path.join(self.directory.name, f'{vehicle_id}-240w.webp')))
+        # Left for build_image_derivatives to retry
+        self.assertEqual(images['CRB-2020-000002'].image_widths, [])
+
+    def test_only_one_pass_holds_the_lock(self):
+        lock_file = acquire_pass_lock()
+        self.assertIsNotNone(lock_file)
+        try:
+            self.assertIsNone(acquire_pass_lock())
+            self.assertFalse(start_image_pass())
+        finally:
+            lock_file.close()
+
+        lock_file = acquire_pass_lock()
+        self.assertIsNotNone(lock_file)
+        lock_file.close()
+
+
+class ScraperEndpointPermissionTests(APITestCase):
+    def test_gvg_import_requires_an_admin(self):
+        with mock.patch('scraper_app.views.import_gvg_vehicles') as import_gvg_vehicles:
+            response = self.client.post('/scraper/gvg/data/parse/')
+
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+        import_gvg_vehicles.assert_not_called()
+
+    def test_image_pass_requires_an_admin(self):
+        with mock.patch('scraper_app.views_cars.start_image_pass') as start_image_pass:
+            response = self.client.post('/scraper/ddg/dl/cars/')
+
+        self.assertIn(response.status_code, (status.HTTP_401_UNAUTHORIZED, status.HTTP_403_FORBIDDEN))
+        start_image_pass.assert_not_called()
+
+
+class ImagePassEndpointTests(APITestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.settings_override = override_settings(
+            SCRAPER_IMAGE_CHECKPOINT_PATH=os.path.join(self.directory.name, 'image_pass_checkpoint.json'),
+        )
+        self.settings_override.enable()
+        admin = User.objects.create_superuser('admin', 'admin@example.com', 'password')
+        self.client.force_authenticate(admin)
+
+    def tearDown(self):
+        self.settings_override.disable()
+        self.directory.cleanup()
+
+    def test_polling_a_finished_pass_does_not_start_another(self):
+        save_checkpoint({'status': 'complete', 'last_vehicle_id': 6, 'checked': 6})
+
+        with mock.patch('scraper_app.views_cars.start_image_pass') as start_image_pass:
+            response = self.client.get('/scraper/ddg/dl/cars/')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['progress']['status'], 'complete')
+        start_image_pass.assert_not_called()
+
+    def test_post_starts_a_pass(self):
+        with mock.patch('scraper_app.views_cars.start_image_pass', return_value=True) as start_image_pass:
+            response = self.client.post('/scraper/ddg/dl/cars/')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'started')
+        start_image_pass.assert_called_once_with()
+
+
+def gvg_row(model, **overrides):
+    fields = {
+        'year': '2023', 'make': 'TOY', 'make_name': 'Toyota', 'model': f'Toyota {model}', 'vehicle_class': 'Small',
+        'body': 'Hatch 5 door 5 seat', 'engine': '1.8L 4cyl Petrol 91RON', 'transmission': 'Automatic 8 speed',
+        'drivetrain': 'FWD', 'tailpipe_comb': '95', 'tailpipe_urban': 'N/A', 'tailpipe_extra': '80 [est]',
+        'annual_cost': 'N/A', 'fuel_consumption_comb': '4.0', 'fuel_consumption_urban': 'N/A',
+        'fuel_consumption_extra': '3.9', 'energy_consumption': 'N/A', 'electric_range': 'N/A',
+        'air_pollution_standard': 'Euro 6', 'annual_tailpipe_co2': '1300', 'fuel_lifecycle_co2': '1600', 'noise_data': 'N/A',
+    }
+    fields.update(overrides)
+    return GVGVehicleData(**fields)
+
+
+# GVGVehicleData is unmanaged and normally read from scraper_db; tests give it a table on default
+@override_settings(DATABASE_ROUTERS=[])
+class GVGImportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with connection.schema_editor() as schema_editor:
+            schema_editor.create_model(GVGVehicleData)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connection.schema_editor() as schema_editor:
+            schema_editor.delete_model(GVGVehicleData)
+
+    def setUp(self):
+        GVGVehicleData.objects.bulk_create([gvg_row(model) for model in ('Corolla', 'Yaris', 'Camry')])
+
+    def test_reimport_creates_no_duplicates(self):
+        first = import_gvg_vehicles(chunk_size=2)
+        vehicle_ids = dict(Vehicles.objects.values_list('source_id', 'vehicle_id'))
+
+        second = import_gvg_vehicles(chunk_size=2)
+
+        self.assertEqual((first['inserted'], first['unchanged']), (3, 0))
+        self.assertEqual((second['inserted'], second['updated'], second['unchanged']), (0, 0, 3))
+        self.assertEqual(dict(Vehicles.objects.values_list('source_id', 'vehicle_id')), vehicle_ids)
+
+    def test_adopts_a_legacy_row_by_natural_key(self):
+        legacy = parse_gvg_vehicle(GVGVehicleData.objects.get(model='Toyota Yaris'))
+        legacy.source_id = legacy.source_hash = None
+        legacy.id, legacy.vehicle_id = 50, 'CRB-2023-000050'
+        legacy.save()
+
+        summary = import_gvg_vehicles()
+
+        self.assertEqual((summary['inserted'], summary['updated']), (2, 1))
+        self.assertEqual(Vehicles.objects.count(), 3)
+        adopted = Vehicles.objects.get(model='Yaris')
+        self.assertEqual((adopted.id, adopted.vehicle_id), (50, 'CRB-2023-000050'))
+        self.assertEqual(adopted.source_id, GVGVehicleData.objects.get(model='Toyota Yaris').id)
+        # New rows are numbered after the adopted one
+        self.assertEqual(sorted(Vehicles.objects.values_list('id', flat=True)), [50, 51, 52])
+
+    def test_updates_only_rows_whose_fingerprint_changed(self):
+        import_gvg_vehicles()
+        GVGVehicleData.objects.filter(model='Toyota Camry').update(annual_cost='1500')
+
+        with mock.patch.object(Vehicles.objects, 'bulk_update', wraps=Vehicles.objects.bulk_update) as bulk_update:
+            summary = import_gvg_vehicles()
+
+        self.assertEqual((summary['inserted'], summary['updated'], summary['unchanged']), (0, 1, 2))
+        bulk_update.assert_called_once()
+        self.assertEqual([vehicle.model for vehicle in bulk_update.call_args.args[0]], ['Camry'])
+        self.assertEqual(Vehicles.objects.get(model='Camry').annual_cost, 1500)
+
+
+class ParseGVGVehicleTests(SimpleTestCase):
+    def test_make_name_is_removed_literally_from_the_model(self):
+        for make_name, model, expected in [
+            ('Toyota', 'TOYOTA Corolla', 'Corolla'),
+            ('C+', 'C+ Pod', 'Pod'),
+            ('Lynk & Co (Geely)', 'Lynk & Co (Geely) 01', '01'),
+            ('Ora (', 'Ora ( Cat', 'Cat'),
+        ]:
+            source = gvg_row('', make_name=make_name)
+            source.model = model
+            vehicle = parse_gvg_vehicle(source)
+            self.assertEqual(vehicle.model, expected)
@@ -2,33 +2,23 @@ import uuid
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .services import download_duck_image
+from rest_framework.permissions import IsAdminUser
 from rest_framework.decorators import api_view
-from api.models import Vehicles, VehicleImages
+from .image_worker import start_image_pass, load_checkpoint
 
 
 class DownloadCarImageFromDDG(APIView):
-    def get(self, request):
-
-        cars = Vehicles.objects.all()
-
-        for car in cars:
-            filename = '-'
-            car_image = VehicleImages.objects.get(vehicle_id=car.vehicle_id)
+    permission_classes = [IsAdminUser]
 
-            if car_image.image_name != '-' :
-                if not car_image.image_name:
-                    response = download_duck_image( car.make_name, car.model, car.year )
-
-                    if 'filename' in response:
-                        filename = response['filename']
-                    else:
-                        filename = '-'
+    def get(self, request):
+        # Progress of the current (or last) pass; never starts one
+        return Response({"progress": load_checkpoint()}, status=status.HTTP_200_OK)
 
-                    v = VehicleImages.objects.get(vehicle_id=car.vehicle_id)
-                    v.image_name = filename
-                    v.save()
+    def post(self, request):
+        # The pass runs on a background thread; GET this endpoint for progress
+        started = start_image_pass()
 
-                    print(f'{response}')
-        
-        return Response({"status": 'done'}, status=200)
\ No newline at end of file
+        return Response({
+            "status": 'started' if started else 'running',
+            "progress": load_checkpoint(),
+        }, status=status.HTTP_202_ACCEPTED)